@@ -0,0 +1,82 @@
+from argparse import ArgumentParser
+from io import BytesIO
+from time import perf_counter
+
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import RDF, RDFS, XSD
+
+from sls_api.serializers import NTriplesWriter, TurtleWriter, nt_term
+
+EX = "http://example.org/"
+
+
+def make_graph(subjects: int) -> Graph:
+    graph = Graph()
+    for index in range(subjects):
+        subject = URIRef(f"{EX}s{index}")
+        graph.add((subject, RDF.type, URIRef(f"{EX}Class{index % 10}")))
+        graph.add((subject, RDFS.label, Literal(f"label {index}", lang="en")))
+        graph.add((subject, URIRef(f"{EX}value"), Literal(index, datatype=XSD.integer)))
+        graph.add((subject, URIRef(f"{EX}link"), URIRef(f"{EX}s{index // 2}")))
+        graph.add((subject, RDFS.comment, Literal(f'"quoted"\n{index}')))
+    return graph
+
+
+def timed(function) -> tuple[float, bytes]:
+    start = perf_counter()
+    data = function()
+    return perf_counter() - start, data
+
+
+def main():
+    parser = ArgumentParser(description="Compare the serializers with rdflib")
+    parser.add_argument("--subjects", type=int, default=50_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    graph = make_graph(args.subjects)
+    # the terms as received by the raw export iterators, sorted by subject
+    rows = sorted(tuple(nt_term(term) for term in triple) for triple in graph)
+    batches = [
+        rows[start : start + args.batch_size]
+        for start in range(0, len(rows), args.batch_size)
+    ]
+
+    def write_ntriples() -> bytes:
+        fp = BytesIO()
+        writer = NTriplesWriter(fp)
+        for batch in batches:
+            writer.write_terms(batch)
+        return fp.getvalue()
+
+    def write_turtle() -> bytes:
+        fp = BytesIO()
+        writer = TurtleWriter(fp, {"ex": EX})
+        for batch in batches:
+            writer.write_terms(batch)
+        writer.close()
+        return fp.getvalue()
+
+    print(f"{len(graph)} triples")
+
+    rdflib_time, expected = timed(
+        lambda: graph.serialize(format="nt", encoding="utf-8")
+    )
+    writer_time, data = timed(write_ntriples)
+    # rdflib writes the triples in the order of its index
+    same = sorted(expected.splitlines()) == sorted(data.splitlines())
+    print(
+        f"nt      rdflib {rdflib_time:.2f}s  writer {writer_time:.2f}s  same lines: {same}"
+    )
+
+    rdflib_time, _ = timed(lambda: graph.serialize(format="turtle", encoding="utf-8"))
+    writer_time, data = timed(write_turtle)
+    # without blank nodes, isomorphic graphs hold the same triples
+    same = set(Graph().parse(data=data, format="turtle")) == set(graph)
+    print(
+        f"turtle  rdflib {rdflib_time:.2f}s  writer {writer_time:.2f}s  same graph: {same}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,34 @@
+from asyncio import wrap_future
+from base64 import b64encode
+from bisect import bisect_left
+from functools import partial
+from os import utime
 from pathlib import Path
 from typing import Annotated
-from tempfile import gettempdir
 
-from fastapi import Depends, Form, Header, HTTPException, UploadFile
+from anyio import to_thread
+from fastapi import Depends, Form, Header, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
 from ulid import ULID
 
 
 from sls_api.app import App
+from sls_api.download import (
+    RangeNotSatisfiable,
+    content_disposition,
+    iter_file,
+    negotiate_encoding,
+    parse_range,
+)
+from sls_api.graph import LINE_BASED_SUFFIXES
+from sls_api.jobs import ExportJob
+from sls_api.serializers import BINARY_FORMAT, MEDIA_TYPES
+from sls_api.sessions import MAX_CHUNKS, ChunkError, UploadSession
+from sls_api.users import User
+from sls_api.utils import append_chunk, read_page
+
+# number of bytes of an uploaded chunk buffered before writing them
+WRITE_SIZE = 1 << 20
 
 app = App()
 
@@ -29,67 +51,323 @@ async def verify_token(authorization: Annotated[str, Header()]):
     return user
 
 
+def get_spool_path(identifier: str, suffix: str) -> Path:
+    # both may come from the client
+    try:
+        return app.spool.path(identifier, suffix)
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+
+
 @app.get("/")
-def read_root(user: Annotated[dict, Depends(verify_token)]):
+async def read_root(user: Annotated[dict, Depends(verify_token)]):
     return {}
 
 
 @app.get("/api/v1/rdf/graph")
-def get_rdf_graph(
+async def get_rdf_graph(
     user: Annotated[dict, Depends(verify_token)],
     source: str,
     identifier: str = "",
     offset: int = 0,
     format: str = "nt",
     skipNamedIndividuals: bool = False,
+    aligned: bool = False,
 ):
     try:
-        limit = app.config.getint("main", "chunk_size") or 1_000_000  # 1MB
+        limit = app.page_size
         user = app.add_sources_for_user(user)
         if not user.can_read(source):
             raise HTTPException(
                 status_code=401, detail=f"Not authorized to read {source}"
             )
 
-        tmpdir = Path(gettempdir())
+        if format not in MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unknown format {format}")
+        if aligned and f".{format}" not in LINE_BASED_SUFFIXES:
+            raise HTTPException(
+                status_code=400,
+                detail="Aligned pages are only available for N-Triples and N-Quads",
+            )
 
-        # first call, write graph to file
+        # first call, write graph to file or reuse a recent export
         if not identifier:
-            identifier = str(ULID())
-            tmpfile = tmpdir.joinpath(f"{identifier}.{format}")
-            app.get_rdf_graph(
-                tmpfile,
+            job = app.export_rdf_graph(
                 source,
                 format=format,
                 skip_named_individuals=skipNamedIndividuals,
                 method=app.config.get("main", "get_rdf_graph_method") or "sparql",
             )
+            identifier = await wrap_future(job.future)
         else:
-            tmpfile = tmpdir.joinpath(f"{identifier}.{format}")
+            job = app.export_cache.job(identifier)
+        tmpfile = get_spool_path(identifier, f".{format}")
+
+        # a running export is served progressively, as it is written
+        running = job is not None and job.running
+        if job is not None and job.phase == job.FAILED:
+            # the file written before the error is incomplete
+            raise HTTPException(status_code=500, detail=f"{identifier} failed")
+        try:
+            # keep the file in the spool while it is downloaded
+            await to_thread.run_sync(utime, tmpfile)
+        except FileNotFoundError:
+            if running:
+                response = {
+                    "identifier": identifier,
+                    "filesize": 0,
+                    "next_offset": offset,
+                    "data": "",
+                    "phase": job.phase,
+                }
+                if aligned:
+                    response["pages"] = []
+                return response
+            if job is not None and job.phase == job.FAILED:
+                raise HTTPException(status_code=500, detail=f"{identifier} failed")
+            if app.spool.is_expired(identifier):
+                raise HTTPException(status_code=410, detail=f"{identifier} expired")
+            raise HTTPException(status_code=404, detail=f"{identifier} not found")
+
+        if aligned:
+            # every page ends on a triple, they can be fetched in parallel
+            index = await to_thread.run_sync(app.get_page_index, tmpfile, job)
+            pages = index.pages(complete=not running) if index is not None else []
+            starts = [start for start, _ in pages]
+            position = bisect_left(starts, offset)
+
+            if position == len(pages) and (running or offset == index.size):
+                # the page is not written yet, or the file is empty
+                filesize = index.size if index is not None else 0
+                chunk, next_offset = b"", offset if running else None
+            elif position == len(pages) or starts[position] != offset:
+                raise HTTPException(
+                    status_code=400, detail=f"{offset} is not the start of a page"
+                )
+            else:
+                start, end = pages[position]
+                chunk, filesize = await to_thread.run_sync(
+                    read_page,
+                    tmpfile,
+                    start,
+                    end - start,
+                    app.config.getboolean("main", "chunk_mmap", fallback=False),
+                )
+                last = position == len(pages) - 1 and not running
+                next_offset = None if last else end
+
+            return {
+                "identifier": identifier,
+                "filesize": filesize,
+                "next_offset": next_offset,
+                "data": chunk.decode("utf-8"),
+                "phase": job.phase if running else ExportJob.DONE,
+                "pages": pages,
+            }
 
-        # Get a slice of the file
-        data = tmpfile.read_text()
-        chunk = data[offset : offset + limit]
+        # Get a slice of the file, offsets are expressed in bytes
+        binary = format == BINARY_FORMAT
+        chunk, filesize = await to_thread.run_sync(
+            read_page,
+            tmpfile,
+            offset,
+            limit,
+            app.config.getboolean("main", "chunk_mmap", fallback=False),
+            not binary,
+        )
 
-        filesize = tmpfile.stat().st_size
-        if offset + limit >= filesize:
+        if offset + len(chunk) >= filesize and not running:
             next_offset = None
         else:
-            next_offset = offset + limit
+            next_offset = offset + len(chunk)
 
-        return {
+        response = {
             "identifier": identifier,
             "filesize": filesize,
             "next_offset": next_offset,
-            "data": chunk,
+            "data": b64encode(chunk).decode() if binary else chunk.decode("utf-8"),
+            "phase": job.phase if running else ExportJob.DONE,
         }
+        if binary:
+            response["encoding"] = "base64"
+        return response
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.log.error(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.get("/api/v1/rdf/graph/download")
+async def download_rdf_graph(
+    request: Request,
+    user: Annotated[dict, Depends(verify_token)],
+    source: str,
+    identifier: str = "",
+    format: str = "nt",
+    skipNamedIndividuals: bool = False,
+):
+    try:
+        user = app.add_sources_for_user(user)
+        if not user.can_read(source):
+            raise HTTPException(
+                status_code=401, detail=f"Not authorized to read {source}"
+            )
+        if format not in MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unknown format {format}")
+
+        if not identifier:
+            job = app.export_rdf_graph(
+                source,
+                format=format,
+                skip_named_individuals=skipNamedIndividuals,
+                method=app.config.get("main", "get_rdf_graph_method") or "sparql",
+            )
+        else:
+            job = app.export_cache.job(identifier)
+        if job is not None:
+            # the whole file is streamed, wait for the end of the export
+            identifier = await wrap_future(job.future)
+        tmpfile = get_spool_path(identifier, f".{format}")
+
+        try:
+            await to_thread.run_sync(utime, tmpfile)
+            filesize = (await to_thread.run_sync(tmpfile.stat)).st_size
+        except FileNotFoundError:
+            if app.spool.is_expired(identifier):
+                raise HTTPException(status_code=410, detail=f"{identifier} expired")
+            raise HTTPException(status_code=404, detail=f"{identifier} not found")
+
+        chunk_size = app.config.getint("download", "chunk_size", fallback=1 << 20)
+        media_type = MEDIA_TYPES.get(format, "application/octet-stream")
+        headers = {
+            "Accept-Ranges": "bytes",
+            "ETag": f'"{identifier}"',
+            "X-Identifier": identifier,
+            "Content-Disposition": content_disposition(f"{source}.{format}"),
+        }
+
+        # ranges apply to the file as is, they are never compressed
+        byte_range = None
+        if "range" in request.headers:
+            try:
+                byte_range = parse_range(request.headers["range"], filesize)
+            except RangeNotSatisfiable:
+                raise HTTPException(
+                    status_code=416,
+                    detail="Range not satisfiable",
+                    headers={"Content-Range": f"bytes */{filesize}"},
+                )
+        if byte_range is not None:
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{filesize}"
+            headers["Content-Length"] = str(end - start + 1)
+            return StreamingResponse(
+                iter_file(tmpfile, start, end, chunk_size),
+                status_code=206,
+                media_type=media_type,
+                headers=headers,
+            )
+
+        encodings = app.config.get("download", "encodings", fallback="zstd,gzip")
+        encoding = negotiate_encoding(
+            request.headers.get("accept-encoding", ""),
+            tuple(e.strip() for e in encodings.split(",") if e.strip()),
+        )
+        if encoding is None:
+            headers["Content-Length"] = str(filesize)
+        else:
+            headers["Content-Encoding"] = encoding
+            headers["Vary"] = "Accept-Encoding"
+
+        return StreamingResponse(
+            iter_file(tmpfile, chunk_size=chunk_size, encoding=encoding),
+            media_type=media_type,
+            headers=headers,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.log.error(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.get("/api/v1/rdf/graph/statistics")
+async def get_rdf_graph_statistics(
+    user: Annotated[dict, Depends(verify_token)],
+    source: str,
+    skipNamedIndividuals: bool = False,
+):
+    try:
+        user = app.add_sources_for_user(user)
+        if not user.can_read(source):
+            raise HTTPException(
+                status_code=401, detail=f"Not authorized to read {source}"
+            )
+
+        return await app.run_in_executor(
+            app.get_graph_statistics,
+            source,
+            skip_named_individuals=skipNamedIndividuals,
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.log.error(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.post("/api/v1/rdf/jobs")
+async def post_rdf_job(
+    source: Annotated[str, Form()],
+    user: Annotated[dict, Depends(verify_token)],
+    format: Annotated[str, Form()] = "nt",
+    skipNamedIndividuals: Annotated[bool, Form()] = False,
+):
+    try:
+        user = app.add_sources_for_user(user)
+        if not user.can_read(source):
+            raise HTTPException(
+                status_code=401, detail=f"Not authorized to read {source}"
+            )
+        if format not in MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unknown format {format}")
+
+        job = app.export_rdf_graph(
+            source,
+            format=format,
+            skip_named_individuals=skipNamedIndividuals,
+            method=app.config.get("main", "get_rdf_graph_method") or "sparql",
+        )
+        return job.status()
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.log.error(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.get("/api/v1/rdf/jobs/{identifier}")
+async def get_rdf_job(
+    identifier: str,
+    user: Annotated[dict, Depends(verify_token)],
+):
+    try:
+        job = app.export_cache.job(identifier)
+        user = app.add_sources_for_user(user)
+        if job is None or not user.can_read(job.source_name):
+            raise HTTPException(status_code=404, detail=f"{identifier} not found")
+
+        return job.status()
+    except HTTPException:
+        raise
     except Exception as e:
         app.log.error(e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @app.delete("/api/v1/rdf/graph")
-def delete_rdf_graph(
+async def delete_rdf_graph(
     source: Annotated[str, Form()],
     user: Annotated[dict, Depends(verify_token)],
 ):
@@ -100,15 +378,48 @@ def delete_rdf_graph(
                 status_code=401, detail=f"Not authorized to delete {source}"
             )
 
-        app.delete_graph_from_endpoint(source)
+        await app.run_in_executor(app.delete_graph_from_endpoint, source)
         return {"message": f"{source} deleted"}
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.log.error(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.delete("/api/v1/rdf/graphs")
+async def delete_rdf_graphs(
+    sources: Annotated[list[str], Form()],
+    user: Annotated[dict, Depends(verify_token)],
+):
+    try:
+        user = app.add_sources_for_user(user)
+        forbidden = [source for source in sources if not user.can_readwrite(source)]
+        if forbidden:
+            raise HTTPException(
+                status_code=401,
+                detail=f"Not authorized to delete {', '.join(forbidden)}",
+            )
+
+        errors = await app.run_in_executor(app.delete_graphs_from_endpoint, sources)
+        deleted = [source for source, error in errors.items() if error is None]
+        failed = [source for source, error in errors.items() if error is not None]
+        if failed:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Cannot delete {', '.join(failed)} "
+                f"({', '.join(deleted) or 'nothing'} deleted)",
+            )
+        return {"message": f"{', '.join(deleted)} deleted", "sources": deleted}
+    except HTTPException:
+        raise
     except Exception as e:
         app.log.error(e)
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @app.post("/api/v1/rdf/graph")
-def post_rdf_graph(
+async def post_rdf_graph(
     last: Annotated[bool, Form()],
     clean: Annotated[bool, Form()],
     data: UploadFile,
@@ -116,6 +427,8 @@ def post_rdf_graph(
     replace: Annotated[bool, Form()],
     user: Annotated[dict, Depends(verify_token)],
     identifier: Annotated[str, Form()] = "",
+    replaceMode: Annotated[str, Form()] = "",
+    method: Annotated[str, Form()] = "",
 ):
     try:
         user = app.add_sources_for_user(user)
@@ -123,28 +436,228 @@ def post_rdf_graph(
             raise HTTPException(
                 status_code=401, detail=f"Not authorized to write {source}"
             )
+        if replaceMode not in ("", "full", "diff"):
+            raise HTTPException(
+                status_code=400, detail=f"Unknown replace mode {replaceMode}"
+            )
+        if method not in ("", "crud", "bulk"):
+            raise HTTPException(status_code=400, detail=f"Unknown method {method}")
 
-        if not identifier:
-            identifier = str(ULID())
-        tmpdir = Path(gettempdir())
         ext = Path(data.filename).suffix
-        tmpfile = tmpdir.joinpath(f"{identifier}{ext}")
+        if identifier:
+            tmpfile = get_spool_path(identifier, ext)
+            if not tmpfile.exists() and app.spool.is_expired(identifier):
+                raise HTTPException(status_code=410, detail=f"{identifier} expired")
+        else:
+            identifier = str(ULID())
+            tmpfile = get_spool_path(identifier, ext)
 
         if clean:
-            tmpfile.unlink()
+            await to_thread.run_sync(partial(tmpfile.unlink, missing_ok=True))
             return {"identifier": identifier}
 
-        with tmpfile.open("ab") as fp:
-            fp.write(data.file.read())
+        # the chunk is spooled by starlette, copy it without reading it at once
+        await to_thread.run_sync(append_chunk, tmpfile, data.file)
 
         # last chunk, load data into triplestore
         if last:
-            app.upload_rdf_graph_to_endpoint(tmpfile, source, remove_graph=replace)
+            await app.run_in_executor(
+                app.upload_rdf_graph_to_endpoint,
+                tmpfile,
+                source,
+                remove_graph=replace,
+                replace_mode=replaceMode,
+                method=method,
+            )
 
             # remove tmpfile
-            tmpfile.unlink()
+            await to_thread.run_sync(tmpfile.unlink)
+
+        return {"identifier": identifier}
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.log.error(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+def get_upload_session(identifier: str, user: User) -> UploadSession:
+    session = UploadSession.load(app.spool.directory, identifier)
+    if session is None:
+        if app.spool.is_expired(identifier):
+            raise HTTPException(status_code=410, detail=f"{identifier} expired")
+        raise HTTPException(status_code=404, detail=f"{identifier} not found")
+
+    source = session.metadata["source"]
+    if not user.can_readwrite(source):
+        raise HTTPException(status_code=401, detail=f"Not authorized to write {source}")
+    return session
+
+
+@app.post("/api/v1/rdf/uploads")
+async def post_rdf_upload(
+    source: Annotated[str, Form()],
+    filename: Annotated[str, Form()],
+    size: Annotated[int, Form()],
+    chunkSize: Annotated[int, Form()],
+    replace: Annotated[bool, Form()],
+    user: Annotated[dict, Depends(verify_token)],
+    replaceMode: Annotated[str, Form()] = "",
+    method: Annotated[str, Form()] = "",
+):
+    try:
+        user = app.add_sources_for_user(user)
+        if not user.can_readwrite(source):
+            raise HTTPException(
+                status_code=401, detail=f"Not authorized to write {source}"
+            )
+        if replaceMode not in ("", "full", "diff"):
+            raise HTTPException(
+                status_code=400, detail=f"Unknown replace mode {replaceMode}"
+            )
+        if method not in ("", "crud", "bulk"):
+            raise HTTPException(status_code=400, detail=f"Unknown method {method}")
+        if size <= 0 or chunkSize <= 0:
+            raise HTTPException(
+                status_code=400, detail="size and chunkSize must be positive"
+            )
+        if size > app.spool.quota:
+            # the file is allocated at once, it must fit in the spool
+            raise HTTPException(
+                status_code=400,
+                detail=f"size exceeds the spool quota of {app.spool.quota} bytes",
+            )
+        if -(-size // chunkSize) > MAX_CHUNKS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"A file cannot be sent in more than {MAX_CHUNKS} chunks",
+            )
+        suffix = Path(filename).suffix
+        if suffix.lower() not in app.spool.suffixes:
+            raise HTTPException(
+                status_code=400, detail=f"Unknown file extension {suffix}"
+            )
+
+        session = await to_thread.run_sync(
+            partial(
+                UploadSession.create,
+                app.spool.directory,
+                str(ULID()),
+                suffix,
+                size,
+                chunkSize,
+                source=source,
+                replace=replace,
+                replace_mode=replaceMode,
+                method=method,
+            )
+        )
+        return await to_thread.run_sync(session.status)
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.log.error(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.get("/api/v1/rdf/uploads/{identifier}")
+async def get_rdf_upload(
+    identifier: str,
+    user: Annotated[dict, Depends(verify_token)],
+):
+    try:
+        user = app.add_sources_for_user(user)
+        session = await to_thread.run_sync(get_upload_session, identifier, user)
+        return await to_thread.run_sync(session.status)
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.log.error(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.put("/api/v1/rdf/uploads/{identifier}/chunks/{index}")
+async def put_rdf_upload_chunk(
+    identifier: str,
+    index: int,
+    request: Request,
+    user: Annotated[dict, Depends(verify_token)],
+    x_checksum: Annotated[str, Header()],
+):
+    try:
+        user = app.add_sources_for_user(user)
+        session = await to_thread.run_sync(get_upload_session, identifier, user)
+        try:
+            writer = await to_thread.run_sync(session.writer, index)
+        except IndexError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        # write the body as it is received, by blocks of WRITE_SIZE bytes
+        try:
+            buffer = bytearray()
+            async for data in request.stream():
+                buffer += data
+                if len(buffer) >= WRITE_SIZE:
+                    await to_thread.run_sync(writer.write, bytes(buffer))
+                    buffer.clear()
+            await to_thread.run_sync(writer.write, bytes(buffer))
+        except BaseException as e:
+            writer.abort()
+            if isinstance(e, ChunkError):
+                raise HTTPException(status_code=400, detail=str(e))
+            raise
+
+        try:
+            await to_thread.run_sync(writer.commit, x_checksum)
+        except ChunkError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+        return {"identifier": identifier, "index": index}
+    except HTTPException:
+        raise
+    except Exception as e:
+        app.log.error(e)
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@app.post("/api/v1/rdf/uploads/{identifier}/finish")
+async def finish_rdf_upload(
+    identifier: str,
+    user: Annotated[dict, Depends(verify_token)],
+    checksum: Annotated[str, Form()] = "",
+):
+    try:
+        user = app.add_sources_for_user(user)
+        session = await to_thread.run_sync(get_upload_session, identifier, user)
+
+        # check the chunks on disk before loading anything
+        if await to_thread.run_sync(session.verify):
+            missing = await to_thread.run_sync(session.missing_ranges)
+            ranges = (
+                str(first) if first == last else f"{first}-{last}"
+                for first, last in missing
+            )
+            raise HTTPException(
+                status_code=409, detail=f"Missing chunks: {', '.join(ranges)}"
+            )
+        if checksum and await to_thread.run_sync(session.checksum) != checksum.lower():
+            raise HTTPException(
+                status_code=400, detail=f"{identifier} does not match its checksum"
+            )
+
+        await app.run_in_executor(
+            app.upload_rdf_graph_to_endpoint,
+            session.path,
+            session.metadata["source"],
+            remove_graph=session.metadata["replace"],
+            replace_mode=session.metadata.get("replace_mode", ""),
+            method=session.metadata.get("method", ""),
+        )
+        await to_thread.run_sync(session.remove)
 
         return {"identifier": identifier}
+    except HTTPException:
+        raise
     except Exception as e:
         app.log.error(e)
         raise HTTPException(status_code=500, detail="Internal server error")
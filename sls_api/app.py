@@ -1,6 +1,14 @@
+from asyncio import get_running_loop
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from functools import cached_property, partial
+from hashlib import md5
 from pathlib import Path
 from re import compile as re_compile
-from time import sleep
+from shutil import copyfileobj
+from tempfile import gettempdir
+from threading import Lock
+from typing import Any, Callable, Iterator, Mapping
 
 import requests
 import pyodbc
@@ -8,24 +16,68 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from rdflib import Graph, URIRef, Literal
 from rdflib.namespace import OWL
-from requests.auth import HTTPDigestAuth
-
-from sls_api.config import SlsConfigParser, SlsConfig
-from sls_api.graph import RdfGraph
+from rdflib.plugins.sparql.results.jsonresults import parseJsonTerm
+from rdflib.util import SUFFIX_FORMAT_MAP
+from ulid import ULID
+
+from sls_api.binary import BinaryWriter
+from sls_api.bulk import BulkLoader, BulkLoadError
+from sls_api.cache import ExportCache, GraphVersions, StatisticsCache
+from sls_api.checkpoint import ExportCheckpoint
+from sls_api.config import SlsConfigCache, SlsConfigParser, SlsConfig
+from sls_api.filters import ExcludeObjects, sparql_filters
+from sls_api.diff import BlankNodeError, write_diff
+from sls_api.graph import (
+    LINE_BASED_SUFFIXES,
+    RdfGraph,
+    is_line_based,
+    iter_canonical_triples,
+    iter_ntriples,
+)
+from sls_api.http_client import HttpClient
+from sls_api.jobs import ExportJob
 from sls_api.logging import log
-from sls_api.users import User
-from sls_api.utils import batched, sparql_query
+from sls_api.odbc import OdbcPool
+from sls_api.pages import PageIndex
+from sls_api.permissions import PermissionEngine
+from sls_api.serializers import (
+    BINARY_FORMAT,
+    MEDIA_TYPES,
+    STREAMING_FORMATS,
+    TURTLE_FORMATS,
+    NTriplesWriter,
+    TurtleWriter,
+    nt_iri,
+    nt_json_term,
+    nt_literal,
+    nt_row,
+    serialize_graph,
+)
+from sls_api.spool import Spool
+from sls_api.upload import BatchUploader, UploadError
+from sls_api.users import User, Users
+from sls_api.utils import batched, partition_predicates, sparql_query, wait_until
 
 
 class App(FastAPI):
     def __init__(self, config_path: str = "config.ini"):
-        super().__init__()
+        super().__init__(lifespan=self._lifespan)
 
         self.config_path = Path(config_path)
         self.config = self._get_config()
 
         self.log = log(self.config.get("main", "log_level"))
 
+        self.http = HttpClient(
+            pool_size=self.config.getint("http", "pool_size", fallback=10),
+            timeout=self.config.getfloat("http", "timeout", fallback=0) or None,
+        )
+
+        self._users = None
+        self._permissions = None
+        self.graph_versions = GraphVersions()
+        self._checkpoint_locks = {}
+
         self.authorization_pattern = re_compile(
             r"^(?P<scheme>[^\s]+)\s+(?P<token>[^$]+)"
         )
@@ -60,10 +112,19 @@ class App(FastAPI):
         parser.read_file(self.config_path.open())
         return parser
 
+    @cached_property
+    def sls_config_cache(self) -> SlsConfigCache:
+        path = Path(self.config.get("main", "souslesens_config_dir")).expanduser()
+        return SlsConfigCache(
+            path,
+            check_interval=self.config.getfloat(
+                "main", "souslesens_config_check_interval", fallback=1.0
+            ),
+        )
+
     @property
     def sls_config(self) -> SlsConfig:
-        path = Path(self.config.get("main", "souslesens_config_dir")).expanduser()
-        return SlsConfig(path)
+        return self.sls_config_cache.get()
 
     @property
     def _admin_user(self) -> dict:
@@ -82,84 +143,61 @@ class App(FastAPI):
         if self.sls_config.mainconfig["auth"] == "disabled":
             return User(**self._admin_user)
 
-        for user in self.sls_config.users.values():
-            if user.get("token", None) == token:
-                # sometimes, name is not present in users.json file
-                if not "name" in user:
-                    user["name"] = user["id"]
-                return User(**user)
+        sls_config = self.sls_config
+        users = self._users
+        if users is None or users.version != sls_config.version:
+            # the configuration changed, index the users again
+            users = self._users = Users(sls_config.users, sls_config.version)
+
+        return users.get_by_token(token)
 
     def add_sources_for_user(self, user: User) -> User:
         user.set_sources(self._get_user_sources(user))
         return user
 
-    def _get_admin_sources(self) -> dict:
-        admin_sources = {}
-        for identifier, source in self.sls_config.sources.items():
-            source["accessControl"] = "readwrite"
-            admin_sources[identifier] = source
-        return admin_sources
-
-    def _get_user_sources(self, user: User) -> dict | None:
-        profiles = self.sls_config.profiles
-        sources = self.sls_config.sources
-
-        if user.is_admin():
-            return self._get_admin_sources()
-
-        user_profiles = {k: v for k, v in profiles.items() if k in user.groups}
-
-        all_access_control = {}
-        for identifier, source in sources.items():
-            name = source.get("name")
+    @property
+    def permissions(self) -> PermissionEngine:
+        sls_config = self.sls_config
+        engine = self._permissions
+        if engine is None or engine.version != sls_config.version:
+            # the configuration changed, compile the profiles again
+            engine = self._permissions = PermissionEngine(sls_config)
+        return engine
+
+    def _get_user_sources(self, user: User) -> Mapping[str, Mapping]:
+        return self.permissions.get_user_sources(user)
+
+    def _count_graph(
+        self, source_name: str, filters: tuple = (), distinct: bool = False
+    ) -> dict[str, int]:
+        graph_uri = self.sls_config.sources[source_name]["graphUri"]
 
-            group = source.get("group", "")
-            if len(group.strip()) == 0:
-                group = "DEFAULT"
+        sparql_server = self.sls_config.mainconfig["sparql_server"]
+        sparql_url = sparql_server["url"]
+        virtuoso_user = sparql_server["user"]
+        virtuoso_password = sparql_server["password"]
 
-            permission = self._get_permission_from_profile(
-                user_profiles,
-                "/".join([source.get("schemaType"), group, name]),
+        counts = "(COUNT(*) AS ?triples)"
+        if distinct:
+            counts += (
+                " (COUNT(DISTINCT ?s) AS ?subjects)"
+                " (COUNT(DISTINCT ?p) AS ?predicates)"
             )
+        query = f"""SELECT {counts}
+        FROM <{graph_uri}>
+        WHERE {{
+            ?s ?p ?o
+            {sparql_filters(filters)}
+        }}"""
 
-            current_permission = all_access_control.setdefault(name, "")
-            if len(current_permission) < len(permission):
-                all_access_control[name] = permission
-
-        user_sources = {}
-        for identifier, source in sources.items():
-            name = source.get("name")
-
-            if name in all_access_control:
-                source["accessControl"] = all_access_control[name]
-                user_sources[identifier] = source
-
-        return user_sources
-
-    def _get_permission_from_profile(
-        self, user_profiles: dict, source_tree: str
-    ) -> str:
-        for profile in user_profiles.values():
-            permissions = []
-
-            sources_access_control = profile["sourcesAccessControl"]
-            for key, value in sources_access_control.items():
-                if source_tree.startswith(key):
-                    permissions.append((key, value))
-
-            formal_label = self.sls_config.mainconfig[
-                "formalOntologySourceLabel"
-            ].strip()
-            if len(formal_label) > 0:
-                permissions.append((formal_label, "read"))
-
-            permissions = sorted(permissions, key=lambda k: len(k[1]), reverse=True)
-            if len(permissions) > 0:
-                return permissions[0][1]
-
-        return ""
+        binding = sparql_query(
+            sparql_url, virtuoso_user, virtuoso_password, query, client=self.http
+        )["results"]["bindings"][0]
+        return {name: int(value["value"]) for name, value in binding.items()}
 
-    def _get_graph_size(self, source_name: str):
+    def _count_predicates(
+        self, source_name: str, filters: tuple = ()
+    ) -> dict[str, int]:
         graph_uri = self.sls_config.sources[source_name]["graphUri"]
 
         sparql_server = self.sls_config.mainconfig["sparql_server"]
@@ -167,18 +205,60 @@ class App(FastAPI):
         virtuoso_user = sparql_server["user"]
         virtuoso_password = sparql_server["password"]
 
-        query = f"""SELECT count(*) as ?total
+        query = f"""SELECT ?p (COUNT(*) AS ?triples)
         FROM <{graph_uri}>
         WHERE {{
             ?s ?p ?o
-        }}"""
+            {sparql_filters(filters)}
+        }}
+        GROUP BY ?p"""
 
-        result = int(
-            sparql_query(sparql_url, virtuoso_user, virtuoso_password, query)[
-                "results"
-            ]["bindings"][0]["total"]["value"]
+        bindings = sparql_query(
+            sparql_url, virtuoso_user, virtuoso_password, query, client=self.http
+        )["results"]["bindings"]
+        return {
+            binding["p"]["value"]: int(binding["triples"]["value"])
+            for binding in bindings
+        }
+
+    @cached_property
+    def graph_statistics(self) -> StatisticsCache:
+        return StatisticsCache(
+            max_age=self.config.getfloat("main", "statistics_ttl", fallback=0) or None
+        )
+
+    def _get_graph_size(self, source_name: str, filters: tuple = ()) -> int:
+        # counted once per version of the graph, the exports only use it for
+        # their progress since it misses the edits made in virtuoso
+        key = (
+            source_name,
+            self.graph_versions.get(source_name),
+            sparql_filters(filters),
+            "size",
+        )
+        return self.graph_statistics.get(
+            key, lambda: self._count_graph(source_name, filters)["triples"]
         )
-        return result
+
+    def get_graph_statistics(
+        self, source_name: str, skip_named_individuals: bool = False
+    ) -> dict:
+        filters = self.export_filters(skip_named_individuals)
+        version = self.graph_versions.get(source_name)
+        key = (source_name, version, sparql_filters(filters))
+
+        def compute() -> dict:
+            counts = self._count_graph(source_name, filters, distinct=True)
+            self.graph_statistics.put((*key, "size"), counts["triples"])
+            return counts
+
+        counts = self.graph_statistics.get((*key, "statistics"), compute)
+        return {
+            "source": source_name,
+            **counts,
+            "version": version,
+            "modified": self.graph_versions.modified(source_name),
+        }
 
     def delete_graph_from_endpoint(self, source_name: str):
         graph_uri = self.sls_config.sources[source_name]["graphUri"]
@@ -192,23 +272,173 @@ class App(FastAPI):
 
         self.log.info(f"removing {graph_uri}…")
 
-        response = requests.delete(
+        response = self.http.delete(
             f"{virtuoso_url}/sparql-graph-crud-auth",
-            auth=HTTPDigestAuth(virtuoso_user, virtuoso_password),
+            virtuoso_user,
+            virtuoso_password,
             params={"graph-uri": graph_uri},
         )
-        if response.status_code not in (200, 201, 404):
-            self.log.info(f"Got {response.status_code} while deleting graph")
-        sleep(3)  # give virtuoso enough time to delete the graph
+        try:
+            if response.status_code == 404:
+                # the graph does not exist, nothing to wait for
+                return
+            if not 200 <= response.status_code < 300:
+                # nothing to wait for, the graph would never become empty
+                raise requests.HTTPError(
+                    f"Got {response.status_code} while deleting {graph_uri}",
+                    response=response,
+                )
+
+            # the graph may still be cleared when the response is received,
+            # an upload replacing it must not start before
+            deleted = wait_until(
+                lambda: self._count_graph(source_name)["triples"] == 0,
+                timeout=self.config.getfloat("rdf", "delete_timeout", fallback=600),
+                interval=self.config.getfloat(
+                    "rdf", "delete_poll_interval", fallback=0.1
+                ),
+                max_interval=self.config.getfloat(
+                    "rdf", "delete_poll_max_interval", fallback=5
+                ),
+            )
+            if not deleted:
+                raise TimeoutError(f"{graph_uri} is still not empty")
+            self.log.info(f"{graph_uri} removed")
+        finally:
+            self._graph_modified(source_name)
+
+    def delete_graphs_from_endpoint(
+        self, source_names: list[str]
+    ) -> dict[str, Exception | None]:
+        source_names = list(dict.fromkeys(source_names))
+        workers = self.config.getint("rdf", "delete_workers", fallback=4)
+
+        def delete(source_name: str) -> Exception | None:
+            try:
+                self.delete_graph_from_endpoint(source_name)
+            except Exception as e:
+                self.log.error(f"Cannot delete {source_name}: {e}")
+                return e
+
+        # each deletion waits for virtuoso, clear the graphs concurrently
+        with ThreadPoolExecutor(
+            max_workers=max(min(workers, len(source_names)), 1)
+        ) as executor:
+            errors = executor.map(delete, source_names)
+            return dict(zip(source_names, errors))
+
+    def _graph_modified(self, source_name: str):
+        self.graph_versions.bump(source_name)
+        self.export_cache.invalidate(source_name)
+        self.graph_statistics.invalidate(source_name)
+
+    @cached_property
+    def spool(self) -> Spool:
+        directory = self.config.get("spool", "directory", fallback="")
+        if not directory:
+            # never share the directory of the spool with other programs
+            directory = Path(gettempdir()).joinpath("sls-api-spool")
+        return Spool(
+            Path(directory).expanduser(),
+            ttl=self.config.getfloat("spool", "ttl", fallback=3600),
+            quota=self.config.getint("spool", "quota", fallback=20_000_000_000),
+            # the exported formats and the extensions of the uploaded files
+            suffixes=[f".{format}" for format in MEDIA_TYPES]
+            + [f".{suffix}" for suffix in SUFFIX_FORMAT_MAP]
+            + list(LINE_BASED_SUFFIXES),
+        )
+
+    @cached_property
+    def executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self.config.getint("main", "executor_workers", fallback=8),
+            thread_name_prefix="sls-api",
+        )
+
+    async def run_in_executor(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call without blocking the event loop
+
+        Exports, uploads and deletions talk to Virtuoso and serialize graphs
+        in a dedicated executor, so that they never use the threads which
+        serve the other requests.
+        """
+
+        return await get_running_loop().run_in_executor(
+            self.executor, partial(func, *args, **kwargs)
+        )
+
+    @asynccontextmanager
+    async def _lifespan(self, app: FastAPI):
+        # remove expired exports and abandoned uploads in the background
+        self.spool.start(self.config.getfloat("spool", "clean_interval", fallback=300))
+        yield
+        self.spool.stop()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    @cached_property
+    def export_cache(self) -> ExportCache:
+        return ExportCache(
+            self.spool.directory,
+            max_size=self.config.getint(
+                "main", "export_cache_size", fallback=5_000_000_000
+            ),
+            max_age=self.config.getfloat("main", "export_cache_ttl", fallback=0)
+            or None,
+        )
+
+    @property
+    def page_size(self) -> int:
+        return self.config.getint("main", "chunk_size") or 1_000_000  # 1MB
+
+    def get_page_index(
+        self, graph_path: Path, job: ExportJob | None = None
+    ) -> PageIndex | None:
+        index = job.pages if job is not None else None
+        if index is not None and index.page_size == self.page_size:
+            return index
+
+        if job is not None and job.running:
+            # only the file written so far, index it once it is complete
+            return None
+
+        index = PageIndex.build(graph_path, self.page_size)
+        if job is not None:
+            job.pages = index
+        return index
+
+    def export_rdf_graph(
+        self,
+        source_name: str,
+        format: str = "nt",
+        skip_named_individuals: bool = False,
+        method: str = "sparql",
+    ) -> ExportJob:
+        key = (
+            source_name,
+            format,
+            skip_named_individuals,
+            self.graph_versions.get(source_name),
+        )
+        return self.export_cache.submit(
+            key,
+            format,
+            lambda graph_path, job: self.get_rdf_graph(
+                graph_path,
+                source_name,
+                format=format,
+                skip_named_individuals=skip_named_individuals,
+                method=method,
+                job=job,
+            ),
+            executor=self.executor,
+        )
 
     @staticmethod
-    def remove_named_individuals_from_graph(graph):
-        namedIndividual = URIRef(OWL["NamedIndividual"])
-        new_graph = Graph()
-        for s, p, o in graph:
-            if o != namedIndividual:
-                new_graph.add((s, p, o))
-        return new_graph
+    def export_filters(skip_named_individuals: bool = False) -> tuple:
+        filters = []
+        if skip_named_individuals:
+            filters.append(ExcludeObjects([OWL["NamedIndividual"]]))
+        return tuple(filters)
 
     def get_rdf_graph(
         self,
@@ -217,29 +447,274 @@ class App(FastAPI):
         format: str = "nt",
         skip_named_individuals: bool = False,
         method: str = "sparql",
+        job: ExportJob | None = None,
     ):
         self.log.info(f"Getting rdf graph with {method}")
+
+        # filters are applied by the queries, or while reading the triples
+        filters = self.export_filters(skip_named_individuals)
+
+        if job is None:
+            # nobody polls the progress, skip the count query
+            job = ExportJob(graph_path.stem, source_name)
+            job.start()
+        else:
+            job.start(self._get_graph_size(source_name, filters))
+
+        streaming = self.config.getboolean("rdf", "streaming", fallback=False)
+        pagination = self.config.get("rdf", "pagination", fallback="offset")
+        shards = self.config.getint("rdf", "export_shards", fallback=1)
+        if method == "sparql" and shards > 1:
+            self._write_rdf_graph_from_shards(
+                graph_path, source_name, format, filters, shards, job
+            )
+            self.log.info(f"{source_name} writed to {graph_path}")
+            return graph_path
+
+        if (
+            method == "sparql"
+            and pagination == "keyset"
+            and streaming
+            and format in STREAMING_FORMATS
+        ):
+            self._write_rdf_graph_with_checkpoint(
+                graph_path, source_name, format, filters, job
+            )
+            self.log.info(f"{source_name} writed to {graph_path}")
+            return graph_path
+
+        if streaming and (format in STREAMING_FORMATS or format in TURTLE_FORMATS):
+            # format the terms as they are received, without rdflib objects
+            self._write_rdf_graph_from_terms(
+                graph_path, source_name, format, method, filters, job
+            )
+            self.log.info(f"{source_name} writed to {graph_path}")
+            return graph_path
+
         if method == "api":
-            graph = self._get_rdf_graph_from_virtuoso_api(source_name)
+            batches = self._iter_rdf_graph_from_virtuoso_api(source_name, filters)
         elif method == "sparql":
-            graph = self._get_rdf_graph_from_endpoint(source_name)
+            batches = self._iter_rdf_graph_from_endpoint(
+                source_name, job.total, filters
+            )
         elif method == "isql":
-            graph = self._get_rdf_graph_from_isql(source_name)
+            batches = self._iter_rdf_graph_from_isql(source_name, filters)
         else:
             raise NotImplementedError(f"Method {method} is not implemented")
 
-        if skip_named_individuals:
-            graph = self.remove_named_individuals_from_graph(graph)
-
-        # write graph to tmpfile
-        graph.serialize(destination=graph_path, format=format, encoding="utf-8")
+        if format == BINARY_FORMAT:
+            # terms are encoded once, the dictionary grows with each batch
+            with graph_path.open("wb") as fp:
+                writer = BinaryWriter(fp, progress=job.advance)
+                for batch in batches:
+                    writer.write(batch)
+        else:
+            graph = Graph()
+            for batch in batches:
+                for triple in batch:
+                    graph.add(triple)
+                job.advance(len(batch))
+
+            # write graph to tmpfile
+            job.serializing()
+            serialize_graph(graph, graph_path, format)
         self.log.info(f"{source_name} writed to {graph_path}")
 
         return graph_path
 
-    def _get_rdf_graph_from_isql(self, source_name: str):
-        graph_uri = self.sls_config.sources[source_name]["graphUri"]
+    def _source_prefixes(self, source_name: str) -> dict:
+        source = self.sls_config.sources[source_name]
+        prefix, graph_uri = source.get("prefix"), source["graphUri"]
+        if prefix and graph_uri.endswith(("/", "#")):
+            return {prefix: graph_uri}
+        return {}
+
+    def _line_writer(self, fp, source_name: str, format: str, **kwargs):
+        graph = None
+        if format == "nquads":
+            graph = self.sls_config.sources[source_name]["graphUri"]
+        return NTriplesWriter(fp, graph=graph, **kwargs)
+
+    def _write_rdf_graph_from_terms(
+        self,
+        graph_path: Path,
+        source_name: str,
+        format: str,
+        method: str,
+        filters: tuple,
+        job: ExportJob,
+    ):
+        if method == "api":
+            rows = self._iter_terms_from_virtuoso_api(source_name, filters)
+        elif method == "sparql":
+            rows = self._iter_rdf_graph_from_endpoint(
+                source_name, job.total, filters, raw=True
+            )
+        elif method == "isql":
+            rows = self._iter_terms_from_isql(source_name, filters)
+        else:
+            raise NotImplementedError(f"Method {method} is not implemented")
+
+        with graph_path.open("wb") as fp:
+            if format in TURTLE_FORMATS:
+                writer = TurtleWriter(
+                    fp, self._source_prefixes(source_name), progress=job.advance
+                )
+            else:
+                # index the pages of the file as it is written
+                job.pages = PageIndex(self.page_size)
+                writer = self._line_writer(
+                    fp, source_name, format, progress=job.advance, index=job.pages
+                )
+
+            for batch in rows:
+                writer.write_terms(batch)
+            if format in TURTLE_FORMATS:
+                writer.close()
+
+    def _write_rdf_graph_with_checkpoint(
+        self,
+        graph_path: Path,
+        source_name: str,
+        format: str,
+        filters: tuple,
+        job: ExportJob,
+    ):
+        suffix = f"-{format}"
+        if filters:
+            # one checkpoint per combination of filters
+            suffix += "-" + md5(sparql_filters(filters).encode()).hexdigest()[:8]
+        # a failed export is only resumed against the same version of the graph
+        suffix += f"-v{self.graph_versions.get(source_name)}"
+        name = f"{source_name}{suffix}.checkpoint"
+
+        # concurrent exports of the same graph would write the same part file
+        with self._checkpoint_locks.setdefault(name, Lock()):
+            self._write_rdf_graph_from_checkpoint(
+                graph_path,
+                source_name,
+                format,
+                filters,
+                job,
+                ExportCheckpoint(graph_path.parent.joinpath(name)),
+            )
+
+    def _write_rdf_graph_from_checkpoint(
+        self,
+        graph_path: Path,
+        source_name: str,
+        format: str,
+        filters: tuple,
+        job: ExportJob,
+        checkpoint: ExportCheckpoint,
+    ):
+        state = checkpoint.load()
+        if state and Path(state["output"]).exists():
+            # resume a failed export from the last completed page
+            output = Path(state["output"])
+            after, written = tuple(state["after"]), state["triples"]
+            self.log.info(f"Resuming export of {source_name} after {after}")
+        else:
+            output = graph_path.with_name(f"{graph_path.name}.part")
+            output.write_bytes(b"")
+            after, written, state = None, 0, {"bytes": 0}
+
+        with output.open("r+b") as fp:
+            # drop what was written after the last checkpoint
+            fp.truncate(state["bytes"])
+            fp.seek(state["bytes"])
+
+            job.advance(written, state["bytes"])
+            writer = self._line_writer(fp, source_name, format, progress=job.advance)
+            for after, batch in self._iter_rdf_graph_pages_after(
+                source_name,
+                after,
+                written,
+                graph_size=job.total,
+                filters=filters,
+                raw=True,
+            ):
+                writer.write_terms(batch)
+                written += len(batch)
+                checkpoint.save(
+                    output=str(output), after=after, bytes=fp.tell(), triples=written
+                )
+
+        output.replace(graph_path)
+        checkpoint.clear()
 
+    def _write_rdf_graph_from_shards(
+        self,
+        graph_path: Path,
+        source_name: str,
+        format: str,
+        filters: tuple,
+        shards: int,
+        job: ExportJob,
+    ):
+        workers = self.config.getint("rdf", "export_workers", fallback=4)
+        # the graph is split once by predicate, each page of a shard then
+        # reads the triples of one predicate through the PSOG index
+        counts = self._count_predicates(source_name, filters)
+        partitions = partition_predicates(counts, shards)
+        shard_paths = [
+            graph_path.with_name(f"{graph_path.name}.shard{index}")
+            for index in range(len(partitions))
+        ]
+
+        def write_shard(index: int) -> int:
+            with shard_paths[index].open("wb") as fp:
+                writer = self._line_writer(
+                    fp, source_name, format, progress=job.advance
+                )
+                for predicate in partitions[index]:
+                    pages = self._iter_rdf_graph_pages_after(
+                        source_name,
+                        graph_size=counts[predicate],
+                        predicate=predicate,
+                        filters=filters,
+                        raw=True,
+                    )
+                    for _, batch in pages:
+                        writer.write_terms(batch)
+            self.log.info(
+                f"shard {index + 1}/{len(partitions)} of {source_name} done "
+                f"({writer.triples} triples)"
+            )
+            return writer.triples
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                total = sum(executor.map(write_shard, range(len(partitions))))
+
+            # merge the shards, they are disjoint
+            nt_path = graph_path
+            if format not in STREAMING_FORMATS:
+                nt_path = graph_path.with_name(f"{graph_path.name}.nt")
+            with nt_path.open("wb") as fp:
+                for shard_path in shard_paths:
+                    with shard_path.open("rb") as shard_fp:
+                        copyfileobj(shard_fp, fp)
+
+            if format not in STREAMING_FORMATS:
+                job.serializing()
+                graph = Graph().parse(nt_path, format="nt")
+                serialize_graph(graph, graph_path, format)
+                nt_path.unlink()
+
+            self.log.info(f"{total} triples of {source_name} merged")
+        finally:
+            for shard_path in shard_paths:
+                shard_path.unlink(missing_ok=True)
+
+    @cached_property
+    def odbc_pool(self) -> OdbcPool:
+        return OdbcPool(
+            self._connect_isql,
+            size=self.config.getint("virtuoso", "pool_size", fallback=4),
+        )
+
+    def _connect_isql(self):
         virtuoso_driver_path = Path(self.config.get("virtuoso", "driver"))
 
         virtuoso_host = self.config.get("virtuoso", "host")
@@ -252,13 +727,19 @@ class App(FastAPI):
         connection = pyodbc.connect(conn_str)
         connection.setencoding(encoding="utf-8")
         connection.setdecoding(pyodbc.SQL_CHAR, encoding="utf-8")
-        cursor = connection.cursor()
+        return connection
+
+    def _iter_rows_from_isql(
+        self, source_name: str, filters: tuple = ()
+    ) -> Iterator[list]:
+        graph_uri = self.sls_config.sources[source_name]["graphUri"]
 
         query = (
             "SPARQL SELECT ?s ?p ?o ?is_uri ?is_blank ?datatype ?lang "
             f"FROM <{graph_uri}> "
             "WHERE { "
             "?s ?p ?o "
+            f"{sparql_filters(filters)} "
             "BIND(isUri(?o) AS ?is_uri) "
             "BIND(isBlank(?o) AS ?is_blank) "
             "BIND(datatype(?o) AS ?datatype) "
@@ -266,24 +747,43 @@ class App(FastAPI):
             "}"
         )
 
-        results = cursor.execute(query).fetchall()
-        graph = Graph()
-
-        for subj, pred, obj, is_uri, is_blank, datatype, lang in results:
-            s = URIRef(subj)
-            p = URIRef(pred)
-            if is_uri or is_blank:
-                o = URIRef(obj)
-            else:
-                o = Literal(obj, datatype=datatype, lang=lang)
-            graph.add((s, p, o))
-
-        return graph
-
-    def _get_rdf_graph_from_virtuoso_api(
-        self,
-        source_name: str,
-    ):
+        batch_size = self.config.getint("rdf", "batch_size")
+        with self.odbc_pool.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(query)
+            while rows := cursor.fetchmany(batch_size):
+                yield rows
+            cursor.close()
+
+    def _iter_terms_from_isql(
+        self, source_name: str, filters: tuple = ()
+    ) -> Iterator[tuple]:
+        for rows in self._iter_rows_from_isql(source_name, filters):
+            batch = []
+            for subj, pred, obj, is_uri, is_blank, datatype, lang in rows:
+                if is_uri or is_blank:
+                    o = nt_iri(obj)
+                else:
+                    o = nt_literal(obj, datatype, lang)
+                batch.append((nt_iri(subj), nt_iri(pred), o))
+            yield tuple(batch)
+
+    def _iter_rdf_graph_from_isql(
+        self, source_name: str, filters: tuple = ()
+    ) -> Iterator[tuple]:
+        for rows in self._iter_rows_from_isql(source_name, filters):
+            batch = []
+            for subj, pred, obj, is_uri, is_blank, datatype, lang in rows:
+                s = URIRef(subj)
+                p = URIRef(pred)
+                if is_uri or is_blank:
+                    o = URIRef(obj)
+                else:
+                    o = Literal(obj, datatype=datatype, lang=lang)
+                batch.append((s, p, o))
+            yield tuple(batch)
+
+    def _get_rdf_json_from_virtuoso_api(self, source_name: str) -> dict:
         graph_uri = self.sls_config.sources[source_name]["graphUri"]
 
         sparql_server = self.sls_config.mainconfig["sparql_server"]
@@ -294,32 +794,72 @@ class App(FastAPI):
         virtuoso_password = sparql_server["password"]
 
         params = {"graph": graph_uri, "format": "application/rdf+json"}
-        response = requests.get(
+        response = self.http.get(
             f"{virtuoso_url}/sparql-graph-crud",
+            virtuoso_user,
+            virtuoso_password,
             params=params,
-            auth=HTTPDigestAuth(virtuoso_user, virtuoso_password),
         )
-        json = response.json()
-
-        graph = Graph()
+        return response.json()
 
+    def _iter_rdf_json_from_virtuoso_api(
+        self, source_name: str, filters: tuple = ()
+    ) -> Iterator[tuple[str, str, dict]]:
+        json = self._get_rdf_json_from_virtuoso_api(source_name)
         for subj, pred_obj in json.items():
             for pred, objs in pred_obj.items():
                 for obj in objs:
-                    s = URIRef(subj)
-                    p = URIRef(pred)
-                    if obj["type"] == "uri":
-                        o = URIRef(obj["value"])
-                    else:
-                        obj.pop("type")
-                        o = Literal(obj.pop("value"), **obj)
-                    graph.add((s, p, o))
-        return graph
-
-    def _get_rdf_graph_from_endpoint(
+                    # the whole graph is received, filter while reading it
+                    is_iri = obj["type"] == "uri"
+                    if filters and not all(
+                        f.keep(subj, pred, obj["value"], is_iri) for f in filters
+                    ):
+                        continue
+                    yield subj, pred, obj
+
+    def _iter_rdf_graph_from_virtuoso_api(
         self,
         source_name: str,
-    ):
+        filters: tuple = (),
+    ) -> Iterator[tuple]:
+        def triples():
+            rows = self._iter_rdf_json_from_virtuoso_api(source_name, filters)
+            for subj, pred, obj in rows:
+                s = URIRef(subj)
+                p = URIRef(pred)
+                if obj["type"] == "uri":
+                    o = URIRef(obj["value"])
+                else:
+                    o = Literal(
+                        obj["value"], lang=obj.get("lang"), datatype=obj.get("datatype")
+                    )
+                yield s, p, o
+
+        yield from batched(triples(), self.config.getint("rdf", "batch_size"))
+
+    def _iter_terms_from_virtuoso_api(
+        self, source_name: str, filters: tuple = ()
+    ) -> Iterator[tuple]:
+        def rows():
+            for subj, pred, obj in self._iter_rdf_json_from_virtuoso_api(
+                source_name, filters
+            ):
+                # the subjects of RDF/JSON are IRIs or _: blank nodes
+                s = subj if subj.startswith("_:") else nt_iri(subj)
+                yield s, nt_iri(pred), nt_json_term(obj)
+
+        yield from batched(rows(), self.config.getint("rdf", "batch_size"))
+
+    def _iter_rdf_graph_pages_after(
+        self,
+        source_name: str,
+        after: tuple[str, int] | None = None,
+        done: int = 0,
+        graph_size: int | None = None,
+        predicate: str | None = None,
+        filters: tuple = (),
+        raw: bool = False,
+    ) -> Iterator[tuple[tuple[str, int], tuple]]:
         graph_uri = self.sls_config.sources[source_name]["graphUri"]
 
         sparql_server = self.sls_config.mainconfig["sparql_server"]
@@ -327,48 +867,276 @@ class App(FastAPI):
         virtuoso_user = sparql_server["user"]
         virtuoso_password = sparql_server["password"]
 
+        # each page contains batch_size triples, it must stay below the
+        # ResultSetMaxRows of virtuoso or the pages would be cut silently
         limit = self.config.getint("rdf", "batch_size")
-        graph_size = self._get_graph_size(source_name)
-        offset = 0
+        if graph_size is None:
+            graph_size = self._get_graph_size(source_name, filters)
+        filter_clause = sparql_filters(filters)
+
+        label = graph_uri
+        predicate_clause = ""
+        if predicate is not None:
+            label = f"{graph_uri} <{predicate}>"
+            predicate_clause = f"VALUES ?p {{ <{predicate}> }}"
+
+        # the cursor is the STR(?s) of the last subject read and the number
+        # of its triples already read, the labels of the blank nodes of a
+        # parsed graph are not the ones of virtuoso
+        subject, skip = after if after is not None else (None, 0)
+        while True:
+            after_filter = ""
+            if subject is not None:
+                key = subject.replace("\\", "\\\\").replace('"', '\\"')
+                after_filter = f'FILTER(STR(?s) >= "{key}")'
+
+            # virtuoso has no index on STR(?s): each page evaluates it on the
+            # triples (of the predicate) at or after the cursor and keeps the
+            # first skip + limit of them in a top-k sort, so a page costs a
+            # scan of the rest of the graph or predicate, like OFFSET does
+            query = f"""SELECT ?s ?p ?o
+            FROM <{graph_uri}>
+            WHERE {{
+                {predicate_clause}
+                ?s ?p ?o .
+                {filter_clause}
+                {after_filter}
+            }}
+            ORDER BY STR(?s) ?p ?o
+            LIMIT {limit}
+            OFFSET {skip}"""
+
+            bindings = sparql_query(
+                sparql_url,
+                virtuoso_user,
+                virtuoso_password,
+                query,
+                client=self.http,
+            )["results"]["bindings"]
+            to_term = nt_json_term if raw else parseJsonTerm
+            batch = tuple(
+                tuple(to_term(binding[v]) for v in "spo") for binding in bindings
+            )
+            if len(batch) == 0:
+                break
 
-        graph = Graph()
+            # the triples of the cursor subject come first in the page
+            last = bindings[-1]["s"]["value"]
+            tail = sum(1 for binding in bindings if binding["s"]["value"] == last)
+            skip = tail + skip if last == subject else tail
+            subject = last
+            done += len(batch)
 
-        while offset < graph_size:
-            # get percent and number of triples for logging
-            percent = min(int(((offset + limit) * 100 / graph_size)), 100)
-            ntriples = limit if offset + limit < graph_size else graph_size - offset
+            percent = min(int(done * 100 / max(graph_size, 1)), 100)
+            self.log.info(f"Downloading {label} ({len(batch)} triples) ({percent}%)")
+
+            yield (subject, skip), batch
+
+            # a full page may be followed by others
+            if len(batch) < limit:
+                break
+
+    def _iter_rdf_graph_from_endpoint(
+        self,
+        source_name: str,
+        graph_size: int | None = None,
+        filters: tuple = (),
+        raw: bool = False,
+    ) -> Iterator[tuple]:
+        if self.config.get("rdf", "pagination", fallback="offset") == "keyset":
+            pages = self._iter_rdf_graph_pages_after(
+                source_name, graph_size=graph_size, filters=filters, raw=raw
+            )
+            for _, batch in pages:
+                yield batch
+            return
 
-            self.log.info(f"Downloading {graph_uri} ({ntriples} triples) ({percent}%)")
+        graph_uri = self.sls_config.sources[source_name]["graphUri"]
 
-            # get a subgraph
-            query = f"""CONSTRUCT {{ ?s ?p ?o . }}
+        sparql_server = self.sls_config.mainconfig["sparql_server"]
+        sparql_url = sparql_server["url"]
+        virtuoso_user = sparql_server["user"]
+        virtuoso_password = sparql_server["password"]
+
+        limit = self.config.getint("rdf", "batch_size")
+        if graph_size is None:
+            graph_size = self._get_graph_size(source_name, filters)
+        offset = 0
+
+        # the size is only used for the progress, it can be stale when the
+        # graph was edited in virtuoso, a short page is the last one
+        while True:
+            # get a subgraph, or its terms
+            query = f"""{"SELECT ?s ?p ?o" if raw else "CONSTRUCT { ?s ?p ?o . }"}
             FROM <{graph_uri}>
             WHERE {{
                 ?s ?p ?o .
+                {sparql_filters(filters)}
             }}
             LIMIT {limit}
             OFFSET {offset}"""
 
             results = sparql_query(
-                sparql_url, virtuoso_user, virtuoso_password, query, "xml"
+                sparql_url,
+                virtuoso_user,
+                virtuoso_password,
+                query,
+                "json" if raw else "xml",
+                client=self.http,
             )
 
-            # concat subgraph to final graph
-            graph += results
+            if raw:
+                batch = tuple(
+                    tuple(nt_json_term(binding[v]) for v in "spo")
+                    for binding in results["results"]["bindings"]
+                )
+            else:
+                batch = tuple(results)
             offset += limit
 
-        return graph
+            # get percent and number of triples for logging
+            percent = min(int(offset * 100 / max(graph_size, 1)), 100)
+            self.log.info(
+                f"Downloading {graph_uri} ({len(batch)} triples) ({percent}%)"
+            )
+
+            if batch:
+                yield batch
+            if len(batch) < limit:
+                break
 
     def upload_rdf_graph_to_endpoint(
-        self, graph_path: Path, source_name: str, remove_graph: bool = False
+        self,
+        graph_path: Path,
+        source_name: str,
+        remove_graph: bool = False,
+        replace_mode: str = "",
+        method: str = "",
     ):
-        graph_uri = self.sls_config.sources[source_name]["graphUri"]
+        method = method or self.config.get(
+            "main", "upload_rdf_graph_method", fallback="crud"
+        )
+        if method not in ("crud", "bulk"):
+            raise NotImplementedError(f"Method {method} is not implemented")
+
+        replace_mode = replace_mode or self.config.get(
+            "rdf", "replace_mode", fallback="full"
+        )
+        if remove_graph and replace_mode == "diff":
+            try:
+                self._replace_rdf_graph_with_diff(graph_path, source_name, method)
+                return
+            except BlankNodeError as error:
+                self.log.info(f"{error}, replacing the whole graph of {source_name}")
+        elif remove_graph and replace_mode != "full":
+            raise ValueError(f"Unknown replace mode {replace_mode}")
 
         if remove_graph:
             self.delete_graph_from_endpoint(source_name)
 
-        # parse uploaded file into rdfilb graph
-        graph = RdfGraph(graph_path)
+        try:
+            if method == "bulk":
+                self._bulk_load_rdf_graph(graph_path, source_name)
+            else:
+                self._upload_rdf_graph_to_endpoint(graph_path, source_name)
+        finally:
+            # even a partial upload modifies the graph
+            self._graph_modified(source_name)
+
+    def _replace_rdf_graph_with_diff(
+        self, graph_path: Path, source_name: str, method: str = "crud"
+    ):
+        graph_uri = self.sls_config.sources[source_name]["graphUri"]
+
+        current_path, added_path, removed_path, replaced_path = (
+            self.spool.path(str(ULID()), ".nt") for _ in range(4)
+        )
+        modified = False
+        try:
+            # the current content, written as the exports write it
+            self.get_rdf_graph(
+                current_path,
+                source_name,
+                method=self.config.get("main", "get_rdf_graph_method") or "sparql",
+            )
+            added, removed = write_diff(
+                iter_canonical_triples(current_path),
+                iter_canonical_triples(graph_path),
+                added_path,
+                removed_path,
+                run_size=self.config.getint("rdf", "sort_run_size", fallback=1_000_000),
+                replaced_path=replaced_path,
+            )
+            current_path.unlink()
+            self.log.info(f"replacing {graph_uri}: +{added} -{removed} triples")
+
+            # the old values are removed first, an added triple which Virtuoso
+            # stores like a removed one must not be deleted afterwards, then
+            # the other triples are removed once the new ones are added, so
+            # that the graph is never empty in between
+            modified = bool(added or removed)
+            if replaced_path.stat().st_size:
+                self._delete_triples_from_endpoint(replaced_path, source_name)
+            if added and method == "bulk":
+                self._bulk_load_rdf_graph(added_path, source_name)
+            elif added:
+                self._upload_rdf_graph_to_endpoint(added_path, source_name)
+            if removed_path.stat().st_size:
+                self._delete_triples_from_endpoint(removed_path, source_name)
+        finally:
+            if modified:
+                self._graph_modified(source_name)
+            for path in (current_path, added_path, removed_path, replaced_path):
+                path.unlink(missing_ok=True)
+
+    @cached_property
+    def bulk_loader(self) -> BulkLoader:
+        directory = self.config.get("virtuoso", "bulk_directory", fallback="")
+        if not directory:
+            raise ValueError("The bulk loader needs a [virtuoso] bulk_directory")
+
+        workers = self.config.getint("virtuoso", "bulk_workers", fallback=1)
+        if workers >= self.config.getint("virtuoso", "pool_size", fallback=4):
+            # each session holds a connection, the load list is polled with another
+            raise ValueError(
+                "[virtuoso] bulk_workers must be lower than [virtuoso] pool_size"
+            )
+
+        def progress(loaded: int, total: int):
+            self.log.info(f"bulk loading ({loaded}/{total} files)")
+
+        return BulkLoader(
+            self.odbc_pool.connection,
+            Path(directory).expanduser(),
+            server_directory=self.config.get(
+                "virtuoso", "bulk_server_directory", fallback=""
+            )
+            or None,
+            workers=workers,
+            part_size=self.config.getint(
+                "virtuoso", "bulk_part_size", fallback=100_000_000
+            ),
+            poll_interval=self.config.getfloat(
+                "virtuoso", "bulk_poll_interval", fallback=1.0
+            ),
+            checkpoint=self.config.getboolean(
+                "virtuoso", "bulk_checkpoint", fallback=True
+            ),
+            progress=progress,
+        )
+
+    def _bulk_load_rdf_graph(self, graph_path: Path, source_name: str):
+        graph_uri = self.sls_config.sources[source_name]["graphUri"]
+
+        self.log.info(f"bulk loading {graph_path.name} in {graph_uri}")
+        try:
+            files = self.bulk_loader.load(graph_path, graph_uri)
+        except BulkLoadError as error:
+            raise BulkLoadError(f"Error while loading graph {graph_uri}: {error}")
+        self.log.info(f"{files} files loaded in {graph_uri}")
+
+    def _delete_triples_from_endpoint(self, graph_path: Path, source_name: str):
+        graph_uri = self.sls_config.sources[source_name]["graphUri"]
 
         sparql_server = self.sls_config.mainconfig["sparql_server"]
         virtuoso_url = sparql_server.get(
@@ -377,33 +1145,94 @@ class App(FastAPI):
         virtuoso_user = sparql_server["user"]
         virtuoso_password = sparql_server["password"]
 
-        # divide graph into subgraph of batch_size triples and upload them
-        batch_size = self.config.getint("rdf", "batch_size")
-        graph_size = len(graph)
-        for i, batch in enumerate(batched(graph, batch_size)):
-            subgraph = Graph()
-            for triples in batch:
-                subgraph.add(triples)
+        # the plain sparql endpoint is read-only, updates need the digest auth one
+        def post(query: bytes) -> requests.Response:
+            return self.http.post(
+                f"{virtuoso_url}/sparql-auth",
+                virtuoso_user,
+                virtuoso_password,
+                data={"query": query},
+                headers={"Accept": "application/sparql-results+json"},
+            )
+
+        def queries():
+            batch_size = self.config.getint("rdf", "batch_size")
+            for lines in iter_ntriples(graph_path, batch_size):
+                query = f"DELETE DATA {{ GRAPH <{graph_uri}> {{ {''.join(lines)} }} }}"
+                yield query.encode("utf-8"), len(lines)
+
+        uploader = BatchUploader(
+            post,
+            workers=self.config.getint("rdf", "upload_workers", fallback=1),
+            retries=self.config.getint("rdf", "upload_retries", fallback=0),
+            backoff=self.config.getfloat("rdf", "upload_backoff", fallback=1.0),
+        )
+        try:
+            uploader.upload(queries())
+        except UploadError as error:
+            raise UploadError(f"Error while removing triples of {graph_uri}: {error}")
+
+    def _upload_rdf_graph_to_endpoint(self, graph_path: Path, source_name: str):
+        graph_uri = self.sls_config.sources[source_name]["graphUri"]
 
-            ntriples = subgraph.serialize(format="nt", encoding="utf-8")
+        sparql_server = self.sls_config.mainconfig["sparql_server"]
+        virtuoso_url = sparql_server.get(
+            "virtuoso_url", sparql_server["url"].removesuffix("/sparql")
+        )
+        virtuoso_user = sparql_server["user"]
+        virtuoso_password = sparql_server["password"]
 
-            response = requests.post(
+        batch_size = self.config.getint("rdf", "batch_size")
+        if is_line_based(graph_path):
+            # split the file on line boundaries, without parsing it
+            batches = iter_ntriples(graph_path, batch_size)
+            total_size = graph_path.stat().st_size
+        else:
+            # parse uploaded file into rdfilb graph
+            graph = RdfGraph(graph_path)
+            batches = (
+                [nt_row(triple) for triple in batch]
+                for batch in batched(graph, batch_size)
+            )
+            total_size = len(graph)
+
+        def post(ntriples: bytes) -> requests.Response:
+            return self.http.post(
                 f"{virtuoso_url}/sparql-graph-crud-auth",
-                auth=HTTPDigestAuth(virtuoso_user, virtuoso_password),
+                virtuoso_user,
+                virtuoso_password,
                 params={"graph-uri": graph_uri},
                 data=ntriples,
                 headers={"Content-type": "text/plain"},
             )
 
-            # get percent for logs
-            percent = min(100, int((((i + 1) * batch_size) * 100) / graph_size))
-            status = "ok" if response.ok else "ERROR"
+        done = 0
+
+        def progress(ntriples: int, nbytes: int, rate: float):
+            # get percent for logs, in bytes read or in triples
+            nonlocal done
+            done += nbytes if is_line_based(graph_path) else ntriples
+            percent = min(100, int(done * 100 / max(total_size, 1)))
             self.log.info(
-                f"uploading {graph_uri} ({len(subgraph)} triples) ({percent}%) {status}"
+                f"uploading {graph_uri} ({ntriples} triples) ({percent}%) "
+                f"({rate:.0f} triples/s)"
             )
 
-            if not response.ok:
-                raise BaseException(
-                    f"\nGot {response.status_code} while posting graph "
-                    f"{graph_uri}:\n  {response.content}"
-                )
+        def encoded_batches():
+            for lines in batches:
+                yield "".join(lines).encode("utf-8"), len(lines)
+
+        # upload the graph by batches of batch_size triples
+        uploader = BatchUploader(
+            post,
+            workers=self.config.getint("rdf", "upload_workers", fallback=1),
+            retries=self.config.getint("rdf", "upload_retries", fallback=0),
+            backoff=self.config.getfloat("rdf", "upload_backoff", fallback=1.0),
+            max_latency=self.config.getfloat("rdf", "upload_max_latency", fallback=0)
+            or None,
+            progress=progress,
+        )
+        try:
+            uploader.upload(encoded_batches())
+        except UploadError as error:
+            raise UploadError(f"Error while posting graph {graph_uri}: {error}")
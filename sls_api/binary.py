@@ -0,0 +1,255 @@
+from typing import BinaryIO, Callable, Iterable, Iterator
+
+from rdflib import BNode, Graph, Literal, URIRef
+
+MAGIC = b"SLSRDF\x01"
+
+IRI = 0
+BNODE = 1
+LITERAL = 2
+LANG_LITERAL = 3
+TYPED_LITERAL = 4
+
+
+def _write_varint(buffer: bytearray, value: int):
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_varint(data: bytes, position: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+def _write_string(buffer: bytearray, value: str):
+    encoded = value.encode("utf-8")
+    _write_varint(buffer, len(encoded))
+    buffer += encoded
+
+
+def _read_string(data: bytes, position: int) -> tuple[str, int]:
+    length, position = _read_varint(data, position)
+    end = position + length
+    return data[position:end].decode("utf-8"), end
+
+
+class BinaryWriter:
+    """Write batches of triples to a dictionary-encoded binary file
+
+    The file starts with the MAGIC bytes and is followed by blocks. Each block
+    is prefixed by its length and holds the terms which appear for the first
+    time in the block, then the triples of the block as term identifiers::
+
+        block   := length:varint n_terms:varint term* n_triples:varint triple*
+        term    := IRI value | BNODE value | LITERAL value
+                 | LANG_LITERAL value lang | TYPED_LITERAL value datatype:varint
+        value   := length:varint utf-8 bytes
+        triple  := subject:varint predicate:varint object:varint
+
+    Identifiers are given to the terms in the order of their first appearance,
+    starting at 0, and integers are unsigned LEB128 varints. A block only
+    refers to terms defined before or in itself, so a file can be written and
+    read batch by batch.
+
+    Attributes
+    ----------
+    triples : int
+        The number of triples written so far
+    bytes : int
+        The number of bytes written so far
+    """
+
+    def __init__(
+        self, fp: BinaryIO, progress: Callable[[int, int], None] | None = None
+    ):
+        """Wrap an empty binary file object and write the header
+
+        Parameters
+        ----------
+        fp : BinaryIO
+            The file object where the triples are written
+        progress : callable or None
+            Called after each batch with its number of triples and bytes
+        """
+
+        self.fp = fp
+        self.progress = progress
+        self.triples = 0
+        self.bytes = len(MAGIC)
+        self._ids = {}
+
+        self.fp.write(MAGIC)
+
+    def _term_id(self, term, terms: bytearray) -> int:
+        if isinstance(term, Literal):
+            if term.language:
+                key = (LANG_LITERAL, str(term), term.language)
+            elif term.datatype:
+                key = (TYPED_LITERAL, str(term), str(term.datatype))
+            else:
+                key = (LITERAL, str(term), None)
+        elif isinstance(term, BNode):
+            key = (BNODE, str(term), None)
+        else:
+            key = (IRI, str(term), None)
+
+        identifier = self._ids.get(key)
+        if identifier is not None:
+            return identifier
+
+        kind, value, extra = key
+        if kind == TYPED_LITERAL:
+            # the datatype is defined before the literal
+            datatype = self._term_id(URIRef(extra), terms)
+        identifier = self._ids[key] = len(self._ids)
+
+        self._new_terms += 1
+        terms.append(kind)
+        _write_string(terms, value)
+        if kind == LANG_LITERAL:
+            _write_string(terms, extra)
+        elif kind == TYPED_LITERAL:
+            _write_varint(terms, datatype)
+        return identifier
+
+    def write(self, batch: Iterable[tuple]) -> int:
+        """Encode and write a batch of triples
+
+        Parameters
+        ----------
+        batch : iterable of tuple
+            The triples to write
+
+        Returns
+        -------
+        int
+            The number of triples written for this batch
+        """
+
+        self._new_terms = 0
+        terms = bytearray()
+        triples = bytearray()
+        count = 0
+        for triple in batch:
+            for term in triple:
+                _write_varint(triples, self._term_id(term, terms))
+            count += 1
+
+        if count == 0:
+            return 0
+
+        payload = bytearray()
+        _write_varint(payload, self._new_terms)
+        payload += terms
+        _write_varint(payload, count)
+        payload += triples
+
+        block = bytearray()
+        _write_varint(block, len(payload))
+        block += payload
+
+        self.fp.write(block)
+        self.fp.flush()
+
+        self.triples += count
+        self.bytes += len(block)
+        if self.progress is not None:
+            self.progress(count, len(block))
+        return count
+
+
+def iter_binary(fp: BinaryIO) -> Iterator[tuple]:
+    """Read the triples of a binary file, block by block
+
+    Parameters
+    ----------
+    fp : BinaryIO
+        The file object to read, positioned at its beginning
+
+    Yields
+    ------
+    tuple
+        The batches of triples, one per block
+
+    Raises
+    ------
+    ValueError
+        If the file is not a binary RDF file
+    """
+
+    if fp.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a binary RDF file")
+
+    terms = []
+    while True:
+        # the length of the block is a varint of at most 10 bytes
+        header = bytearray()
+        while byte := fp.read(1):
+            header += byte
+            if byte[0] < 0x80:
+                break
+        if not header:
+            return
+
+        length, _ = _read_varint(header, 0)
+        data = fp.read(length)
+        if len(data) != length:
+            raise ValueError("Truncated binary RDF file")
+
+        count, position = _read_varint(data, 0)
+        for _ in range(count):
+            kind = data[position]
+            value, position = _read_string(data, position + 1)
+            if kind == IRI:
+                term = URIRef(value)
+            elif kind == BNODE:
+                term = BNode(value)
+            elif kind == LITERAL:
+                term = Literal(value)
+            elif kind == LANG_LITERAL:
+                lang, position = _read_string(data, position)
+                term = Literal(value, lang=lang)
+            elif kind == TYPED_LITERAL:
+                datatype, position = _read_varint(data, position)
+                term = Literal(value, datatype=terms[datatype])
+            else:
+                raise ValueError(f"Unknown term kind {kind}")
+            terms.append(term)
+
+        count, position = _read_varint(data, position)
+        batch = []
+        for _ in range(count):
+            s, position = _read_varint(data, position)
+            p, position = _read_varint(data, position)
+            o, position = _read_varint(data, position)
+            batch.append((terms[s], terms[p], terms[o]))
+        yield tuple(batch)
+
+
+def load_binary(fp: BinaryIO) -> Graph:
+    """Load a binary file in a rdflib Graph
+
+    Parameters
+    ----------
+    fp : BinaryIO
+        The file object to read, positioned at its beginning
+
+    Returns
+    -------
+    rdflib.Graph
+        The graph
+    """
+
+    graph = Graph()
+    for batch in iter_binary(fp):
+        for triple in batch:
+            graph.add(triple)
+    return graph
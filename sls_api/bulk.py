@@ -0,0 +1,241 @@
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from contextlib import AbstractContextManager, suppress
+from os import link
+from pathlib import Path
+from shutil import copyfile
+from typing import Callable, Iterable, Iterator
+
+from ulid import ULID
+
+from sls_api.graph import is_line_based, iter_canonical_triples, iter_ntriples
+
+# formats read by the Virtuoso bulk loader whose triples all go to the graph
+# given to ld_dir (N-Quads and TriG files name their own graphs)
+LOADER_SUFFIXES = (".nt", ".ttl", ".rdf", ".owl", ".xml")
+
+# ll_state of a loaded file in DB.DBA.LOAD_LIST (0 is pending, 1 loading)
+LOADED = 2
+
+
+class BulkLoadError(Exception):
+    """Raised when the Virtuoso bulk loader cannot load a file"""
+
+
+def _write_parts(
+    lines: Iterable[str], directory: Path, prefix: str, part_size: int
+) -> list[Path]:
+    parts = []
+    fp = None
+    try:
+        for line in lines:
+            if fp is None or fp.tell() >= part_size:
+                if fp is not None:
+                    fp.close()
+                parts.append(directory.joinpath(f"{prefix}{len(parts):05d}.nt"))
+                fp = parts[-1].open("w", encoding="utf-8")
+            fp.write(line)
+    finally:
+        if fp is not None:
+            fp.close()
+    return parts
+
+
+def stage_file(
+    graph_path: Path, directory: Path, prefix: str, part_size: int
+) -> list[Path]:
+    """Put a RDF file where the bulk loader can read it
+
+    N-Triples and N-Quads files are split in N-Triples parts of about
+    part_size bytes, so that several loader sessions can load them
+    concurrently. Other formats read by the loader are linked, or copied
+    when they are on another file system, and the remaining formats are
+    converted to N-Triples.
+
+    Parameters
+    ----------
+    graph_path : pathlib.Path
+        The uploaded file
+    directory : pathlib.Path
+        The staging directory
+    prefix : str
+        The start of the names of the staged files
+    part_size : int
+        The approximative size of the parts, in bytes
+
+    Returns
+    -------
+    list of pathlib.Path
+        The staged files
+    """
+
+    if is_line_based(graph_path):
+
+        def lines() -> Iterator[str]:
+            # graph labels are removed, the loader uses the source graph
+            for batch in iter_ntriples(graph_path, 10_000):
+                yield from batch
+
+        return _write_parts(lines(), directory, prefix, part_size)
+
+    suffix = graph_path.suffix.lower()
+    if suffix in LOADER_SUFFIXES:
+        path = directory.joinpath(f"{prefix}00000{suffix}")
+        try:
+            link(graph_path, path)
+        except OSError:
+            copyfile(graph_path, path)
+        return [path]
+
+    return _write_parts(
+        iter_canonical_triples(graph_path), directory, prefix, part_size
+    )
+
+
+class BulkLoader:
+    """Load files in Virtuoso with ld_dir and rdf_loader_run over ODBC
+
+    The files are staged in a directory listed in the DirsAllowed parameter
+    of Virtuoso, registered in DB.DBA.LOAD_LIST with ld_dir, then loaded by
+    several rdf_loader_run sessions while the load list is polled to report
+    the progress.
+
+    Notes
+    -----
+    rdf_loader_run loads every pending file of the load list, including the
+    files registered by other programs. Polling needs an ODBC connection
+    besides the ones of the loader sessions.
+    """
+
+    def __init__(
+        self,
+        connection: Callable[[], AbstractContextManager],
+        directory: Path,
+        server_directory: str | None = None,
+        workers: int = 1,
+        part_size: int = 100_000_000,
+        poll_interval: float = 1.0,
+        checkpoint: bool = True,
+        progress: Callable[[int, int], None] | None = None,
+    ):
+        """Configure the loader
+
+        Parameters
+        ----------
+        connection : callable
+            Returns a context manager lending an ODBC connection to the isql
+            port, like OdbcPool.connection
+        directory : pathlib.Path
+            The staging directory, as seen by the API
+        server_directory : str or None
+            The staging directory as seen by Virtuoso, directory if None
+        workers : int
+            The number of rdf_loader_run sessions
+        part_size : int
+            The approximative size of the staged parts, in bytes
+        poll_interval : float
+            The delay, in seconds, between two checks of the load list
+        checkpoint : bool
+            Whether a checkpoint is run once the files are loaded
+        progress : callable or None
+            Called after each check of the load list with the number of
+            loaded files and the total number of files
+        """
+
+        self.connection = connection
+        self.directory = directory
+        self.server_directory = (server_directory or str(directory)).rstrip("/")
+        self.workers = workers
+        self.part_size = part_size
+        self.poll_interval = poll_interval
+        self.checkpoint = checkpoint
+        self.progress = progress
+
+    def _execute(self, query: str, *params) -> list:
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(query, *params)
+            rows = cursor.fetchall() if cursor.description else []
+            cursor.close()
+            connection.commit()
+        return rows
+
+    def _states(self, pattern: str) -> list:
+        return self._execute(
+            "SELECT ll_file, ll_state, ll_error FROM DB.DBA.LOAD_LIST "
+            "WHERE ll_file LIKE ?",
+            pattern,
+        )
+
+    def load(self, graph_path: Path, graph_uri: str) -> int:
+        """Load a RDF file in a graph
+
+        Parameters
+        ----------
+        graph_path : pathlib.Path
+            The file to load
+        graph_uri : str
+            The IRI of the graph
+
+        Returns
+        -------
+        int
+            The number of loaded files
+
+        Raises
+        ------
+        BulkLoadError
+            If the loader reports an error for one of the files
+        """
+
+        prefix = f"{ULID()}_"
+        pattern = f"{self.server_directory}/{prefix}%"
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        try:
+            loaded = self._load(graph_path, graph_uri, prefix, pattern)
+        except BaseException:
+            # the error of the load explains more than the one of the cleaning
+            with suppress(Exception):
+                self._clean(prefix, pattern)
+            raise
+        self._clean(prefix, pattern)
+        return loaded
+
+    def _load(self, graph_path: Path, graph_uri: str, prefix: str, pattern: str) -> int:
+        parts = stage_file(graph_path, self.directory, prefix, self.part_size)
+        self._execute("ld_dir(?, ?, ?)", self.server_directory, f"{prefix}*", graph_uri)
+
+        states, loaded = [], 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            runs = [
+                executor.submit(self._execute, "rdf_loader_run()")
+                for _ in range(self.workers)
+            ]
+            while True:
+                done, running = wait(
+                    runs, timeout=self.poll_interval, return_when=FIRST_EXCEPTION
+                )
+                states = self._states(pattern)
+                loaded = sum(state == LOADED for _, state, _ in states)
+                if self.progress is not None:
+                    self.progress(loaded, len(parts))
+                if not running or any(run.exception() for run in done):
+                    break
+            for run in runs:
+                run.result()
+
+        errors = [f"{file}: {error}" for file, _, error in states if error]
+        if errors:
+            raise BulkLoadError("\n".join(errors))
+        if loaded != len(parts):
+            raise BulkLoadError(f"{len(parts) - loaded} files were not loaded")
+
+        if self.checkpoint:
+            self._execute("checkpoint")
+        return loaded
+
+    def _clean(self, prefix: str, pattern: str):
+        # including the parts of a staging which failed
+        for path in self.directory.glob(f"{prefix}*"):
+            path.unlink(missing_ok=True)
+        self._execute("DELETE FROM DB.DBA.LOAD_LIST WHERE ll_file LIKE ?", pattern)
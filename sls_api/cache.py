@@ -0,0 +1,352 @@
+from collections import OrderedDict
+from concurrent.futures import Executor
+from pathlib import Path
+from threading import Lock
+from time import monotonic, time
+from typing import Any, Callable
+
+from ulid import ULID
+
+from sls_api.jobs import ExportJob
+
+
+class GraphVersions:
+    """Track the modifications of the source graphs made through the API
+
+    Notes
+    -----
+    Versions live in the memory of the process, modifications made by
+    another process are not seen.
+    """
+
+    def __init__(self):
+        self._versions = {}
+        self._modified = {}
+        self._lock = Lock()
+
+    def get(self, source_name: str) -> int:
+        """Get the current version of a source graph
+
+        Parameters
+        ----------
+        source_name : str
+            The name of the source
+
+        Returns
+        -------
+        int
+            The number of modifications of the graph since the start
+        """
+
+        return self._versions.get(source_name, 0)
+
+    def modified(self, source_name: str) -> float | None:
+        """Get the time of the last modification of a source graph
+
+        Parameters
+        ----------
+        source_name : str
+            The name of the source
+
+        Returns
+        -------
+        float or None
+            The timestamp of the last modification, None if the graph was not
+            modified since the start
+        """
+
+        return self._modified.get(source_name)
+
+    def bump(self, source_name: str):
+        """Record a modification of a source graph
+
+        Parameters
+        ----------
+        source_name : str
+            The name of the source
+        """
+
+        with self._lock:
+            self._versions[source_name] = self.get(source_name) + 1
+            self._modified[source_name] = time()
+
+
+class StatisticsCache:
+    """Keep the numbers computed on the source graphs, like their size
+
+    Entries are identified by a tuple key whose first items are the name of
+    the source and its version in GraphVersions, so that a modification of
+    the graph through the API makes them unreachable.
+    """
+
+    # number of entries kept, the least recently used ones are removed
+    MAX_ENTRIES = 10_000
+
+    def __init__(self, max_age: float | None = None):
+        """Configure the cache
+
+        Parameters
+        ----------
+        max_age : float or None
+            The delay, in seconds, after which an entry is computed again,
+            None to keep entries until the graph is modified
+        """
+
+        self.max_age = max_age
+
+        # key -> (value, creation time), least recently used first
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: tuple, compute: Callable[[], Any]) -> Any:
+        """Get a value, computing it if it is not cached
+
+        Parameters
+        ----------
+        key : tuple
+            The source name, the graph version, then anything identifying
+            the value
+        compute : callable
+            Called without argument to compute the value
+
+        Returns
+        -------
+        Any
+            The cached or computed value
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, created = entry
+                if self.max_age is None or monotonic() - created <= self.max_age:
+                    self._entries.move_to_end(key)
+                    return value
+                del self._entries[key]
+
+        # computed without the lock, concurrent misses may count twice
+        value = compute()
+        self.put(key, value)
+        return value
+
+    def put(self, key: tuple, value: Any):
+        """Store a value computed elsewhere
+
+        Parameters
+        ----------
+        key : tuple
+            The source name, the graph version, then anything identifying
+            the value
+        value : Any
+            The value to cache
+        """
+
+        with self._lock:
+            self._entries[key] = (value, monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.MAX_ENTRIES:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, source_name: str):
+        """Remove all the entries of a source
+
+        Parameters
+        ----------
+        source_name : str
+            The name of the source
+        """
+
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == source_name]:
+                del self._entries[key]
+
+
+class ExportCache:
+    """Keep the finished export files to serve them again
+
+    Entries are identified by a tuple key whose first item is the name of the
+    source. Concurrent requests for the same key share a single export job,
+    and the least recently used entries are dropped when the total size of
+    their files exceeds its budget.
+
+    Notes
+    -----
+    Clients may still be reading the pages of a dropped export, its file is
+    left in the spool, which removes it once it is no longer read.
+    """
+
+    # number of jobs whose status can still be requested
+    MAX_JOBS = 1_000
+
+    def __init__(self, directory: Path, max_size: int, max_age: float | None = None):
+        """Configure the cache
+
+        Parameters
+        ----------
+        directory : pathlib.Path
+            The directory where the export files are written
+        max_size : int
+            The maximal total size of the cached files, in bytes
+        max_age : float or None
+            The delay, in seconds, after which an entry is exported again,
+            None to keep entries until they are invalidated or evicted
+        """
+
+        self.directory = directory
+        self.max_size = max_size
+        self.max_age = max_age
+
+        # key -> (job, path, creation time), least recently used first
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._jobs = OrderedDict()
+        self._lock = Lock()
+
+    def _lookup(self, key: tuple) -> ExportJob | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        job, path, created = entry
+        expired = self.max_age is not None and monotonic() - created > self.max_age
+        if expired or not path.exists():
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return job
+
+    def _evict(self):
+        sizes = {}
+        for key, (_, path, _) in self._entries.items():
+            sizes[key] = path.stat().st_size if path.exists() else 0
+
+        total = sum(sizes.values())
+        # always keep the most recent entry, even if it is over budget
+        while total > self.max_size and len(self._entries) > 1:
+            key, _ = self._entries.popitem(last=False)
+            total -= sizes[key]
+
+    def _run(
+        self,
+        key: tuple,
+        path: Path,
+        job: ExportJob,
+        export: Callable[[Path, ExportJob], None],
+    ):
+        try:
+            export(path, job)
+
+            with self._lock:
+                self._entries[key] = (job, path, monotonic())
+                self._evict()
+            if job.running:
+                job.finish(path.stat().st_size)
+        except BaseException as exception:
+            # a truncated file must never be served
+            path.unlink(missing_ok=True)
+            job.fail(exception)
+        finally:
+            with self._lock:
+                del self._pending[key]
+
+    def submit(
+        self,
+        key: tuple,
+        suffix: str,
+        export: Callable[[Path, ExportJob], None],
+        executor: Executor | None = None,
+    ) -> ExportJob:
+        """Get the job of an export, starting it if needed
+
+        Parameters
+        ----------
+        key : tuple
+            The parameters of the export, starting with the source name
+        suffix : str
+            The extension of the export file, without dot
+        export : callable
+            Called with the path of the file to write and the job to report
+            the progress to, when the export is neither cached nor running
+        executor : concurrent.futures.Executor or None
+            Where the export runs, None to run it in the calling thread
+
+        Returns
+        -------
+        ExportJob
+            The job of the export, its file is directory/{identifier}.{suffix}
+        """
+
+        with self._lock:
+            job = self._lookup(key) or self._pending.get(key)
+            if job is not None:
+                return job
+
+            job = self._pending[key] = ExportJob(str(ULID()), key[0])
+            self._jobs[job.identifier] = job
+            excess = len(self._jobs) - self.MAX_JOBS
+            if excess > 0:
+                # the oldest finished jobs are forgotten, the pending and
+                # running ones can always be followed
+                finished = [i for i, job in self._jobs.items() if not job.running]
+                for identifier in finished[:excess]:
+                    del self._jobs[identifier]
+
+        path = self.directory.joinpath(f"{job.identifier}.{suffix}")
+        if executor is None:
+            self._run(key, path, job, export)
+        else:
+            executor.submit(self._run, key, path, job, export)
+        return job
+
+    def get(self, key: tuple, suffix: str, export: Callable[[Path], None]) -> str:
+        """Get the identifier of an export, waiting for it to be complete
+
+        Parameters
+        ----------
+        key : tuple
+            The parameters of the export, starting with the source name
+        suffix : str
+            The extension of the export file, without dot
+        export : callable
+            Called with the path of the file to write when the export is
+            not in the cache
+
+        Returns
+        -------
+        str
+            The identifier of the export, its file is
+            directory/{identifier}.{suffix}
+        """
+
+        job = self.submit(key, suffix, lambda path, job: export(path))
+        return job.future.result()
+
+    def job(self, identifier: str) -> ExportJob | None:
+        """Get a recent export job
+
+        Parameters
+        ----------
+        identifier : str
+            The identifier of the export
+
+        Returns
+        -------
+        ExportJob or None
+            The job, None if it is unknown or too old
+        """
+
+        return self._jobs.get(identifier)
+
+    def invalidate(self, source_name: str):
+        """Forget all the exports of a source, their files are left to the spool
+
+        Parameters
+        ----------
+        source_name : str
+            The name of the source
+        """
+
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == source_name]:
+                del self._entries[key]
@@ -0,0 +1,50 @@
+from json import dumps, loads
+from pathlib import Path
+
+
+class ExportCheckpoint:
+    """Remember the progress of an export so that it can be resumed"""
+
+    def __init__(self, path: Path):
+        """Bind the checkpoint to a file
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            The path of the JSON file where the progress is saved
+        """
+
+        self.path = path
+
+    def load(self) -> dict:
+        """Read the last saved progress
+
+        Returns
+        -------
+        dict
+            The state given to the last call of save, an empty dict if
+            there is no checkpoint
+        """
+
+        if not self.path.exists():
+            return {}
+
+        return loads(self.path.read_text())
+
+    def save(self, **state):
+        """Save the progress, atomically replacing the previous checkpoint
+
+        Parameters
+        ----------
+        **state
+            JSON serializable values describing the progress
+        """
+
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        tmp_path.write_text(dumps(state))
+        tmp_path.replace(self.path)
+
+    def clear(self):
+        """Remove the checkpoint once the export is done"""
+
+        self.path.unlink(missing_ok=True)
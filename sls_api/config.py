@@ -1,11 +1,21 @@
 from configparser import ConfigParser
-from json import loads
+from json import JSONDecodeError, loads
 from pathlib import Path
 from os import getenv
+from threading import Lock
+from time import monotonic
 
 
 class SlsConfig:
-    """Store all the configuration from the SousLeSens project"""
+    """Store all the configuration from the SousLeSens project
+
+    Attributes
+    ----------
+    version : int
+        Incremented by SlsConfigCache each time the configuration is reloaded
+    """
+
+    FILES = ("mainConfig.json", "sources.json", "profiles.json", "users/users.json")
 
     def __init__(self, config_dir: Path):
         """Retrieve the configuration as JSON files from the config directory
@@ -18,6 +28,7 @@ class SlsConfig:
         """
 
         self.config_dir = config_dir
+        self.version = 0
 
         self.mainconfig = self._get_sls_config("mainConfig.json")
         self.sources = self._get_sls_config("sources.json")
@@ -46,6 +57,87 @@ class SlsConfig:
         return loads(config_path.read_text())
 
 
+class SlsConfigCache:
+    """Keep the SousLeSens configuration in memory between requests
+
+    The files are only parsed again when their modification time or size
+    change. The new configuration is fully loaded before replacing the
+    previous one, so readers always get a complete SlsConfig.
+
+    Attributes
+    ----------
+    reloads : int
+        The number of times the configuration has been loaded
+    hits : int
+        The number of times the cached configuration has been returned
+    """
+
+    def __init__(self, config_dir: Path, check_interval: float = 1.0):
+        """Prepare the cache, the configuration is loaded on first access
+
+        Parameters
+        ----------
+        config_dir : pathlib.Path
+            The path to the SousLeSens config directory
+        check_interval : float
+            The minimal delay, in seconds, between two checks of the files
+        """
+
+        self.config_dir = config_dir
+        self.check_interval = check_interval
+
+        self.reloads = 0
+        self.hits = 0
+
+        self._config = None
+        self._signature = None
+        self._checked_at = 0.0
+        self._lock = Lock()
+
+    def _get_signature(self) -> tuple:
+        signature = []
+        for file_name in SlsConfig.FILES:
+            try:
+                stat = self.config_dir.joinpath(file_name).stat()
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def get(self) -> SlsConfig:
+        """Get the configuration, reloading it if the files changed
+
+        Returns
+        -------
+        SlsConfig
+            The current configuration, which must not be modified
+        """
+
+        config = self._config
+        if config is not None and monotonic() - self._checked_at < self.check_interval:
+            self.hits += 1
+            return config
+
+        with self._lock:
+            signature = self._get_signature()
+            if self._config is None or signature != self._signature:
+                try:
+                    config = SlsConfig(self.config_dir)
+                except (FileNotFoundError, JSONDecodeError):
+                    # a file is being written, keep the previous configuration
+                    if self._config is None:
+                        raise
+                else:
+                    config.version = self._config.version + 1 if self._config else 1
+                    self._config, self._signature = config, signature
+                    self.reloads += 1
+            else:
+                self.hits += 1
+
+            self._checked_at = monotonic()
+            return self._config
+
+
 class SlsConfigParser(ConfigParser):
     """Override the default parser to manage environment variables"""
 
@@ -0,0 +1,169 @@
+from contextlib import ExitStack
+from heapq import merge
+from itertools import islice
+from pathlib import Path
+from tempfile import TemporaryFile
+from typing import Iterable, Iterator
+
+
+class BlankNodeError(ValueError):
+    """Raised when a graph with blank nodes is compared
+
+    Blank node labels are not kept by Virtuoso, the same triple is not
+    written the same way in two files, and a blank node cannot be removed
+    with DELETE DATA.
+    """
+
+
+def sort_unique(lines: Iterable[str], directory: Path, run_size: int) -> Iterator[str]:
+    """Sort lines which may not fit in memory, removing the duplicates
+
+    The lines are sorted by runs of run_size lines, written to temporary
+    files when there are several runs, then merged.
+
+    Parameters
+    ----------
+    lines : iterable of str
+        The lines to sort, with their trailing newline
+    directory : pathlib.Path
+        The directory of the temporary files
+    run_size : int
+        The number of lines sorted in memory at once
+
+    Yields
+    ------
+    str
+        The distinct lines, in code point order
+    """
+
+    lines = iter(lines)
+    runs = []
+    try:
+        while run := sorted(islice(lines, run_size)):
+            if not runs and len(run) < run_size:
+                # everything fits in memory
+                runs.append(run)
+                break
+
+            fp = TemporaryFile("w+", encoding="utf-8", dir=directory)
+            runs.append(fp)
+            fp.writelines(run)
+            fp.seek(0)
+
+        previous = None
+        for line in merge(*runs):
+            if line != previous:
+                yield line
+                previous = line
+    finally:
+        for run in runs:
+            if not isinstance(run, list):
+                run.close()
+
+
+def diff_sorted(old: Iterable[str], new: Iterable[str]) -> Iterator[tuple[bool, str]]:
+    """Compare two sorted sequences of distinct lines
+
+    Parameters
+    ----------
+    old : iterable of str
+        The lines of the current content, sorted
+    new : iterable of str
+        The lines of the new content, sorted
+
+    Yields
+    ------
+    (bool, str)
+        True and the line for each added line, False and the line for each
+        removed line, in order
+    """
+
+    old, new = iter(old), iter(new)
+    old_line, new_line = next(old, None), next(new, None)
+    while old_line is not None or new_line is not None:
+        if new_line is None or (old_line is not None and old_line < new_line):
+            yield False, old_line
+            old_line = next(old, None)
+        elif old_line is None or new_line < old_line:
+            yield True, new_line
+            new_line = next(new, None)
+        else:
+            old_line, new_line = next(old, None), next(new, None)
+
+
+def write_diff(
+    old: Iterable[str],
+    new: Iterable[str],
+    added_path: Path,
+    removed_path: Path,
+    run_size: int = 1_000_000,
+    replaced_path: Path | None = None,
+) -> tuple[int, int]:
+    """Write the triples added to and removed from a graph
+
+    Parameters
+    ----------
+    old : iterable of str
+        The current triples, as canonical N-Triples lines in any order
+    new : iterable of str
+        The new triples, as canonical N-Triples lines in any order
+    added_path : pathlib.Path
+        The N-Triples file of the triples of new which are not in old
+    removed_path : pathlib.Path
+        The N-Triples file of the triples of old which are not in new
+    run_size : int
+        The number of lines sorted in memory at once
+    replaced_path : pathlib.Path or None
+        The N-Triples file of the removed triples whose subject and predicate
+        have an added triple, the values which changed, in removed_path if
+        None
+
+    Returns
+    -------
+    tuple of (int, int)
+        The numbers of added and removed triples
+
+    Raises
+    ------
+    BlankNodeError
+        If a triple of old or new has a blank node
+    """
+
+    def check(lines: Iterable[str]) -> Iterator[str]:
+        for line in lines:
+            # terms are separated by one space, and only literals have spaces
+            subj, _, obj = line.split(" ", 2)
+            if subj.startswith("_:") or obj.startswith("_:"):
+                raise BlankNodeError("Cannot compare graphs with blank nodes")
+            yield line
+
+    directory = added_path.parent
+    counts = [0, 0]
+    with ExitStack() as stack:
+        added_fp = stack.enter_context(added_path.open("w", encoding="utf-8"))
+        removed_fp = stack.enter_context(removed_path.open("w", encoding="utf-8"))
+        replaced_fp = removed_fp
+        if replaced_path is not None:
+            replaced_fp = stack.enter_context(replaced_path.open("w", encoding="utf-8"))
+
+        pairs = diff_sorted(
+            sort_unique(check(old), directory, run_size),
+            sort_unique(check(new), directory, run_size),
+        )
+        # the lines are sorted, those of a subject and predicate are together
+        key, removed, replaced = None, [], False
+        for added, line in pairs:
+            subj, pred, _ = line.split(" ", 2)
+            if (subj, pred) != key:
+                (replaced_fp if replaced else removed_fp).writelines(removed)
+                key, removed, replaced = (subj, pred), [], False
+
+            if added:
+                added_fp.write(line)
+                replaced = True
+            else:
+                removed.append(line)
+            counts[not added] += 1
+        (replaced_fp if replaced else removed_fp).writelines(removed)
+
+    return counts[0], counts[1]
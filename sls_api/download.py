@@ -0,0 +1,176 @@
+import zlib
+from pathlib import Path
+from re import compile as re_compile
+from typing import Iterator
+from urllib.parse import quote
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional, gzip is always available
+    zstandard = None
+
+RANGE_PATTERN = re_compile(r"^bytes=(?P<start>\d*)-(?P<end>\d*)$")
+
+# the encodings which can be produced, in order of preference
+ENCODINGS = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+
+
+class RangeNotSatisfiable(ValueError):
+    """Raised when a Range header does not match the content of a file"""
+
+
+def content_disposition(filename: str) -> str:
+    """Build the Content-Disposition header of a downloaded file
+
+    The name is given twice: quoted with its non-ASCII characters, quotes
+    and backslashes replaced for the clients which only read filename, and
+    percent-encoded in UTF-8 in filename* (RFC 5987).
+
+    Parameters
+    ----------
+    filename : str
+        The name of the file
+
+    Returns
+    -------
+    str
+        The value of the Content-Disposition header
+    """
+
+    fallback = "".join(
+        c if c.isascii() and c.isprintable() and c not in '"\\' else "_"
+        for c in filename
+    )
+    return (
+        f'attachment; filename="{fallback}"; '
+        f"filename*=UTF-8''{quote(filename, safe='')}"
+    )
+
+
+def parse_range(header: str, size: int) -> tuple[int, int] | None:
+    """Parse a single range of a HTTP Range header
+
+    Parameters
+    ----------
+    header : str
+        The value of the Range header, for instance bytes=100- or bytes=-500
+    size : int
+        The size of the file, in bytes
+
+    Returns
+    -------
+    tuple of (int, int) or None
+        The first and last positions of the range, inclusive, None if the
+        header must be ignored (unknown unit or several ranges)
+
+    Raises
+    ------
+    RangeNotSatisfiable
+        If the range is outside of the file
+    """
+
+    output = RANGE_PATTERN.match(header.strip())
+    if output is None:
+        return None
+
+    start, end = output.group("start"), output.group("end")
+    if not start and not end:
+        return None
+
+    if not start:
+        # suffix range, the last bytes of the file
+        length = int(end)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable(header)
+        return max(size - length, 0), size - 1
+
+    first = int(start)
+    last = min(int(end), size - 1) if end else size - 1
+    if first >= size or first > last:
+        raise RangeNotSatisfiable(header)
+    return first, last
+
+
+def negotiate_encoding(accept_encoding: str, allowed: tuple[str, ...]) -> str | None:
+    """Choose the content encoding of a response
+
+    Parameters
+    ----------
+    accept_encoding : str
+        The value of the Accept-Encoding header of the request
+    allowed : tuple of str
+        The encodings enabled on the server, in order of preference
+
+    Returns
+    -------
+    str or None
+        The chosen encoding, None to send the content as is
+    """
+
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, parameters = item.strip().partition(";")
+        if parameters.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+
+    for encoding in allowed:
+        if encoding in ENCODINGS and encoding in accepted:
+            return encoding
+    return None
+
+
+def iter_file(
+    path: Path,
+    start: int = 0,
+    end: int | None = None,
+    chunk_size: int = 1 << 20,
+    encoding: str | None = None,
+) -> Iterator[bytes]:
+    """Read a part of a file by chunks, compressing them if needed
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path of the file to read
+    start : int
+        The position of the first byte to read
+    end : int or None
+        The position of the last byte to read, inclusive, None to read until
+        the end of the file
+    chunk_size : int
+        The number of bytes read at once
+    encoding : str or None
+        gzip or zstd to compress the content, None to send it as is
+
+    Yields
+    ------
+    bytes
+        The chunks of the content
+    """
+
+    if encoding == "gzip":
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    elif encoding == "zstd":
+        compressor = zstandard.ZstdCompressor().compressobj()
+    else:
+        compressor = None
+
+    remaining = None if end is None else end - start + 1
+    with path.open("rb") as fp:
+        fp.seek(start)
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            data = fp.read(size)
+            if not data:
+                break
+            if remaining is not None:
+                remaining -= len(data)
+
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                yield data
+
+    if compressor is not None:
+        yield compressor.flush()
@@ -0,0 +1,82 @@
+from abc import ABC, abstractmethod
+from typing import Iterable
+
+
+class TripleFilter(ABC):
+    """A condition on the triples of an export
+
+    Filters are applied where the triples are produced: as a SPARQL FILTER
+    on the ?s ?p ?o pattern of the export queries (SPARQL endpoint and isql),
+    or as a predicate on the raw values when the triples are read from a
+    response which cannot be filtered by Virtuoso.
+    """
+
+    @abstractmethod
+    def sparql(self) -> str:
+        """Get the SPARQL clause keeping the triples
+
+        Returns
+        -------
+        str
+            One or more FILTER clauses on the ?s, ?p and ?o variables
+        """
+
+    @abstractmethod
+    def keep(self, subject: str, predicate: str, obj: str, is_iri: bool) -> bool:
+        """Check if a triple is kept
+
+        Parameters
+        ----------
+        subject : str
+            The IRI or blank node identifier of the subject
+        predicate : str
+            The IRI of the predicate
+        obj : str
+            The IRI, blank node identifier or lexical form of the object
+        is_iri : bool
+            Whether the object is an IRI
+
+        Returns
+        -------
+        bool
+            True if the triple is part of the export
+        """
+
+
+class ExcludeObjects(TripleFilter):
+    """Remove the triples whose object is one of the given IRIs"""
+
+    def __init__(self, iris: Iterable[str]):
+        """Configure the filter
+
+        Parameters
+        ----------
+        iris : iterable of str
+            The IRIs of the objects to remove
+        """
+
+        self.iris = frozenset(str(iri) for iri in iris)
+
+    def sparql(self) -> str:
+        # sameTerm never raises a type error, unlike != on literals
+        return " ".join(f"FILTER(!sameTerm(?o, <{iri}>))" for iri in sorted(self.iris))
+
+    def keep(self, subject: str, predicate: str, obj: str, is_iri: bool) -> bool:
+        return not is_iri or obj not in self.iris
+
+
+def sparql_filters(filters: Iterable[TripleFilter]) -> str:
+    """Join the SPARQL clauses of several filters
+
+    Parameters
+    ----------
+    filters : iterable of TripleFilter
+        The filters of the export
+
+    Returns
+    -------
+    str
+        The clauses to add next to the ?s ?p ?o pattern, empty without filter
+    """
+
+    return " ".join(triple_filter.sparql() for triple_filter in filters)
@@ -1,8 +1,191 @@
 from pathlib import Path
-from rdflib import Graph
+from re import compile as re_compile
+from typing import Iterator
+
+from rdflib import Graph, Literal
+from rdflib.namespace import XSD
+from rdflib.plugins.parsers.ntriples import unquote
+
+from sls_api.serializers import nt_literal, nt_row
+from sls_api.utils import batched
+
+LITERAL_PATTERN = re_compile(r'^"(?P<value>(?:[^"\\]|\\.)*)"(?P<suffix>.*)$')
+
+# file suffixes of the formats with exactly one triple (or quad) per line
+LINE_BASED_SUFFIXES = (".nt", ".ntriples", ".nq", ".nquads")
+QUADS_SUFFIXES = (".nq", ".nquads")
+
+TERM_PATTERN = re_compile(
+    r"<[^>]*>"  # IRI
+    r"|_:[^\s]*[^\s.]"  # blank node
+    r'|"(?:[^"\\]|\\.)*"(?:@[A-Za-z0-9-]+|\^\^<[^>]*>)?'  # literal
+)
 
 
 class RdfGraph(Graph):
     def __init__(self, graph_file_path: Path):
         super().__init__()
         self.parse(graph_file_path)
+
+
+def is_line_based(graph_file_path: Path) -> bool:
+    """Check if a file can be split on line boundaries without parsing it
+
+    Parameters
+    ----------
+    graph_file_path : pathlib.Path
+        The path of the RDF file
+
+    Returns
+    -------
+    bool
+        True for N-Triples and N-Quads files
+    """
+
+    return graph_file_path.suffix.lower() in LINE_BASED_SUFFIXES
+
+
+def quad_to_triple(line: str) -> str:
+    """Remove the graph label of a N-Quads line
+
+    Parameters
+    ----------
+    line : str
+        A N-Quads statement
+
+    Returns
+    -------
+    str
+        The same statement as a N-Triples line
+    """
+
+    terms = TERM_PATTERN.findall(line)
+    return " ".join(terms[:3]) + " .\n"
+
+
+def iter_ntriples(graph_file_path: Path, batch_size: int) -> Iterator[tuple]:
+    """Read a N-Triples or N-Quads file by batches of lines
+
+    Empty lines and comments are skipped and graph labels of N-Quads files
+    are removed, only batch_size lines are kept in memory.
+
+    Parameters
+    ----------
+    graph_file_path : pathlib.Path
+        The path of the N-Triples or N-Quads file
+    batch_size : int
+        The maximal number of triples of each batch
+
+    Yields
+    ------
+    tuple of str
+        A batch of N-Triples lines, with their trailing newline
+    """
+
+    quads = graph_file_path.suffix.lower() in QUADS_SUFFIXES
+
+    def lines():
+        with graph_file_path.open(encoding="utf-8") as fp:
+            for line in fp:
+                stripped = line.strip()
+                if not stripped or stripped.startswith("#"):
+                    continue
+                yield quad_to_triple(stripped) if quads else f"{stripped}\n"
+
+    yield from batched(lines(), batch_size)
+
+
+def canonical_literal(value: str, suffix: str = "") -> str:
+    """Write a literal in the form Virtuoso gives it back
+
+    Virtuoso stores the value of the typed literals, not their lexical form:
+    "01"^^xsd:integer is read back as "1", and the xsd:string datatype is
+    dropped. Literals are written with the lexical form rdflib normalizes
+    them to, and language tags in lower case.
+
+    Parameters
+    ----------
+    value : str
+        The lexical form of the literal, with N-Triples escapes
+    suffix : str
+        The language tag or the datatype following the quoted value, as
+        written in N-Triples
+
+    Returns
+    -------
+    str
+        The literal as a N-Triples term
+    """
+
+    if "\\" in value:
+        value = unquote(value)
+
+    if suffix.startswith("@"):
+        return nt_literal(value, lang=suffix[1:].lower())
+    if not suffix.startswith("^^"):
+        return nt_literal(value)
+
+    datatype = suffix[3:-1]
+    if datatype == str(XSD.string):
+        return nt_literal(value)
+    literal = Literal(value, datatype=datatype)
+    if not literal.ill_typed:
+        value = str(literal)
+    return nt_literal(value, datatype)
+
+
+def canonical_triple(line: str) -> str | None:
+    """Write a N-Triples or N-Quads line the way the exports write it
+
+    Terms are separated by a single space, the graph label is removed, and
+    literals are written by canonical_literal, so that two lines are equal
+    if and only if Virtuoso stores the same triple (blank nodes aside).
+
+    Parameters
+    ----------
+    line : str
+        A N-Triples or N-Quads statement
+
+    Returns
+    -------
+    str or None
+        The N-Triples line, with its trailing newline, None if the line is
+        empty or a comment
+    """
+
+    terms = TERM_PATTERN.findall(line)
+    if len(terms) < 3:
+        return None
+
+    subj, pred, obj = terms[:3]
+    if obj.startswith('"') and (output := LITERAL_PATTERN.match(obj)):
+        obj = canonical_literal(output.group("value"), output.group("suffix"))
+    return f"{subj} {pred} {obj} .\n"
+
+
+def iter_canonical_triples(graph_file_path: Path) -> Iterator[str]:
+    """Read the triples of a RDF file as canonical N-Triples lines
+
+    N-Triples and N-Quads files are read line by line, the other formats
+    are parsed in a rdflib Graph.
+
+    Parameters
+    ----------
+    graph_file_path : pathlib.Path
+        The path of the RDF file
+
+    Yields
+    ------
+    str
+        The triples, as returned by canonical_triple
+    """
+
+    if not is_line_based(graph_file_path):
+        for triple in RdfGraph(graph_file_path):
+            yield canonical_triple(nt_row(triple))
+        return
+
+    with graph_file_path.open(encoding="utf-8") as fp:
+        for line in fp:
+            if (triple := canonical_triple(line)) is not None:
+                yield triple
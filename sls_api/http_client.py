@@ -0,0 +1,96 @@
+from threading import Lock
+
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPDigestAuth
+
+
+class HttpClient:
+    """Share keep-alive connections and digest challenges between requests
+
+    All the calls to Virtuoso go through the same session, so that TCP
+    connections are reused instead of being opened for each request. One
+    HTTPDigestAuth is kept per credentials: once a thread answered a digest
+    challenge, it sends the Authorization header up front with the cached
+    nonce, saving the 401 round-trip on the following requests.
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: float | None = None):
+        """Configure the connection pool
+
+        Parameters
+        ----------
+        pool_size : int
+            The maximal number of connections kept open per host
+        timeout : float or None
+            The connect and read timeout of each request, in seconds
+        """
+
+        self.timeout = timeout
+
+        self.session = Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._auths = {}
+        self._lock = Lock()
+
+    def auth(self, user: str, password: str) -> HTTPDigestAuth:
+        """Get the digest authentication shared by all requests of a user
+
+        Parameters
+        ----------
+        user : str
+            The user name
+        password : str
+            The password of the user
+
+        Returns
+        -------
+        requests.auth.HTTPDigestAuth
+            The authentication handler, which caches the server nonce
+        """
+
+        with self._lock:
+            return self._auths.setdefault(
+                (user, password), HTTPDigestAuth(user, password)
+            )
+
+    def request(
+        self, method: str, url: str, user: str, password: str, **kwargs
+    ) -> Response:
+        """Send a request authenticated with digest
+
+        Parameters
+        ----------
+        method : str
+            The HTTP method
+        url : str
+            The URL of the request
+        user : str
+            The user name
+        password : str
+            The password of the user
+        **kwargs
+            Passed to requests.Session.request
+
+        Returns
+        -------
+        requests.Response
+            The response of the server
+        """
+
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(
+            method, url, auth=self.auth(user, password), **kwargs
+        )
+
+    def get(self, url: str, user: str, password: str, **kwargs) -> Response:
+        return self.request("GET", url, user, password, **kwargs)
+
+    def post(self, url: str, user: str, password: str, **kwargs) -> Response:
+        return self.request("POST", url, user, password, **kwargs)
+
+    def delete(self, url: str, user: str, password: str, **kwargs) -> Response:
+        return self.request("DELETE", url, user, password, **kwargs)
@@ -0,0 +1,164 @@
+from concurrent.futures import Future
+from threading import Lock
+from time import time
+
+
+class ExportJob:
+    """Track the progress of an export running in the background
+
+    Attributes
+    ----------
+    identifier : str
+        The identifier of the export, also used to download its pages
+    source_name : str
+        The name of the exported source
+    phase : str
+        One of queued, exporting, serializing, done or failed
+    triples : int
+        The number of triples received from Virtuoso so far
+    bytes : int
+        The number of bytes written to the export file so far
+    total : int or None
+        The expected number of triples, None if it is unknown
+    pages : PageIndex or None
+        The triple-aligned pages of the export file, when they are indexed
+        while the file is written
+    future : concurrent.futures.Future
+        Resolved with the identifier once the export file is complete
+    """
+
+    QUEUED = "queued"
+    EXPORTING = "exporting"
+    SERIALIZING = "serializing"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, identifier: str, source_name: str):
+        """Create a queued job
+
+        Parameters
+        ----------
+        identifier : str
+            The identifier of the export
+        source_name : str
+            The name of the exported source
+        """
+
+        self.identifier = identifier
+        self.source_name = source_name
+        self.phase = self.QUEUED
+        self.triples = 0
+        self.bytes = 0
+        self.total = None
+        self.error = None
+        self.created = time()
+        self.started = None
+        self.finished = None
+        self.pages = None
+        self.future = Future()
+        self._lock = Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.phase in (self.QUEUED, self.EXPORTING, self.SERIALIZING)
+
+    def start(self, total: int | None = None):
+        """Mark the beginning of the export
+
+        Parameters
+        ----------
+        total : int or None
+            The expected number of triples, if known
+        """
+
+        with self._lock:
+            self.phase = self.EXPORTING
+            self.total = total
+            self.started = time()
+
+    def advance(self, triples: int = 0, nbytes: int = 0):
+        """Record the progress of the export
+
+        Parameters
+        ----------
+        triples : int
+            The number of triples received since the last call
+        nbytes : int
+            The number of bytes written since the last call
+        """
+
+        with self._lock:
+            self.triples += triples
+            self.bytes += nbytes
+
+    def serializing(self):
+        """Mark the beginning of the serialization of the whole graph"""
+
+        self.phase = self.SERIALIZING
+
+    def finish(self, nbytes: int | None = None):
+        """Mark the export as complete
+
+        Parameters
+        ----------
+        nbytes : int or None
+            The size of the export file, if it was not reported by advance
+        """
+
+        with self._lock:
+            if nbytes is not None:
+                self.bytes = nbytes
+            self.phase = self.DONE
+            self.finished = time()
+        self.future.set_result(self.identifier)
+
+    def fail(self, exception: BaseException):
+        """Mark the export as failed
+
+        Parameters
+        ----------
+        exception : BaseException
+            The exception raised by the export
+        """
+
+        with self._lock:
+            self.phase = self.FAILED
+            self.error = str(exception)
+            self.finished = time()
+        self.future.set_exception(exception)
+
+    def eta(self) -> float | None:
+        """Estimate the remaining duration of the export
+
+        Returns
+        -------
+        float or None
+            The estimated number of seconds before the end, None if it cannot
+            be estimated yet
+        """
+
+        if self.phase != self.EXPORTING or not self.total or not self.triples:
+            return None
+
+        rate = self.triples / max(time() - self.started, 1e-6)
+        return max(self.total - self.triples, 0) / rate
+
+    def status(self) -> dict:
+        """Describe the job
+
+        Returns
+        -------
+        dict
+            The JSON serializable state of the job
+        """
+
+        return {
+            "identifier": self.identifier,
+            "source": self.source_name,
+            "phase": self.phase,
+            "triples": self.triples,
+            "total": self.total,
+            "bytes": self.bytes,
+            "eta": self.eta(),
+            "error": self.error,
+        }
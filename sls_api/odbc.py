@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from queue import Empty, LifoQueue
+from threading import BoundedSemaphore
+from typing import Any, Callable, Iterator
+
+
+class OdbcPool:
+    """Keep ODBC connections open to reuse them across requests
+
+    Idle connections are checked with a cheap query before being handed out
+    again, broken ones are closed and replaced by a new connection.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        size: int = 4,
+        timeout: float | None = None,
+        health_query: str = "SELECT 1",
+    ):
+        """Configure the pool, connections are opened lazily
+
+        Parameters
+        ----------
+        connect : callable
+            A function without argument returning a new DB-API connection
+        size : int
+            The maximal number of connections opened at the same time
+        timeout : float or None
+            How long to wait for a free connection, None to wait forever
+        health_query : str
+            The query used to check an idle connection before reusing it
+        """
+
+        self._connect = connect
+        self._idle = LifoQueue()
+        self._slots = BoundedSemaphore(size)
+        self.timeout = timeout
+        self.health_query = health_query
+
+    def _is_healthy(self, connection) -> bool:
+        try:
+            cursor = connection.cursor()
+            cursor.execute(self.health_query).fetchall()
+            cursor.close()
+        except Exception:
+            return False
+        return True
+
+    @staticmethod
+    def _discard(connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _acquire(self):
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except Empty:
+                return self._connect()
+
+            if self._is_healthy(connection):
+                return connection
+            self._discard(connection)
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Borrow a connection from the pool
+
+        The connection is given back to the pool when the block succeeds and
+        closed if anything goes wrong, since it may be left in an unknown
+        state (for instance with a partially consumed result set).
+
+        Yields
+        ------
+        connection
+            An open DB-API connection
+        """
+
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("No ODBC connection available in the pool")
+
+        try:
+            connection = self._acquire()
+        except BaseException:
+            self._slots.release()
+            raise
+
+        try:
+            yield connection
+        except BaseException:
+            self._discard(connection)
+            raise
+        else:
+            self._idle.put(connection)
+        finally:
+            self._slots.release()
+
+    def close(self):
+        """Close all the idle connections"""
+
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except Empty:
+                break
@@ -0,0 +1,133 @@
+from pathlib import Path
+
+# number of bytes read at once when a line end is looked for
+WINDOW_SIZE = 1 << 16
+
+
+class PageIndex:
+    """Split a line-based RDF file into pages ending on triple boundaries
+
+    Each page holds at most page_size bytes, unless a single line is longer.
+    In N-Triples and N-Quads files a newline always ends a statement, so the
+    pages can be parsed independently.
+
+    Attributes
+    ----------
+    page_size : int
+        The maximal size of a page, in bytes
+    offsets : list of int
+        The positions where the pages start
+    size : int
+        The number of bytes indexed so far
+    """
+
+    def __init__(self, page_size: int):
+        """Start an empty index
+
+        Parameters
+        ----------
+        page_size : int
+            The maximal size of a page, in bytes
+        """
+
+        self.page_size = page_size
+        self.offsets = [0]
+        self.size = 0
+
+    def feed(self, data: bytes):
+        """Index data appended to the file
+
+        Parameters
+        ----------
+        data : bytes
+            The appended data, made of complete lines
+        """
+
+        base = self.size
+        self.size += len(data)
+
+        while self.size - self.offsets[-1] > self.page_size:
+            limit = self.offsets[-1] + self.page_size
+            cut = data.rfind(b"\n", 0, limit - base)
+            if cut != -1 and base + cut + 1 > self.offsets[-1]:
+                boundary = base + cut + 1
+            elif base > self.offsets[-1]:
+                # the previous data ended on a line
+                boundary = base
+            else:
+                # a line longer than a page, the page ends after it
+                boundary = base + data.find(b"\n", limit - base) + 1
+            self.offsets.append(boundary)
+
+    def pages(self, complete: bool = True) -> list[tuple[int, int]]:
+        """Get the boundaries of the pages
+
+        Parameters
+        ----------
+        complete : bool
+            False while the file is still written, the last page is then
+            left out since it may still grow
+
+        Returns
+        -------
+        list of (int, int)
+            The start and end positions of each page, end excluded
+        """
+
+        bounds = list(self.offsets)
+        if complete and self.size > bounds[-1]:
+            bounds.append(self.size)
+        return list(zip(bounds, bounds[1:]))
+
+    @classmethod
+    def build(cls, path: Path, page_size: int) -> "PageIndex":
+        """Index an existing file
+
+        Each page is read backwards from its limit down to its last line
+        end, so that the pages are the ones feed would find.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            The path of the N-Triples or N-Quads file
+        page_size : int
+            The maximal size of a page, in bytes
+
+        Returns
+        -------
+        PageIndex
+            The index of the whole file
+        """
+
+        index = cls(page_size)
+        size = path.stat().st_size
+
+        with path.open("rb") as fp:
+            while size - index.offsets[-1] > page_size:
+                limit = end = index.offsets[-1] + page_size
+
+                boundary = None
+                while boundary is None and end > index.offsets[-1]:
+                    start = max(index.offsets[-1], end - WINDOW_SIZE)
+                    fp.seek(start)
+                    cut = fp.read(end - start).rfind(b"\n")
+                    if cut != -1:
+                        boundary = start + cut + 1
+                    end = start
+
+                if boundary is None:
+                    # a line longer than a page, the page ends after it
+                    boundary = position = limit
+                    fp.seek(position)
+                    while block := fp.read(WINDOW_SIZE):
+                        cut = block.find(b"\n")
+                        if cut != -1:
+                            boundary = position + cut + 1
+                            break
+                        position += len(block)
+                    else:
+                        boundary = size
+                index.offsets.append(boundary)
+
+        index.size = size
+        return index
@@ -0,0 +1,190 @@
+from threading import Lock
+from types import MappingProxyType
+from typing import Mapping
+
+from sls_api.config import SlsConfig
+from sls_api.users import User
+
+
+class PrefixTrie:
+    """Find all the stored keys which are a prefix of a string"""
+
+    def __init__(self):
+        self._root = {}
+
+    def insert(self, key: str, value):
+        """Store a value for a key
+
+        Parameters
+        ----------
+        key : str
+            The prefix
+        value : any
+            The value returned when the prefix matches
+        """
+
+        node = self._root
+        for char in key:
+            node = node.setdefault(char, {})
+        # None is never a character, use it as the value marker
+        node[None] = value
+
+    def prefixes_of(self, text: str) -> list:
+        """Get the values of the keys which are a prefix of text
+
+        Parameters
+        ----------
+        text : str
+            The string to match
+
+        Returns
+        -------
+        list
+            The values, from the shortest to the longest prefix
+        """
+
+        values = []
+        node = self._root
+        if None in node:
+            values.append(node[None])
+
+        for char in text:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                values.append(node[None])
+        return values
+
+
+class PermissionEngine:
+    """Resolve the sources readable by users from the SousLeSens profiles
+
+    The sourcesAccessControl rules of each profile are compiled once in a
+    prefix trie, and the resolved sources of each combination of profiles
+    are memoized. The engine is bound to one version of the configuration.
+    """
+
+    ADMIN = "admin"
+
+    def __init__(self, sls_config: SlsConfig):
+        """Compile the profiles
+
+        Parameters
+        ----------
+        sls_config : SlsConfig
+            The SousLeSens configuration
+        """
+
+        self.version = sls_config.version
+        self.sources = sls_config.sources
+        self.profiles = sls_config.profiles
+        self.formal_label = sls_config.mainconfig.get(
+            "formalOntologySourceLabel", ""
+        ).strip()
+
+        self._tries = {}
+        for name, profile in self.profiles.items():
+            trie = PrefixTrie()
+            for index, (key, value) in enumerate(
+                profile["sourcesAccessControl"].items()
+            ):
+                trie.insert(key, (index, value))
+            self._tries[name] = trie
+
+        self._cache = {}
+        self._lock = Lock()
+
+    def get_permission(self, profile_names: tuple, source_tree: str) -> str:
+        """Get the permission given by the first profile with a matching rule
+
+        Among the matching rules of a profile, the longest permission wins
+        (readwrite over read), the first declared one in case of a tie.
+
+        Parameters
+        ----------
+        profile_names : tuple of str
+            The names of the profiles of the user, in the profiles.json order
+        source_tree : str
+            The schemaType/group/name path of the source
+
+        Returns
+        -------
+        str
+            The permission, an empty string if no rule matches
+        """
+
+        for name in profile_names:
+            permissions = self._tries[name].prefixes_of(source_tree)
+            if self.formal_label:
+                permissions.append((float("inf"), "read"))
+
+            if permissions:
+                return min(permissions, key=lambda k: (-len(k[1]), k[0]))[1]
+
+        return ""
+
+    def _resolve(self, profile_names: tuple) -> Mapping[str, Mapping]:
+        if profile_names == self.ADMIN:
+            access_control = {
+                identifier: "readwrite" for identifier in self.sources.keys()
+            }
+        else:
+            all_access_control = {}
+            for source in self.sources.values():
+                name = source.get("name")
+
+                group = source.get("group", "")
+                if len(group.strip()) == 0:
+                    group = "DEFAULT"
+
+                permission = self.get_permission(
+                    profile_names, "/".join([source.get("schemaType"), group, name])
+                )
+
+                current_permission = all_access_control.setdefault(name, "")
+                if len(current_permission) < len(permission):
+                    all_access_control[name] = permission
+
+            access_control = {
+                identifier: all_access_control[source.get("name")]
+                for identifier, source in self.sources.items()
+                if source.get("name") in all_access_control
+            }
+
+        return MappingProxyType(
+            {
+                identifier: MappingProxyType(
+                    {**self.sources[identifier], "accessControl": permission}
+                )
+                for identifier, permission in access_control.items()
+            }
+        )
+
+    def get_user_sources(self, user: User) -> Mapping[str, Mapping]:
+        """Get the sources of a user with their accessControl
+
+        Parameters
+        ----------
+        user : User
+            The user
+
+        Returns
+        -------
+        Mapping
+            A read-only mapping of the source identifiers to read-only
+            copies of the sources, shared by all users with the same profiles
+        """
+
+        if user.is_admin():
+            profile_names = self.ADMIN
+        else:
+            profile_names = tuple(k for k in self.profiles if k in user.groups)
+
+        sources = self._cache.get(profile_names)
+        if sources is None:
+            with self._lock:
+                sources = self._cache.get(profile_names)
+                if sources is None:
+                    sources = self._cache[profile_names] = self._resolve(profile_names)
+        return sources
@@ -0,0 +1,429 @@
+from functools import lru_cache
+from pathlib import Path
+from re import compile as re_compile
+from typing import BinaryIO, Callable, Iterable, Mapping
+
+from rdflib import BNode, Graph, Literal
+from rdflib.namespace import DCTERMS, OWL, RDF, RDFS, SKOS, XSD
+from rdflib.term import Node
+
+from sls_api.binary import BinaryWriter
+from sls_api.pages import PageIndex
+
+# formats which can be written triple by triple, without a rdflib Graph
+STREAMING_FORMATS = ("nt", "nt11", "ntriples", "nquads")
+TURTLE_FORMATS = ("turtle", "ttl")
+
+# prefixes always declared by TurtleWriter
+TURTLE_PREFIXES = {
+    "dcterms": str(DCTERMS),
+    "owl": str(OWL),
+    "rdf": str(RDF),
+    "rdfs": str(RDFS),
+    "skos": str(SKOS),
+    "xsd": str(XSD),
+}
+
+# a conservative subset of the Turtle PN_LOCAL production
+LOCAL_NAME_PATTERN = re_compile(r"([A-Za-z0-9_]([A-Za-z0-9_.-]*[A-Za-z0-9_-])?)?")
+
+# the dictionary-encoded format of sls_api.binary, always written by batches
+BINARY_FORMAT = "binary"
+
+# media types of the rdflib serialization formats
+MEDIA_TYPES = {
+    "nt": "application/n-triples",
+    "nt11": "application/n-triples",
+    "ntriples": "application/n-triples",
+    "nquads": "application/n-quads",
+    "turtle": "text/turtle",
+    "ttl": "text/turtle",
+    "n3": "text/n3",
+    "xml": "application/rdf+xml",
+    "pretty-xml": "application/rdf+xml",
+    "json-ld": "application/ld+json",
+    "trig": "application/trig",
+    "trix": "application/trix",
+    BINARY_FORMAT: "application/x-sls-rdf-binary",
+}
+
+
+def nt_iri(value: str) -> str:
+    """Serialize an IRI as a N-Triples term
+
+    Parameters
+    ----------
+    value : str
+        The IRI
+
+    Returns
+    -------
+    str
+        The IRI between angle brackets
+    """
+
+    return f"<{value}>"
+
+
+def nt_literal(value: str, datatype: str | None = None, lang: str | None = None) -> str:
+    """Serialize a literal the same way as the rdflib N-Triples serializer
+
+    Parameters
+    ----------
+    value : str
+        The lexical form of the literal
+    datatype : str or None
+        The IRI of the datatype, ignored when lang is given
+    lang : str or None
+        The language tag
+
+    Returns
+    -------
+    str
+        The literal as a N-Triples term
+    """
+
+    encoded = '"%s"' % value.replace("\\", "\\\\").replace("\n", "\\n").replace(
+        '"', '\\"'
+    ).replace("\r", "\\r")
+
+    if lang:
+        return f"{encoded}@{lang}"
+    if datatype:
+        return f"{encoded}^^<{datatype}>"
+    return encoded
+
+
+def nt_json_term(term: Mapping) -> str:
+    """Serialize a term of a SPARQL JSON result or of a RDF/JSON document
+
+    Parameters
+    ----------
+    term : Mapping
+        The term, with its type, value and optional datatype and language
+
+    Returns
+    -------
+    str
+        The N-Triples representation of the term
+    """
+
+    kind = term["type"]
+    if kind == "uri":
+        return nt_iri(term["value"])
+    if kind == "bnode":
+        return f"_:{term['value'].removeprefix('_:').removeprefix('nodeID://')}"
+    return nt_literal(
+        term["value"], term.get("datatype"), term.get("xml:lang") or term.get("lang")
+    )
+
+
+def nt_term(term: Node) -> str:
+    """Serialize a rdflib term as a N-Triples term
+
+    Parameters
+    ----------
+    term : rdflib.term.Node
+        The URIRef, BNode or Literal to serialize
+
+    Returns
+    -------
+    str
+        The N-Triples representation of the term
+    """
+
+    if isinstance(term, Literal):
+        return nt_literal(term, term.datatype, term.language)
+    if isinstance(term, BNode):
+        return f"_:{term}"
+    return nt_iri(term)
+
+
+def nt_row(triple: tuple) -> str:
+    """Serialize a triple as a N-Triples line
+
+    Parameters
+    ----------
+    triple : tuple
+        The subject, predicate and object of the triple as rdflib terms
+
+    Returns
+    -------
+    str
+        The N-Triples line, with its trailing newline
+    """
+
+    subj, pred, obj = triple
+    return f"{nt_term(subj)} {nt_term(pred)} {nt_term(obj)} .\n"
+
+
+class NTriplesWriter:
+    """Write batches of triples to a N-Triples or N-Quads file as they arrive
+
+    Attributes
+    ----------
+    triples : int
+        The number of triples written so far
+    bytes : int
+        The number of bytes written so far
+    """
+
+    def __init__(
+        self,
+        fp: BinaryIO,
+        progress: Callable[[int, int], None] | None = None,
+        index: PageIndex | None = None,
+        graph: str | None = None,
+    ):
+        """Wrap a binary file object
+
+        Parameters
+        ----------
+        fp : BinaryIO
+            The file object where the triples are written
+        progress : callable or None
+            Called after each batch with its number of triples and bytes
+        index : PageIndex or None
+            Fed with each batch to split the file into triple-aligned pages,
+            the file must be empty when the writer is created
+        graph : str or None
+            The IRI of the graph to write N-Quads, None to write N-Triples
+        """
+
+        self.fp = fp
+        self.progress = progress
+        self.index = index
+        self.end = f" {nt_iri(graph)} .\n" if graph else " .\n"
+        self.triples = 0
+        self.bytes = 0
+
+    def write(self, batch: Iterable[tuple]) -> int:
+        """Serialize and write a batch of triples
+
+        Parameters
+        ----------
+        batch : iterable of tuple
+            The triples to write
+
+        Returns
+        -------
+        int
+            The number of triples written for this batch
+        """
+
+        return self.write_terms(
+            [(nt_term(subj), nt_term(pred), nt_term(obj)) for subj, pred, obj in batch]
+        )
+
+    def write_terms(self, rows: Iterable[tuple[str, str, str]]) -> int:
+        """Write a batch of triples whose terms are already serialized
+
+        Parameters
+        ----------
+        rows : iterable of (str, str, str)
+            The subject, predicate and object of each triple as N-Triples
+            terms
+
+        Returns
+        -------
+        int
+            The number of triples written for this batch
+        """
+
+        end = self.end
+        return self.write_lines(
+            [f"{subj} {pred} {obj}{end}" for subj, pred, obj in rows]
+        )
+
+    def write_lines(self, lines: list[str]) -> int:
+        """Write a batch of already serialized N-Triples lines
+
+        Parameters
+        ----------
+        lines : list of str
+            The lines to write, with their trailing newline
+
+        Returns
+        -------
+        int
+            The number of triples written for this batch
+        """
+
+        data = "".join(lines).encode("utf-8")
+
+        self.fp.write(data)
+        self.fp.flush()
+        if self.index is not None:
+            self.index.feed(data)
+
+        self.triples += len(lines)
+        self.bytes += len(data)
+        if self.progress is not None:
+            self.progress(len(lines), len(data))
+        return len(lines)
+
+
+class TurtleWriter:
+    """Write batches of triples to a Turtle file in a single pass
+
+    The consecutive triples of a subject are grouped in one statement, so
+    the output is the most compact when the triples are sorted by subject,
+    as the keyset pages of an export are. Unsorted input still gives a valid
+    document, with several statements for the same subject.
+
+    Attributes
+    ----------
+    triples : int
+        The number of triples written so far
+    bytes : int
+        The number of bytes written so far
+    """
+
+    def __init__(
+        self,
+        fp: BinaryIO,
+        prefixes: Mapping[str, str] | None = None,
+        progress: Callable[[int, int], None] | None = None,
+    ):
+        """Wrap an empty binary file object and write the prefixes
+
+        Parameters
+        ----------
+        fp : BinaryIO
+            The file object where the triples are written
+        prefixes : Mapping or None
+            The namespaces used to abbreviate the IRIs, by prefix, added to
+            TURTLE_PREFIXES
+        progress : callable or None
+            Called after each batch with its number of triples and bytes
+        """
+
+        self.fp = fp
+        self.progress = progress
+        self.triples = 0
+        self.bytes = 0
+
+        prefixes = {**TURTLE_PREFIXES, **(prefixes or {})}
+        # the longest namespace is the most specific one
+        self._namespaces = sorted(
+            ((namespace, prefix) for prefix, namespace in prefixes.items()),
+            key=lambda item: -len(item[0]),
+        )
+        self._iri = lru_cache(maxsize=1 << 16)(self._abbreviate)
+        self._type = nt_iri(str(RDF.type))
+        self._subject = None
+        self._predicate = None
+
+        header = "".join(
+            f"@prefix {prefix}: <{namespace}> .\n"
+            for prefix, namespace in sorted(prefixes.items())
+        )
+        self._emit(f"{header}\n", 0)
+
+    def _abbreviate(self, iri: str) -> str:
+        for namespace, prefix in self._namespaces:
+            if iri.startswith(namespace):
+                local_name = iri[len(namespace) :]
+                if LOCAL_NAME_PATTERN.fullmatch(local_name):
+                    return f"{prefix}:{local_name}"
+        return f"<{iri}>"
+
+    def _term(self, term: str) -> str:
+        if term[0] == "<":
+            return self._iri(term[1:-1])
+        if term[0] == '"' and term[-1] == ">":
+            # typed literal, abbreviate its datatype
+            position = term.rfind('"^^<')
+            return f"{term[:position + 3]}{self._iri(term[position + 4:-1])}"
+        return term
+
+    def _emit(self, text: str, count: int):
+        data = text.encode("utf-8")
+        self.fp.write(data)
+        self.fp.flush()
+
+        self.triples += count
+        self.bytes += len(data)
+        if self.progress is not None and count:
+            self.progress(count, len(data))
+
+    def write(self, batch: Iterable[tuple]) -> int:
+        """Serialize and write a batch of triples
+
+        Parameters
+        ----------
+        batch : iterable of tuple
+            The triples to write
+
+        Returns
+        -------
+        int
+            The number of triples written for this batch
+        """
+
+        return self.write_terms(
+            [(nt_term(subj), nt_term(pred), nt_term(obj)) for subj, pred, obj in batch]
+        )
+
+    def write_terms(self, rows: Iterable[tuple[str, str, str]]) -> int:
+        """Write a batch of triples whose terms are already serialized
+
+        Parameters
+        ----------
+        rows : iterable of (str, str, str)
+            The subject, predicate and object of each triple as N-Triples
+            terms
+
+        Returns
+        -------
+        int
+            The number of triples written for this batch
+        """
+
+        # group the triples of each subject and predicate of the batch
+        rows = sorted(rows, key=lambda row: (row[0], row[1]))
+        parts = []
+        for subj, pred, obj in rows:
+            obj = self._term(obj)
+            if subj == self._subject and pred == self._predicate:
+                parts.append(f",\n        {obj}")
+                continue
+
+            verb = "a" if pred == self._type else self._term(pred)
+            if subj == self._subject:
+                parts.append(f" ;\n    {verb} {obj}")
+            else:
+                if self._subject is not None:
+                    parts.append(" .\n\n")
+                parts.append(f"{self._term(subj)} {verb} {obj}")
+            self._subject, self._predicate = subj, pred
+
+        self._emit("".join(parts), len(rows))
+        return len(rows)
+
+    def close(self):
+        """End the last statement"""
+
+        if self._subject is not None:
+            self._emit(" .\n", 0)
+            self._subject = self._predicate = None
+
+
+def serialize_graph(graph: Graph, path: Path, format: str):
+    """Write a whole graph to a file, in any export format
+
+    Parameters
+    ----------
+    graph : rdflib.Graph
+        The graph to write
+    path : pathlib.Path
+        The path of the file
+    format : str
+        A rdflib serialization format or BINARY_FORMAT
+    """
+
+    if format == BINARY_FORMAT:
+        with path.open("wb") as fp:
+            BinaryWriter(fp).write(graph)
+    else:
+        graph.serialize(destination=path, format=format, encoding="utf-8")
@@ -0,0 +1,427 @@
+from hashlib import sha256
+from json import dumps, loads
+from os import utime
+from pathlib import Path
+
+# number of bytes hashed at once when a chunk is verified
+READ_SIZE = 1 << 20
+
+# upper bound of the number of chunks of a file, the received chunks of a
+# session are read in memory each time it is described
+MAX_CHUNKS = 100_000
+
+
+class ChunkError(ValueError):
+    """Raised when a chunk does not match its announced length or checksum"""
+
+
+class ChunkWriter:
+    """Write the content of a chunk at its offset, hashing it on the fly
+
+    Attributes
+    ----------
+    index : int
+        The index of the chunk
+    written : int
+        The number of bytes written so far
+    """
+
+    def __init__(self, session: "UploadSession", index: int):
+        """Open the file of the session at the offset of the chunk
+
+        Parameters
+        ----------
+        session : UploadSession
+            The session receiving the chunk
+        index : int
+            The index of the chunk
+        """
+
+        self.session = session
+        self.index = index
+        self.offset, self.length = session.chunk_range(index)
+        self.written = 0
+        self._hash = sha256()
+        self._fp = session.path.open("r+b")
+        self._fp.seek(self.offset)
+
+    def write(self, data: bytes):
+        """Write the next bytes of the chunk
+
+        Parameters
+        ----------
+        data : bytes
+            The bytes following the ones already written
+
+        Raises
+        ------
+        ChunkError
+            If the chunk is longer than expected, nothing is written over
+            the next chunk
+        """
+
+        if self.written + len(data) > self.length:
+            raise ChunkError(f"Chunk {self.index} is longer than {self.length} bytes")
+
+        self._fp.write(data)
+        self._hash.update(data)
+        self.written += len(data)
+
+    def commit(self, checksum: str):
+        """Check the chunk and record it as received
+
+        Parameters
+        ----------
+        checksum : str
+            The hexadecimal SHA-256 of the chunk, computed by the client
+
+        Raises
+        ------
+        ChunkError
+            If the chunk is incomplete or its checksum does not match, it
+            must then be sent again
+        """
+
+        try:
+            self._fp.flush()
+        finally:
+            self._fp.close()
+
+        if self.written != self.length:
+            raise ChunkError(
+                f"Chunk {self.index} has {self.written} bytes instead of {self.length}"
+            )
+        if self._hash.hexdigest() != checksum.lower():
+            raise ChunkError(f"Chunk {self.index} does not match its checksum")
+
+        self.session.record(self.index, self._hash.hexdigest())
+
+    def abort(self):
+        """Close the file without recording the chunk"""
+
+        self._fp.close()
+
+
+class UploadSession:
+    """Receive the chunks of an uploaded file in any order
+
+    The file is split in chunks of chunk_size bytes, except the last one.
+    Each chunk is written at its own offset of the file, so chunks can be
+    sent concurrently and sent again when they fail. Three files are kept in
+    the spool directory, named after the identifier of the session: the
+    uploaded file, a JSON description of the session, and a log where a line
+    with the index and the checksum of each chunk is appended once the chunk
+    is written. Appending to the log is atomic, so several workers can
+    receive the chunks of the same session.
+
+    Attributes
+    ----------
+    identifier : str
+        The identifier of the session
+    path : pathlib.Path
+        The path of the uploaded file
+    size : int
+        The size of the uploaded file, in bytes
+    chunk_size : int
+        The size of the chunks, in bytes
+    metadata : dict
+        The JSON serializable values given when the session was created
+    """
+
+    def __init__(self, directory: Path, identifier: str, description: dict):
+        """Bind a session to its files, use create or load to get a session
+
+        Parameters
+        ----------
+        directory : pathlib.Path
+            The directory of the session files
+        identifier : str
+            The identifier of the session
+        description : dict
+            The suffix, size and chunk_size of the file, and the metadata
+        """
+
+        self.directory = directory
+        self.identifier = identifier
+        self.path = directory.joinpath(f"{identifier}{description['suffix']}")
+        self.size = description["size"]
+        self.chunk_size = description["chunk_size"]
+        self.metadata = description["metadata"]
+
+    @staticmethod
+    def _description_path(directory: Path, identifier: str) -> Path:
+        return directory.joinpath(f"{identifier}.session")
+
+    @property
+    def _log_path(self) -> Path:
+        return self.directory.joinpath(f"{self.identifier}.chunks")
+
+    @classmethod
+    def create(
+        cls,
+        directory: Path,
+        identifier: str,
+        suffix: str,
+        size: int,
+        chunk_size: int,
+        **metadata,
+    ) -> "UploadSession":
+        """Start a session and allocate its file
+
+        Parameters
+        ----------
+        directory : pathlib.Path
+            The directory of the session files
+        identifier : str
+            The identifier of the session
+        suffix : str
+            The extension of the uploaded file, with its leading dot
+        size : int
+            The size of the uploaded file, in bytes
+        chunk_size : int
+            The size of the chunks, in bytes
+        **metadata
+            JSON serializable values kept with the session
+
+        Returns
+        -------
+        UploadSession
+            The session, without any chunk
+
+        Raises
+        ------
+        ValueError
+            If a size is not positive, or the file has more than MAX_CHUNKS
+            chunks
+        """
+
+        if size <= 0 or chunk_size <= 0:
+            raise ValueError("The size of the file and of its chunks must be positive")
+        if -(-size // chunk_size) > MAX_CHUNKS:
+            raise ValueError(f"A file cannot be sent in more than {MAX_CHUNKS} chunks")
+
+        description = {
+            "suffix": suffix,
+            "size": size,
+            "chunk_size": chunk_size,
+            "metadata": metadata,
+        }
+        session = cls(directory, identifier, description)
+        with session.path.open("wb") as fp:
+            fp.truncate(size)
+        session._log_path.touch()
+        cls._description_path(directory, identifier).write_text(dumps(description))
+        return session
+
+    @classmethod
+    def load(cls, directory: Path, identifier: str) -> "UploadSession | None":
+        """Open an existing session
+
+        Parameters
+        ----------
+        directory : pathlib.Path
+            The directory of the session files
+        identifier : str
+            The identifier of the session
+
+        Returns
+        -------
+        UploadSession or None
+            The session, None if it does not exist or was removed
+        """
+
+        # identifiers are ULIDs, never read a path given by a client
+        if not identifier.isalnum():
+            return None
+        try:
+            text = cls._description_path(directory, identifier).read_text()
+        except FileNotFoundError:
+            return None
+        return cls(directory, identifier, loads(text))
+
+    @property
+    def count(self) -> int:
+        """The number of chunks of the file"""
+
+        return -(-self.size // self.chunk_size)
+
+    def chunk_range(self, index: int) -> tuple[int, int]:
+        """Get the position of a chunk in the file
+
+        Parameters
+        ----------
+        index : int
+            The index of the chunk, from 0 to count - 1
+
+        Returns
+        -------
+        tuple of (int, int)
+            The offset and the length of the chunk, in bytes
+        """
+
+        if not 0 <= index < self.count:
+            raise IndexError(f"The file has no chunk {index}")
+
+        offset = index * self.chunk_size
+        return offset, min(self.chunk_size, self.size - offset)
+
+    def writer(self, index: int) -> ChunkWriter:
+        """Start receiving a chunk
+
+        Parameters
+        ----------
+        index : int
+            The index of the chunk
+
+        Returns
+        -------
+        ChunkWriter
+            The writer of the chunk, committed once the whole chunk is written
+        """
+
+        return ChunkWriter(self, index)
+
+    def record(self, index: int, checksum: str | None):
+        """Append the state of a chunk to the log
+
+        Parameters
+        ----------
+        index : int
+            The index of the chunk
+        checksum : str or None
+            The checksum of the received chunk, None to mark it as missing
+        """
+
+        with self._log_path.open("a") as fp:
+            fp.write(f"{index} {checksum or '-'}\n")
+
+        # keep the files of an active session in the spool
+        utime(self.path)
+        utime(self._description_path(self.directory, self.identifier))
+
+    def received(self) -> dict[int, str]:
+        """Get the chunks received so far
+
+        Returns
+        -------
+        dict
+            The checksum of each received chunk, by index
+        """
+
+        chunks = {}
+        with self._log_path.open() as fp:
+            for line in fp:
+                index, _, checksum = line.strip().partition(" ")
+                if checksum == "-":
+                    chunks.pop(int(index), None)
+                elif checksum:
+                    chunks[int(index)] = checksum
+        return chunks
+
+    def missing(self) -> list[int]:
+        """Get the chunks which must still be sent
+
+        Returns
+        -------
+        list of int
+            The indexes of the missing chunks
+        """
+
+        received = self.received()
+        return [index for index in range(self.count) if index not in received]
+
+    def missing_ranges(self) -> list[tuple[int, int]]:
+        """Get the chunks which must still be sent, as ranges
+
+        Returns
+        -------
+        list of (int, int)
+            The first and the last index of each run of missing chunks
+        """
+
+        ranges, first = [], 0
+        for index in sorted(self.received()):
+            if index > first:
+                ranges.append((first, index - 1))
+            first = index + 1
+        if first < self.count:
+            ranges.append((first, self.count - 1))
+        return ranges
+
+    def verify(self) -> list[int]:
+        """Hash the chunks written in the file again
+
+        The chunks whose content changed since they were received, for
+        instance because a concurrent retransmission of the same chunk
+        failed, are marked as missing.
+
+        Returns
+        -------
+        list of int
+            The indexes of the missing chunks, empty if the file is complete
+        """
+
+        received = self.received()
+        with self.path.open("rb") as fp:
+            for index, checksum in received.items():
+                offset, length = self.chunk_range(index)
+                fp.seek(offset)
+                digest = sha256()
+                while length > 0:
+                    data = fp.read(min(READ_SIZE, length))
+                    if not data:
+                        break
+                    digest.update(data)
+                    length -= len(data)
+                if digest.hexdigest() != checksum:
+                    self.record(index, None)
+
+        return self.missing()
+
+    def checksum(self) -> str:
+        """Compute the hexadecimal SHA-256 of the whole file
+
+        Returns
+        -------
+        str
+            The checksum of the uploaded file
+        """
+
+        digest = sha256()
+        with self.path.open("rb") as fp:
+            while data := fp.read(READ_SIZE):
+                digest.update(data)
+        return digest.hexdigest()
+
+    def status(self) -> dict:
+        """Describe the session
+
+        Returns
+        -------
+        dict
+            The JSON serializable state of the session
+        """
+
+        missing = self.missing_ranges()
+        return {
+            "identifier": self.identifier,
+            "size": self.size,
+            "chunkSize": self.chunk_size,
+            "chunks": self.count,
+            "received": self.count - sum(last - first + 1 for first, last in missing),
+            "missing": [[first, last] for first, last in missing],
+        }
+
+    def remove(self, keep_file: bool = False):
+        """Remove the files of the session
+
+        Parameters
+        ----------
+        keep_file : bool
+            True to only remove the description and the log of the session
+        """
+
+        self._description_path(self.directory, self.identifier).unlink(missing_ok=True)
+        self._log_path.unlink(missing_ok=True)
+        if not keep_file:
+            self.path.unlink(missing_ok=True)
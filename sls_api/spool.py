@@ -0,0 +1,175 @@
+from collections import deque
+from pathlib import Path
+from threading import Event, Lock, Thread
+from time import time
+from typing import Iterable
+
+from ulid import ULID
+
+
+def _is_identifier(name: str) -> bool:
+    try:
+        ULID.from_str(name)
+    except ValueError:
+        return False
+    return True
+
+
+class Spool:
+    """Manage the directory where exports and uploads are written
+
+    Files which have not been modified for ttl seconds are removed, as well
+    as the oldest files when the total size of the directory exceeds the
+    quota. Identifiers are ULIDs, which makes it possible to tell an expired
+    identifier from an unknown one, and only the files named after a ULID are
+    managed, the directory may be shared with other programs.
+    """
+
+    # files modified recently are being written, never evict them
+    GRACE_PERIOD = 60
+
+    def __init__(
+        self, directory: Path, ttl: float, quota: int, suffixes: Iterable[str]
+    ):
+        """Configure the spool
+
+        Parameters
+        ----------
+        directory : pathlib.Path
+            The spool directory, created if needed
+        ttl : float
+            The delay, in seconds, after which an unmodified file is removed
+        quota : int
+            The maximal total size of the spool, in bytes
+        suffixes : iterable of str
+            The extensions of the spool files, in lower case with their
+            leading dot
+        """
+
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.quota = quota
+        self.suffixes = frozenset(suffixes)
+
+        self._removed = deque(maxlen=10_000)
+        self._lock = Lock()
+        self._stop = Event()
+        self._thread = None
+
+    def path(self, identifier: str, suffix: str) -> Path:
+        """Get the path of a spool file
+
+        Parameters
+        ----------
+        identifier : str
+            The identifier of the export or of the upload
+        suffix : str
+            The extension of the file, with its leading dot
+
+        Returns
+        -------
+        pathlib.Path
+            The path of the file in the spool directory
+
+        Raises
+        ------
+        ValueError
+            If the identifier is not a ULID or the suffix is not one of the
+            spool suffixes, they may come from a client
+        """
+
+        if not _is_identifier(identifier):
+            raise ValueError(f"{identifier} is not a valid identifier")
+        if suffix.lower() not in self.suffixes:
+            raise ValueError(f"Unknown file extension {suffix}")
+        return self.directory.joinpath(f"{identifier}{suffix}")
+
+    def is_expired(self, identifier: str) -> bool:
+        """Check if the file of an identifier has been removed by the spool
+
+        Parameters
+        ----------
+        identifier : str
+            The identifier of the export or of the upload
+
+        Returns
+        -------
+        bool
+            True if the identifier has expired or was evicted, False if it
+            is not a known identifier
+        """
+
+        try:
+            created = ULID.from_str(identifier).timestamp
+        except ValueError:
+            return False
+
+        return created + self.ttl < time() or identifier in self._removed
+
+    def clean(self) -> int:
+        """Remove the expired files, then the oldest ones above the quota
+
+        Returns
+        -------
+        int
+            The number of removed files
+        """
+
+        now = time()
+        removed = 0
+
+        with self._lock:
+            files = []
+            for path in self.directory.iterdir():
+                # only manage the files named after an identifier
+                if not path.is_file() or not _is_identifier(path.name.split(".")[0]):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+            files.sort()
+            total = sum(size for _, size, _ in files)
+            for mtime, size, path in files:
+                expired = mtime + self.ttl < now
+                over_quota = total > self.quota and mtime + self.GRACE_PERIOD < now
+                if not expired and not over_quota:
+                    continue
+
+                path.unlink(missing_ok=True)
+                self._removed.append(path.name.split(".")[0])
+                total -= size
+                removed += 1
+
+        return removed
+
+    def _run(self, interval: float):
+        while not self._stop.wait(interval):
+            self.clean()
+
+    def start(self, interval: float = 300):
+        """Clean the spool periodically in a background thread
+
+        Parameters
+        ----------
+        interval : float
+            The delay, in seconds, between two cleanings
+        """
+
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = Thread(target=self._run, args=(interval,), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background cleaning"""
+
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,189 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Condition, Lock
+from time import monotonic, sleep
+from typing import Callable, Iterable
+
+from requests import RequestException, Response
+
+
+class UploadError(Exception):
+    """Raised when a batch cannot be posted, even after retrying"""
+
+
+class AdaptiveLimiter:
+    """Limit the number of concurrent requests, adapting to the server health
+
+    The limit is halved each time a request fails or is slower than the
+    latency threshold, and grows back by one request per round of successful
+    requests (additive increase, multiplicative decrease).
+    """
+
+    def __init__(self, maximum: int, max_latency: float | None = None):
+        """Start at the maximal number of concurrent requests
+
+        Parameters
+        ----------
+        maximum : int
+            The maximal number of requests in flight
+        max_latency : float or None
+            The latency, in seconds, above which the server is considered
+            overloaded, None to only react to errors
+        """
+
+        self.maximum = maximum
+        self.max_latency = max_latency
+        self.limit = float(maximum)
+        self.in_flight = 0
+        self._condition = Condition()
+
+    def acquire(self):
+        """Wait until a new request is allowed"""
+
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    def release(self):
+        """Notify the end of a request"""
+
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def feedback(self, ok: bool, latency: float):
+        """Adapt the limit to the outcome of a request
+
+        Parameters
+        ----------
+        ok : bool
+            Whether the request succeeded
+        latency : float
+            The duration of the request, in seconds
+        """
+
+        with self._condition:
+            slow = self.max_latency is not None and latency > self.max_latency
+            if not ok or slow:
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.limit = min(float(self.maximum), self.limit + 1 / self.limit)
+            self._condition.notify_all()
+
+
+class BatchUploader:
+    """Post batches of triples concurrently, retrying the failed ones"""
+
+    def __init__(
+        self,
+        post: Callable[[bytes], Response],
+        workers: int = 4,
+        retries: int = 5,
+        backoff: float = 1.0,
+        max_latency: float | None = None,
+        progress: Callable[[int, int, float], None] | None = None,
+    ):
+        """Configure the uploader
+
+        Parameters
+        ----------
+        post : callable
+            The function posting a batch and returning the HTTP response
+        workers : int
+            The maximal number of batches posted at the same time
+        retries : int
+            The number of retries of a failing batch
+        backoff : float
+            The delay, in seconds, before the first retry, doubled for each
+            following retry
+        max_latency : float or None
+            The latency, in seconds, above which the concurrency is reduced
+        progress : callable or None
+            Called after each posted batch with the number of triples and
+            bytes of the batch and the aggregate rate in triples per second
+        """
+
+        self.post = post
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.limiter = AdaptiveLimiter(workers, max_latency)
+        self.progress = progress
+
+        self.triples = 0
+        self._lock = Lock()
+        self._errors = []
+
+    def _post_with_retry(self, data: bytes):
+        for attempt in range(self.retries + 1):
+            start = monotonic()
+            try:
+                response = self.post(data)
+                ok = response.ok
+                error = (
+                    f"Got {response.status_code} while posting batch:\n"
+                    f"  {response.content}"
+                )
+                # a client error will not be fixed by retrying
+                retryable = response.status_code >= 500 or response.status_code in (
+                    408,
+                    429,
+                )
+            except RequestException as exception:
+                ok, error, retryable = False, str(exception), True
+            self.limiter.feedback(ok, monotonic() - start)
+
+            if ok:
+                return
+            if not retryable or attempt == self.retries:
+                raise UploadError(error)
+            sleep(self.backoff * 2**attempt)
+
+    def _post_batch(self, data: bytes, count: int):
+        try:
+            self._post_with_retry(data)
+        except Exception as exception:
+            self._errors.append(exception)
+            return
+        finally:
+            self.limiter.release()
+
+        with self._lock:
+            self.triples += count
+            rate = self.triples / max(monotonic() - self._start, 1e-6)
+            if self.progress is not None:
+                self.progress(count, len(data), rate)
+
+    def upload(self, batches: Iterable[tuple[bytes, int]]) -> int:
+        """Post all the batches
+
+        Batches are consumed only when a worker is available, so that at
+        most workers batches are kept in memory.
+
+        Parameters
+        ----------
+        batches : iterable of (bytes, int)
+            The serialized batches with their number of triples
+
+        Returns
+        -------
+        int
+            The number of triples posted
+
+        Raises
+        ------
+        UploadError
+            If a batch still fails after all the retries
+        """
+
+        self._start = monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for data, count in batches:
+                self.limiter.acquire()
+                if self._errors:
+                    self.limiter.release()
+                    break
+                executor.submit(self._post_batch, data, count)
+
+        if self._errors:
+            raise self._errors[0]
+        return self.triples
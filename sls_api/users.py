@@ -1,8 +1,60 @@
 from dataclasses import dataclass, field
+from hashlib import sha256
+from typing import Mapping
 
 
 class Users:
-    pass
+    """Index the users from the users.json file by token
+
+    Tokens are indexed by their SHA-256 digest, so that finding the user of
+    a token, or finding that no user has this token, does not depend on the
+    number of users and the raw tokens are not used as keys.
+    """
+
+    def __init__(self, users: dict, version: int = 0):
+        """Build the index
+
+        Parameters
+        ----------
+        users : dict
+            The content of the users.json file
+        version : int
+            The version of the configuration the users come from
+        """
+
+        self.version = version
+        self._by_token = {}
+
+        for user in users.values():
+            token = user.get("token", None)
+            if token is None:
+                continue
+
+            # sometimes, name is not present in users.json file
+            self._by_token.setdefault(self._hash(token), {"name": user["id"], **user})
+
+    @staticmethod
+    def _hash(token: str) -> bytes:
+        return sha256(token.encode("utf-8")).digest()
+
+    def get_by_token(self, token: str) -> "User | None":
+        """Find the user owning a token
+
+        Parameters
+        ----------
+        token : str
+            The token sent by the client
+
+        Returns
+        -------
+        User or None
+            A new User instance, None if no user has this token
+        """
+
+        user = self._by_token.get(self._hash(token))
+        if user is None:
+            return None
+        return User(**user)
 
 
 @dataclass
@@ -44,5 +96,5 @@ class User:
     def is_admin(self) -> bool:
         return self.name == "admin" or "admin" in self.groups
 
-    def set_sources(self, sources: dict):
+    def set_sources(self, sources: Mapping):
         self.sources = sources
@@ -1,7 +1,13 @@
 from itertools import islice
-from typing import Iterator
+from mmap import ACCESS_READ, mmap
+from pathlib import Path
+from shutil import copyfileobj
+from time import monotonic, sleep
+from typing import BinaryIO, Callable, Iterator
 
-from SPARQLWrapper import DIGEST, JSON, SPARQLWrapper, XML
+from rdflib import Graph
+
+from sls_api.http_client import HttpClient
 
 
 def batched(iterable: list, chunk_size: int) -> Iterator[list]:
@@ -25,19 +31,250 @@ def batched(iterable: list, chunk_size: int) -> Iterator[list]:
         yield chunk
 
 
+def _utf8_boundary(data: bytes) -> int:
+    """Find the length of the longest prefix of data without a truncated
+    UTF-8 sequence at its end
+
+    Parameters
+    ----------
+    data : bytes
+        The UTF-8 encoded bytes, possibly cut in the middle of a character
+
+    Returns
+    -------
+    int
+        The position where data can be cut safely
+    """
+
+    # a UTF-8 sequence is at most 4 bytes long, look for its lead byte
+    for index in range(len(data) - 1, max(len(data) - 5, -1), -1):
+        byte = data[index]
+        if byte & 0xC0 == 0x80:  # continuation byte
+            continue
+
+        if byte < 0x80:
+            length = 1
+        elif byte >= 0xF0:
+            length = 4
+        elif byte >= 0xE0:
+            length = 3
+        else:
+            length = 2
+
+        return index if index + length > len(data) else len(data)
+
+    return len(data)
+
+
+def read_chunk(
+    path: Path, offset: int, size: int, use_mmap: bool = False, text: bool = True
+) -> bytes:
+    """Read a chunk of a file without loading the whole file in memory
+
+    The chunk of a text file is shortened if needed so that it never ends in
+    the middle of an UTF-8 character, the next chunk must start at
+    offset + len(chunk).
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path of the file to read
+    offset : int
+        The position, in bytes, of the beginning of the chunk
+    size : int
+        The maximal size, in bytes, of the chunk
+    use_mmap : bool
+        Read the chunk through a memory map of the file instead of seeking
+    text : bool
+        False for binary files, which are cut at exactly size bytes
+
+    Returns
+    -------
+    bytes
+        The content of the chunk
+    """
+
+    with path.open("rb") as fp:
+        if use_mmap:
+            if path.stat().st_size <= offset:
+                return b""
+            with mmap(fp.fileno(), 0, access=ACCESS_READ) as mapped:
+                data = mapped[offset : offset + size]
+        else:
+            fp.seek(offset)
+            data = fp.read(size)
+
+    if not text:
+        return data
+
+    boundary = _utf8_boundary(data)
+    return data[:boundary] if boundary > 0 else data
+
+
+def read_page(
+    path: Path, offset: int, size: int, use_mmap: bool = False, text: bool = True
+) -> tuple[bytes, int]:
+    """Read a chunk of a file along with the size of the file
+
+    Both are read in a single call so that serving a page only needs one
+    trip to a worker thread.
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path of the file to read
+    offset : int
+        The position, in bytes, of the beginning of the chunk
+    size : int
+        The maximal size, in bytes, of the chunk
+    use_mmap : bool
+        Read the chunk through a memory map of the file instead of seeking
+    text : bool
+        False for binary files, which are cut at exactly size bytes
+
+    Returns
+    -------
+    tuple of (bytes, int)
+        The content of the chunk and the size of the file
+    """
+
+    return read_chunk(path, offset, size, use_mmap, text), path.stat().st_size
+
+
+def append_chunk(path: Path, data: bytes | BinaryIO):
+    """Append a chunk to a file, creating it if needed
+
+    Parameters
+    ----------
+    path : pathlib.Path
+        The path of the file
+    data : bytes or BinaryIO
+        The content to append, or a file object copied by blocks from its
+        current position
+    """
+
+    with path.open("ab") as fp:
+        if isinstance(data, bytes):
+            fp.write(data)
+        else:
+            copyfileobj(data, fp)
+
+
+def wait_until(
+    condition: Callable[[], bool],
+    timeout: float,
+    interval: float = 0.1,
+    max_interval: float = 5.0,
+) -> bool:
+    """Check a condition until it holds, waiting longer after each failure
+
+    The delay between two checks starts at interval and doubles up to
+    max_interval, so short operations are confirmed quickly while long ones
+    are not polled too often.
+
+    Parameters
+    ----------
+    condition : callable
+        Called without argument, returns True once the wait is over
+    timeout : float
+        The maximal duration of the wait in seconds
+    interval : float
+        The delay before the second check, in seconds
+    max_interval : float
+        The maximal delay between two checks, in seconds
+
+    Returns
+    -------
+    bool
+        True if the condition holds, False if the timeout expired before
+    """
+
+    deadline = monotonic() + timeout
+    while not condition():
+        remaining = deadline - monotonic()
+        if remaining <= 0:
+            return False
+        sleep(min(interval, remaining))
+        interval = min(interval * 2, max_interval)
+    return True
+
+
+def partition_predicates(counts: dict[str, int], count: int) -> list[list[str]]:
+    """Split the predicates of a graph into partitions of similar sizes
+
+    Each predicate is given to the partition with the fewest triples, from
+    the largest predicate to the smallest, so that the partitions are
+    disjoint and cover the graph.
+
+    Parameters
+    ----------
+    counts : dict[str, int]
+        The number of triples of each predicate
+    count : int
+        The number of partitions
+
+    Returns
+    -------
+    list[list[str]]
+        The predicates of each partition, without the empty partitions
+    """
+
+    if count < 1:
+        raise ValueError(f"Cannot split a graph into {count} shards")
+
+    partitions = [(0, index, []) for index in range(count)]
+    for predicate in sorted(counts, key=lambda p: (-counts[p], p)):
+        size, index, predicates = min(partitions)
+        predicates.append(predicate)
+        partitions[index] = (size + counts[predicate], index, predicates)
+    return [predicates for _, _, predicates in partitions if predicates]
+
+
 def sparql_query(
     virtuoso_url: str,
     virtuoso_user: str,
     virtuoso_password: str,
     query: str,
     format: str = "json",
+    client: HttpClient | None = None,
 ):
-    format_dict = {"json": JSON, "xml": XML}
+    """Send a SPARQL query to an endpoint protected by digest authentication
+
+    Parameters
+    ----------
+    virtuoso_url : str
+        The URL of the SPARQL endpoint
+    virtuoso_user : str
+        The user name
+    virtuoso_password : str
+        The password of the user
+    query : str
+        The SPARQL query
+    format : str
+        json to get the decoded SPARQL results, xml to get the rdflib Graph
+        of a CONSTRUCT query
+    client : HttpClient or None
+        The client whose connections are reused, a new one if None
+
+    Returns
+    -------
+    dict or rdflib.Graph
+        The result of the query
+    """
+
+    if client is None:
+        client = HttpClient()
 
-    endpoint = SPARQLWrapper(virtuoso_url)
-    endpoint.setHTTPAuth(DIGEST)
-    endpoint.setCredentials(virtuoso_user, virtuoso_password, "SPARQL Endpoint")
-    endpoint.setReturnFormat(format_dict.get(format, "json"))
+    accept = {"json": "application/sparql-results+json", "xml": "application/rdf+xml"}
+    response = client.post(
+        virtuoso_url,
+        virtuoso_user,
+        virtuoso_password,
+        data={"query": query},
+        headers={"Accept": accept.get(format, accept["json"])},
+    )
+    response.raise_for_status()
 
-    endpoint.setQuery(query)
-    return endpoint.queryAndConvert()
+    if format == "xml":
+        return Graph().parse(data=response.content, format="xml")
+    return response.json()
@@ -0,0 +1,58 @@
+from io import BytesIO
+from unittest import TestCase
+
+from rdflib import BNode, Graph, Literal, URIRef
+from rdflib.namespace import RDF, RDFS, XSD
+
+from sls_api.binary import BinaryWriter, iter_binary, load_binary
+from sls_api.serializers import NTriplesWriter
+
+
+class TestBinary(TestCase):
+    def setUp(self):
+        self.graph = Graph()
+        for i in range(300):
+            subject = URIRef(f"http://example.org/🦆/{i % 40}")
+            self.graph.add((subject, RDF.type, URIRef("http://example.org/Class")))
+            self.graph.add((subject, RDFS.label, Literal(f"canard {i}", lang="fr")))
+            self.graph.add((subject, RDFS.comment, Literal('multi\nline "quoted"')))
+            self.graph.add((subject, RDFS.seeAlso, BNode(f"b{i % 7}")))
+            self.graph.add(
+                (subject, RDFS.member, Literal(str(i % 50), datatype=XSD.integer))
+            )
+        self.triples = list(self.graph)
+
+    def write(self, batch_size: int) -> BytesIO:
+        fp = BytesIO()
+        writer = BinaryWriter(fp)
+        for i in range(0, len(self.triples), batch_size):
+            writer.write(self.triples[i : i + batch_size])
+        self.assertEqual(writer.triples, len(self.triples))
+        self.assertEqual(writer.bytes, len(fp.getvalue()))
+        fp.seek(0)
+        return fp
+
+    def test_round_trip(self):
+        for batch_size in (1, 100, 10_000):
+            graph = load_binary(self.write(batch_size))
+            self.assertEqual(len(graph), len(self.graph))
+            self.assertTrue(graph.isomorphic(self.graph))
+
+    def test_blocks_match_batches(self):
+        batches = list(iter_binary(self.write(100)))
+        self.assertEqual(len(batches), -(-len(self.triples) // 100))
+        self.assertEqual(
+            [len(batch) for batch in batches[:-1]], [100] * (len(batches) - 1)
+        )
+        self.assertEqual(sum(len(batch) for batch in batches), len(self.triples))
+
+    def test_smaller_than_ntriples(self):
+        ntriples = BytesIO()
+        NTriplesWriter(ntriples).write(self.triples)
+
+        size = len(self.write(1_000).getvalue())
+        self.assertLess(size * 3, len(ntriples.getvalue()))
+
+    def test_invalid_file(self):
+        with self.assertRaises(ValueError):
+            list(iter_binary(BytesIO(b"<a> <b> <c> .\n")))
@@ -0,0 +1,191 @@
+from contextlib import contextmanager
+from fnmatch import fnmatch
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Lock
+from unittest import TestCase
+
+from rdflib import Graph, Literal, URIRef
+
+from sls_api.bulk import BulkLoader, BulkLoadError, stage_file
+
+
+class FakeVirtuoso:
+    """Keep a load list and load the files in a rdflib Graph"""
+
+    def __init__(self):
+        self.load_list = {}
+        self.graphs = {}
+        self.queries = []
+        self.lock = Lock()
+
+    def ld_dir(self, directory: str, mask: str, graph_uri: str):
+        for path in sorted(Path(directory).iterdir()):
+            if fnmatch(path.name, mask):
+                self.load_list[str(path)] = [0, None, graph_uri]
+
+    def rdf_loader_run(self):
+        while True:
+            with self.lock:
+                pending = [f for f, (state, *_) in self.load_list.items() if state == 0]
+                if not pending:
+                    return
+                path = pending[0]
+                self.load_list[path][0] = 1
+
+            _, _, graph_uri = self.load_list[path]
+            graph = self.graphs.setdefault(graph_uri, Graph())
+            try:
+                data = Path(path).read_text(encoding="utf-8")
+                with self.lock:
+                    graph.parse(data=data, format=Path(path).suffix[1:])
+            except Exception as error:
+                self.load_list[path][1] = str(error)
+            self.load_list[path][0] = 2
+
+    def execute(self, query: str, *params) -> list:
+        self.queries.append(query)
+        if query.startswith("ld_dir"):
+            self.ld_dir(*params)
+        elif query.startswith("rdf_loader_run"):
+            self.rdf_loader_run()
+        elif query.startswith("SELECT"):
+            prefix = params[0].rstrip("%")
+            return [
+                (f, state, error)
+                for f, (state, error, _) in self.load_list.items()
+                if f.startswith(prefix)
+            ]
+        elif query.startswith("DELETE"):
+            prefix = params[0].rstrip("%")
+            for f in [f for f in self.load_list if f.startswith(prefix)]:
+                del self.load_list[f]
+        return []
+
+
+class FakeCursor:
+    def __init__(self, virtuoso: FakeVirtuoso):
+        self.virtuoso = virtuoso
+        self.description = None
+
+    def execute(self, query: str, *params):
+        self.rows = self.virtuoso.execute(query, *params)
+        self.description = [("column",)] if query.startswith("SELECT") else None
+        return self
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, virtuoso: FakeVirtuoso):
+        self.virtuoso = virtuoso
+
+    def cursor(self):
+        return FakeCursor(self.virtuoso)
+
+    def commit(self):
+        pass
+
+
+class TestBulkLoader(TestCase):
+    GRAPH_URI = "http://example.org/graph"
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.directory = Path(self.tmpdir.name)
+        self.staging = self.directory.joinpath("staging")
+        self.virtuoso = FakeVirtuoso()
+
+        self.graph = Graph()
+        for index in range(200):
+            subject = URIRef(f"http://example.org/s{index}")
+            self.graph.add((subject, URIRef("http://example.org/p"), Literal(index)))
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @contextmanager
+    def connection(self):
+        yield FakeConnection(self.virtuoso)
+
+    def loader(self, **kwargs) -> BulkLoader:
+        return BulkLoader(self.connection, self.staging, poll_interval=0.01, **kwargs)
+
+    def test_load_ntriples_in_parts(self):
+        path = self.directory.joinpath("graph.nt")
+        self.graph.serialize(path, format="nt")
+        progress = []
+
+        loader = self.loader(
+            workers=3, part_size=1000, progress=lambda *p: progress.append(p)
+        )
+        files = loader.load(path, self.GRAPH_URI)
+
+        self.assertGreater(files, 3)
+        self.assertEqual(progress[-1], (files, files))
+        self.assertEqual(set(self.virtuoso.graphs[self.GRAPH_URI]), set(self.graph))
+        self.assertIn("checkpoint", self.virtuoso.queries)
+
+        # the staged files and the load list are cleaned
+        self.assertEqual(list(self.staging.iterdir()), [])
+        self.assertEqual(self.virtuoso.load_list, {})
+
+    def test_load_turtle_file(self):
+        path = self.directory.joinpath("graph.ttl")
+        self.graph.serialize(path, format="turtle")
+
+        self.assertEqual(self.loader(checkpoint=False).load(path, self.GRAPH_URI), 1)
+        self.assertEqual(set(self.virtuoso.graphs[self.GRAPH_URI]), set(self.graph))
+        self.assertNotIn("checkpoint", self.virtuoso.queries)
+
+    def test_load_error(self):
+        path = self.directory.joinpath("graph.ttl")
+        path.write_text("not turtle")
+
+        with self.assertRaises(BulkLoadError):
+            self.loader().load(path, self.GRAPH_URI)
+        self.assertEqual(list(self.staging.iterdir()), [])
+        self.assertEqual(self.virtuoso.load_list, {})
+
+    def test_cleaning_error_does_not_hide_load_error(self):
+        path = self.directory.joinpath("graph.ttl")
+        path.write_text("not turtle")
+
+        def execute(query: str, *params) -> list:
+            if query.startswith("DELETE"):
+                raise TimeoutError("no free connection")
+            return FakeVirtuoso.execute(self.virtuoso, query, *params)
+
+        self.virtuoso.execute = execute
+        with self.assertRaises(BulkLoadError):
+            self.loader().load(path, self.GRAPH_URI)
+        self.assertEqual(list(self.staging.iterdir()), [])
+
+    def test_polling_error(self):
+        path = self.directory.joinpath("graph.nt")
+        self.graph.serialize(path, format="nt")
+
+        def execute(query: str, *params) -> list:
+            if query.startswith("SELECT"):
+                raise TimeoutError("no free connection")
+            return FakeVirtuoso.execute(self.virtuoso, query, *params)
+
+        self.virtuoso.execute = execute
+        with self.assertRaises(TimeoutError):
+            self.loader().load(path, self.GRAPH_URI)
+        self.assertEqual(self.virtuoso.load_list, {})
+
+    def test_stage_nquads_without_graph_labels(self):
+        path = self.directory.joinpath("graph.nq")
+        path.write_text("<http://ex/s> <http://ex/p> <http://ex/o> <http://ex/g> .\n")
+        self.staging.mkdir()
+
+        parts = stage_file(path, self.staging, "prefix_", 1000)
+        self.assertEqual([part.name for part in parts], ["prefix_00000.nt"])
+        self.assertEqual(
+            parts[0].read_text(), "<http://ex/s> <http://ex/p> <http://ex/o> .\n"
+        )
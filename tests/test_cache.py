@@ -0,0 +1,218 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from threading import Barrier, Event, Thread
+from time import sleep
+from unittest import TestCase
+
+from sls_api.cache import ExportCache, GraphVersions, StatisticsCache
+from sls_api.jobs import ExportJob
+
+
+class TestGraphVersions(TestCase):
+    def test_bump(self):
+        versions = GraphVersions()
+        self.assertEqual(versions.get("source"), 0)
+        self.assertIsNone(versions.modified("source"))
+
+        versions.bump("source")
+        self.assertEqual(versions.get("source"), 1)
+        self.assertEqual(versions.get("other"), 0)
+        self.assertIsNotNone(versions.modified("source"))
+
+
+class TestStatisticsCache(TestCase):
+    def setUp(self):
+        self.counts = []
+
+    def count(self, value: int):
+        def compute():
+            self.counts.append(value)
+            return value
+
+        return compute
+
+    def test_value_is_reused(self):
+        cache = StatisticsCache()
+
+        self.assertEqual(cache.get(("source", 0, "size"), self.count(10)), 10)
+        self.assertEqual(cache.get(("source", 0, "size"), self.count(11)), 10)
+        # a new version of the graph is counted again
+        self.assertEqual(cache.get(("source", 1, "size"), self.count(12)), 12)
+        self.assertEqual(self.counts, [10, 12])
+
+    def test_put_and_invalidate(self):
+        cache = StatisticsCache()
+        cache.put(("source", 0, "size"), 10)
+        cache.put(("other", 0, "size"), 20)
+        cache.invalidate("source")
+
+        self.assertEqual(cache.get(("source", 0, "size"), self.count(11)), 11)
+        self.assertEqual(cache.get(("other", 0, "size"), self.count(21)), 20)
+
+    def test_expired_values_are_computed_again(self):
+        cache = StatisticsCache(max_age=0)
+
+        cache.get(("source", 0, "size"), self.count(10))
+        sleep(0.01)
+        cache.get(("source", 0, "size"), self.count(11))
+        self.assertEqual(self.counts, [10, 11])
+
+
+class TestExportCache(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.directory = Path(self.tmpdir.name)
+        self.exports = []
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def export(self, size: int = 10, delay: float = 0):
+        def write(path: Path):
+            sleep(delay)
+            self.exports.append(path)
+            path.write_bytes(b"x" * size)
+
+        return write
+
+    def test_export_is_reused(self):
+        cache = ExportCache(self.directory, max_size=100)
+
+        identifier = cache.get(("source", "nt"), "nt", self.export())
+        self.assertEqual(cache.get(("source", "nt"), "nt", self.export()), identifier)
+        self.assertNotEqual(
+            cache.get(("source", "ttl"), "ttl", self.export()), identifier
+        )
+
+        self.assertEqual(len(self.exports), 2)
+        self.assertTrue(self.directory.joinpath(f"{identifier}.nt").exists())
+
+    def test_concurrent_requests_share_one_export(self):
+        cache = ExportCache(self.directory, max_size=100)
+        barrier = Barrier(5)
+        identifiers = []
+
+        def request():
+            barrier.wait()
+            identifiers.append(cache.get(("source",), "nt", self.export(delay=0.1)))
+
+        threads = [Thread(target=request) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(self.exports), 1)
+        self.assertEqual(len(set(identifiers)), 1)
+
+    def test_failed_export_is_not_cached(self):
+        cache = ExportCache(self.directory, max_size=100)
+
+        def fail(path: Path):
+            raise RuntimeError("virtuoso is down")
+
+        with self.assertRaises(RuntimeError):
+            cache.get(("source",), "nt", fail)
+        cache.get(("source",), "nt", self.export())
+        self.assertEqual(len(self.exports), 1)
+
+    def test_least_recently_used_exports_are_evicted(self):
+        cache = ExportCache(self.directory, max_size=25)
+
+        cache.get(("a",), "nt", self.export())
+        cache.get(("b",), "nt", self.export())
+        cache.get(("a",), "nt", self.export())
+        cache.get(("c",), "nt", self.export())
+
+        self.assertEqual(len(self.exports), 3)
+
+        # b is exported again, a is still cached
+        cache.get(("b",), "nt", self.export())
+        cache.get(("c",), "nt", self.export())
+        self.assertEqual(len(self.exports), 4)
+        # the file of b may still be read, the spool removes it
+        self.assertTrue(self.exports[1].exists())
+
+    def test_invalidate(self):
+        cache = ExportCache(self.directory, max_size=100)
+
+        cache.get(("source", "nt"), "nt", self.export())
+        cache.get(("other", "nt"), "nt", self.export())
+        cache.invalidate("source")
+
+        cache.get(("source", "nt"), "nt", self.export())
+        cache.get(("other", "nt"), "nt", self.export())
+        self.assertEqual(len(self.exports), 3)
+        self.assertTrue(self.exports[0].exists())
+
+    def test_expired_exports_are_exported_again(self):
+        cache = ExportCache(self.directory, max_size=100, max_age=0)
+
+        cache.get(("source",), "nt", self.export())
+        cache.get(("source",), "nt", self.export())
+        self.assertEqual(len(self.exports), 2)
+
+    def test_submit_returns_before_the_end_of_the_export(self):
+        cache = ExportCache(self.directory, max_size=100)
+        started = Event()
+        release = Event()
+
+        def export(path: Path, job: ExportJob):
+            job.start(total=10)
+            started.set()
+            release.wait()
+            path.write_bytes(b"x" * 10)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            job = cache.submit(("source",), "nt", export, executor)
+            started.wait()
+            self.assertTrue(job.running)
+            self.assertIs(cache.submit(("source",), "nt", export, executor), job)
+            self.assertIs(cache.job(job.identifier), job)
+
+            release.set()
+            self.assertEqual(job.future.result(), job.identifier)
+
+        self.assertEqual(job.phase, ExportJob.DONE)
+        self.assertEqual(job.bytes, 10)
+        self.assertIs(cache.submit(("source",), "nt", export), job)
+
+    def test_running_jobs_are_kept(self):
+        cache = ExportCache(self.directory, max_size=1_000)
+        cache.MAX_JOBS = 2
+        release = Event()
+
+        def export(path: Path, job: ExportJob):
+            release.wait()
+            path.write_bytes(b"x")
+
+        def done(path: Path, job: ExportJob):
+            path.write_bytes(b"x")
+
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            running = [
+                cache.submit((f"running{i}",), "nt", export, executor) for i in range(3)
+            ]
+            finished = cache.submit(("done",), "nt", done)
+            cache.submit(("other",), "nt", done)
+
+            for job in running:
+                self.assertIs(cache.job(job.identifier), job)
+            self.assertIsNone(cache.job(finished.identifier))
+            release.set()
+
+    def test_failed_job_keeps_its_error(self):
+        cache = ExportCache(self.directory, max_size=100)
+
+        def fail(path: Path, job: ExportJob):
+            path.write_bytes(b"<s> <p> ")
+            raise RuntimeError("virtuoso is down")
+
+        job = cache.submit(("source",), "nt", fail)
+        self.assertEqual(job.phase, ExportJob.FAILED)
+        self.assertEqual(cache.job(job.identifier).error, "virtuoso is down")
+        # the partial file is removed
+        self.assertEqual(list(self.directory.iterdir()), [])
+        with self.assertRaises(RuntimeError):
+            job.future.result()
@@ -0,0 +1,33 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from sls_api.checkpoint import ExportCheckpoint
+
+
+class TestExportCheckpoint(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.path = Path(self.tmpdir.name).joinpath("source.checkpoint")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_load_without_checkpoint(self):
+        self.assertEqual(ExportCheckpoint(self.path).load(), {})
+
+    def test_save_and_load(self):
+        checkpoint = ExportCheckpoint(self.path)
+        checkpoint.save(after="http://example.org/a", bytes=10)
+        checkpoint.save(after="http://example.org/b", bytes=20)
+
+        state = ExportCheckpoint(self.path).load()
+        self.assertEqual(state, {"after": "http://example.org/b", "bytes": 20})
+
+    def test_clear(self):
+        checkpoint = ExportCheckpoint(self.path)
+        checkpoint.save(after="http://example.org/a")
+        checkpoint.clear()
+        checkpoint.clear()
+
+        self.assertFalse(self.path.exists())
@@ -5,7 +5,7 @@ from tempfile import gettempdir
 from unittest import TestCase
 from unittest.mock import patch
 
-from sls_api.config import SlsConfig, SlsConfigParser
+from sls_api.config import SlsConfig, SlsConfigCache, SlsConfigParser
 
 
 class TestSlsConfig(TestCase):
@@ -43,6 +43,57 @@ class TestSlsConfig(TestCase):
         SlsConfig(self.path)
 
 
+class TestSlsConfigCache(TestCase):
+    def setUp(self):
+        self.path = Path(gettempdir()).joinpath("sls_api_test")
+        self.path.mkdir(mode=0o755, exist_ok=False)
+
+        for filename in ("mainConfig", "sources", "profiles"):
+            config = self.path.joinpath(f"{filename}.json")
+            config.write_text("{}")
+
+        users = self.path.joinpath("users")
+        users.mkdir()
+        users.joinpath("users.json").write_text("{}")
+
+    def tearDown(self):
+        if self.path.exists():
+            rmtree(self.path)
+
+    def test_config_is_cached(self):
+        cache = SlsConfigCache(self.path, check_interval=0)
+
+        self.assertIs(cache.get(), cache.get())
+        self.assertEqual(cache.reloads, 1)
+        self.assertEqual(cache.hits, 1)
+
+    def test_config_is_reloaded_when_a_file_changes(self):
+        cache = SlsConfigCache(self.path, check_interval=0)
+        config = cache.get()
+
+        self.path.joinpath("sources.json").write_text('{"source": {}}')
+        reloaded = cache.get()
+
+        self.assertIsNot(config, reloaded)
+        self.assertEqual(reloaded.sources, {"source": {}})
+        self.assertEqual(reloaded.version, config.version + 1)
+        self.assertEqual(cache.reloads, 2)
+
+    def test_files_are_not_checked_before_interval(self):
+        cache = SlsConfigCache(self.path, check_interval=3600)
+        config = cache.get()
+
+        self.path.joinpath("sources.json").write_text('{"source": {}}')
+        self.assertIs(cache.get(), config)
+
+    def test_previous_config_is_kept_when_a_file_is_invalid(self):
+        cache = SlsConfigCache(self.path, check_interval=0)
+        config = cache.get()
+
+        self.path.joinpath("sources.json").write_text('{"source": ')
+        self.assertIs(cache.get(), config)
+
+
 class TestSlsConfigParser(TestCase):
     VARIABLES = {
         "TEST_ANIMAL": "🐈",
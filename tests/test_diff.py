@@ -0,0 +1,115 @@
+from pathlib import Path
+from random import Random
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from sls_api.diff import BlankNodeError, diff_sorted, sort_unique, write_diff
+from sls_api.graph import canonical_triple
+
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+
+class TestDiff(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.directory = Path(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    @staticmethod
+    def triples(indexes) -> list[str]:
+        return [f'<http://ex/s{i}> <http://ex/p> "value {i}" .\n' for i in indexes]
+
+    def test_sort_unique_with_runs(self):
+        lines = self.triples(range(100)) * 2
+        Random(0).shuffle(lines)
+
+        for run_size in (7, 100, 1000):
+            output = list(sort_unique(lines, self.directory, run_size))
+            self.assertEqual(output, sorted(set(lines)))
+
+        # the temporary runs are removed
+        self.assertEqual(list(self.directory.iterdir()), [])
+
+    def test_diff_sorted(self):
+        old = ["a", "b", "d", "f"]
+        new = ["b", "c", "d", "g", "h"]
+        self.assertEqual(
+            list(diff_sorted(old, new)),
+            [(False, "a"), (True, "c"), (False, "f"), (True, "g"), (True, "h")],
+        )
+        self.assertEqual(list(diff_sorted([], ["a"])), [(True, "a")])
+        self.assertEqual(list(diff_sorted(["a"], [])), [(False, "a")])
+
+    def test_write_diff(self):
+        old = self.triples(range(0, 80))
+        new = self.triples(range(20, 100))
+        Random(1).shuffle(new)
+        added_path = self.directory.joinpath("added.nt")
+        removed_path = self.directory.joinpath("removed.nt")
+
+        counts = write_diff(old, new, added_path, removed_path, run_size=16)
+
+        self.assertEqual(counts, (20, 20))
+        self.assertEqual(
+            added_path.read_text().splitlines(keepends=True),
+            sorted(self.triples(range(80, 100))),
+        )
+        self.assertEqual(
+            removed_path.read_text().splitlines(keepends=True),
+            sorted(self.triples(range(0, 20))),
+        )
+
+    def test_write_diff_of_values_normalized_by_virtuoso(self):
+        paths = self.directory.joinpath("added.nt"), self.directory.joinpath("r.nt")
+        # the export gives back the values stored by virtuoso
+        exported = [
+            f'<http://ex/s> <http://ex/p> "1"^^<{XSD}integer> .\n',
+            '<http://ex/s> <http://ex/p> "text" .\n',
+            f'<http://ex/s> <http://ex/p> "2020-01-01T00:00:00Z"^^<{XSD}dateTime> .\n',
+        ]
+        uploaded = [
+            f'<http://ex/s> <http://ex/p> "01"^^<{XSD}integer> .\n',
+            f'<http://ex/s> <http://ex/p> "text"^^<{XSD}string> .\n',
+            f'<http://ex/s> <http://ex/p> "2020-01-01T00:00:00+00:00"^^<{XSD}dateTime> .',
+        ]
+
+        counts = write_diff(
+            map(canonical_triple, exported), map(canonical_triple, uploaded), *paths
+        )
+        self.assertEqual(counts, (0, 0))
+
+    def test_write_diff_with_replaced_values(self):
+        added_path = self.directory.joinpath("added.nt")
+        removed_path = self.directory.joinpath("removed.nt")
+        replaced_path = self.directory.joinpath("replaced.nt")
+        old = self.triples(range(10)) + ['<http://ex/s3> <http://ex/q> "kept" .\n']
+        new = self.triples(range(3, 12))
+        new[0] = '<http://ex/s3> <http://ex/p> "changed" .\n'
+
+        counts = write_diff(
+            old, new, added_path, removed_path, replaced_path=replaced_path
+        )
+
+        self.assertEqual(counts, (3, 5))
+        self.assertEqual(
+            replaced_path.read_text(), '<http://ex/s3> <http://ex/p> "value 3" .\n'
+        )
+        self.assertEqual(
+            removed_path.read_text().splitlines(keepends=True),
+            sorted(self.triples(range(3)) + [old[-1]]),
+        )
+
+    def test_write_diff_with_blank_nodes(self):
+        paths = self.directory.joinpath("added.nt"), self.directory.joinpath("r.nt")
+        # a literal starting like a blank node is not a blank node
+        literal = '<http://ex/s> <http://ex/p> "_:b0 is not a node" .\n'
+        self.assertEqual(write_diff([], [literal], *paths), (1, 0))
+
+        for line in (
+            '_:b0 <http://ex/p> "x" .\n',
+            "<http://ex/s> <http://ex/p> _:b0 .\n",
+        ):
+            with self.assertRaises(BlankNodeError):
+                write_diff(self.triples(range(3)), [line], *paths)
@@ -0,0 +1,86 @@
+import gzip
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from sls_api.download import (
+    RangeNotSatisfiable,
+    content_disposition,
+    iter_file,
+    negotiate_encoding,
+    parse_range,
+)
+
+
+class TestContentDisposition(TestCase):
+    def test_ascii_name(self):
+        self.assertEqual(
+            content_disposition("source.nt"),
+            "attachment; filename=\"source.nt\"; filename*=UTF-8''source.nt",
+        )
+
+    def test_name_with_quotes_and_non_latin_characters(self):
+        header = content_disposition('Вики "ÉTÉ".nt')
+        # the header must be encodable in latin-1
+        header.encode("latin-1")
+        self.assertIn('filename="____ __T__.nt"', header)
+        self.assertTrue(
+            header.endswith(
+                "filename*=UTF-8''%D0%92%D0%B8%D0%BA%D0%B8%20%22%C3%89T%C3%89%22.nt"
+            )
+        )
+
+
+class TestParseRange(TestCase):
+    def test_valid_ranges(self):
+        self.assertEqual(parse_range("bytes=0-99", 1000), (0, 99))
+        self.assertEqual(parse_range("bytes=900-", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=900-5000", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-100", 1000), (900, 999))
+        self.assertEqual(parse_range("bytes=-5000", 1000), (0, 999))
+
+    def test_ignored_ranges(self):
+        self.assertIsNone(parse_range("items=0-99", 1000))
+        self.assertIsNone(parse_range("bytes=0-9,20-29", 1000))
+        self.assertIsNone(parse_range("bytes=-", 1000))
+
+    def test_unsatisfiable_ranges(self):
+        for header in ("bytes=1000-", "bytes=50-10", "bytes=-0"):
+            with self.assertRaises(RangeNotSatisfiable):
+                parse_range(header, 1000)
+
+
+class TestNegotiateEncoding(TestCase):
+    def test_negotiate_encoding(self):
+        allowed = ("gzip",)
+        self.assertEqual(negotiate_encoding("gzip, deflate, br", allowed), "gzip")
+        self.assertIsNone(negotiate_encoding("gzip;q=0, deflate", allowed))
+        self.assertIsNone(negotiate_encoding("", allowed))
+        self.assertIsNone(negotiate_encoding("gzip", ()))
+        self.assertIsNone(negotiate_encoding("unknown", ("unknown",)))
+
+
+class TestIterFile(TestCase):
+    CONTENT = b"<a> <b> <c> .\n" * 1000
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.path = Path(self.tmpdir.name).joinpath("graph.nt")
+        self.path.write_bytes(self.CONTENT)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_iter_whole_file(self):
+        chunks = list(iter_file(self.path, chunk_size=1000))
+        self.assertEqual(b"".join(chunks), self.CONTENT)
+        self.assertTrue(all(len(chunk) <= 1000 for chunk in chunks))
+
+    def test_iter_range(self):
+        data = b"".join(iter_file(self.path, 100, 2099, chunk_size=64))
+        self.assertEqual(data, self.CONTENT[100:2100])
+
+    def test_iter_gzip(self):
+        data = b"".join(iter_file(self.path, chunk_size=1000, encoding="gzip"))
+        self.assertEqual(gzip.decompress(data), self.CONTENT)
+        self.assertLess(len(data), len(self.CONTENT))
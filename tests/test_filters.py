@@ -0,0 +1,40 @@
+from unittest import TestCase
+
+from rdflib.namespace import OWL
+
+from sls_api.filters import ExcludeObjects, TripleFilter, sparql_filters
+
+
+class TestExcludeObjects(TestCase):
+    def setUp(self):
+        self.filter = ExcludeObjects([OWL["NamedIndividual"]])
+
+    def test_keep(self):
+        individual = str(OWL["NamedIndividual"])
+        self.assertFalse(self.filter.keep("s", "p", individual, is_iri=True))
+        self.assertTrue(self.filter.keep("s", "p", individual, is_iri=False))
+        self.assertTrue(self.filter.keep("s", "p", str(OWL["Class"]), is_iri=True))
+
+    def test_sparql(self):
+        self.assertEqual(
+            self.filter.sparql(),
+            f"FILTER(!sameTerm(?o, <{OWL['NamedIndividual']}>))",
+        )
+
+    def test_sparql_filters(self):
+        other = ExcludeObjects([OWL["Class"]])
+        self.assertEqual(sparql_filters(()), "")
+        self.assertEqual(
+            sparql_filters((self.filter, other)),
+            f"{self.filter.sparql()} {other.sparql()}",
+        )
+
+
+class TestTripleFilter(TestCase):
+    def test_incomplete_filter_cannot_be_created(self):
+        class SparqlOnly(TripleFilter):
+            def sparql(self) -> str:
+                return ""
+
+        with self.assertRaises(TypeError):
+            SparqlOnly()
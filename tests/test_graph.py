@@ -0,0 +1,85 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from rdflib import Dataset, Graph
+
+from sls_api.graph import (
+    canonical_triple,
+    iter_canonical_triples,
+    is_line_based,
+    iter_ntriples,
+    quad_to_triple,
+)
+from sls_api.serializers import nt_row
+
+
+class TestLineBasedGraph(TestCase):
+    NQUADS = (
+        "# a comment\n"
+        "<http://ex/s> <http://ex/p> <http://ex/o> <http://ex/g> .\n"
+        "\n"
+        '_:b0 <http://ex/p> "a \\"quoted\\" <text>"@en _:g .\n'
+        '<http://ex/s> <http://ex/p> "42"^^<http://ex/int> .\n'
+    )
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.path = Path(self.tmpdir.name).joinpath("graph.nq")
+        self.path.write_text(self.NQUADS, encoding="utf-8")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_is_line_based(self):
+        self.assertTrue(is_line_based(Path("graph.nt")))
+        self.assertTrue(is_line_based(Path("graph.NQ")))
+        self.assertFalse(is_line_based(Path("graph.ttl")))
+
+    def test_quad_to_triple(self):
+        self.assertEqual(
+            quad_to_triple('_:b0 <http://ex/p> "x . y"@fr <http://ex/g> .'),
+            '_:b0 <http://ex/p> "x . y"@fr .\n',
+        )
+
+    def test_iter_ntriples(self):
+        batches = list(iter_ntriples(self.path, 2))
+
+        self.assertEqual([len(batch) for batch in batches], [2, 1])
+
+        ntriples = "".join(line for batch in batches for line in batch)
+        graph = Graph().parse(data=ntriples, format="nt")
+        self.assertEqual(len(graph), 3)
+
+    def test_canonical_triple(self):
+        line = '<http://ex/s>\t<http://ex/p>  "caf\\u00e9\\t\\"x\\""@fr <http://ex/g> .'
+        self.assertEqual(
+            canonical_triple(line), '<http://ex/s> <http://ex/p> "café\t\\"x\\""@fr .\n'
+        )
+        self.assertIsNone(canonical_triple("# a comment"))
+
+    def test_canonical_literals(self):
+        xsd = "http://www.w3.org/2001/XMLSchema#"
+        for literal, expected in (
+            (f'"01"^^<{xsd}integer>', f'"1"^^<{xsd}integer>'),
+            (f'"1.0E0"^^<{xsd}double>', f'"1.0"^^<{xsd}double>'),
+            (f'"1"^^<{xsd}boolean>', f'"true"^^<{xsd}boolean>'),
+            (f'"x"^^<{xsd}string>', '"x"'),
+            (f'"abc"^^<{xsd}integer>', f'"abc"^^<{xsd}integer>'),
+            ('"x"@EN-GB', '"x"@en-gb'),
+        ):
+            self.assertEqual(
+                canonical_triple(f"<http://ex/s> <http://ex/p> {literal} ."),
+                f"<http://ex/s> <http://ex/p> {expected} .\n",
+            )
+
+    def test_canonical_triples_match_rdflib(self):
+        dataset = Dataset().parse(self.path, format="nquads")
+        expected = [nt_row((s, p, o)) for s, p, o, _ in dataset.quads()]
+        lines = list(iter_canonical_triples(self.path))
+
+        self.assertEqual(len(lines), 3)
+        # blank node labels are not kept by rdflib
+        for line in lines:
+            if not line.startswith("_:"):
+                self.assertIn(line, expected)
@@ -0,0 +1,25 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from sls_api.http_client import HttpClient
+
+
+class TestHttpClient(TestCase):
+    def test_auth_is_shared_per_credentials(self):
+        client = HttpClient()
+
+        self.assertIs(client.auth("dba", "dba"), client.auth("dba", "dba"))
+        self.assertIsNot(client.auth("dba", "dba"), client.auth("dba", "other"))
+
+    def test_requests_use_the_shared_session(self):
+        client = HttpClient(pool_size=2, timeout=5)
+
+        with patch.object(client.session, "request") as request:
+            client.post("http://localhost/sparql", "dba", "dba", data=b"")
+            client.delete("http://localhost/crud", "dba", "dba", timeout=1)
+
+        first, second = request.call_args_list
+        self.assertEqual(first.args, ("POST", "http://localhost/sparql"))
+        self.assertEqual(first.kwargs["timeout"], 5)
+        self.assertIs(first.kwargs["auth"], client.auth("dba", "dba"))
+        self.assertEqual(second.kwargs["timeout"], 1)
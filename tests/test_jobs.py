@@ -0,0 +1,37 @@
+from unittest import TestCase
+
+from sls_api.jobs import ExportJob
+
+
+class TestExportJob(TestCase):
+    def test_progress(self):
+        job = ExportJob("01HZ", "source")
+        self.assertTrue(job.running)
+        self.assertEqual(job.status()["phase"], ExportJob.QUEUED)
+        self.assertIsNone(job.eta())
+
+        job.start(total=100)
+        job.advance(25, 1_000)
+        job.advance(25, 1_000)
+        status = job.status()
+        self.assertEqual(status["phase"], ExportJob.EXPORTING)
+        self.assertEqual((status["triples"], status["bytes"]), (50, 2_000))
+        self.assertGreaterEqual(status["eta"], 0)
+
+        job.serializing()
+        self.assertIsNone(job.eta())
+
+        job.finish(nbytes=5_000)
+        self.assertFalse(job.running)
+        self.assertEqual(job.bytes, 5_000)
+        self.assertEqual(job.future.result(), "01HZ")
+
+    def test_failure(self):
+        job = ExportJob("01HZ", "source")
+        job.start()
+        job.fail(RuntimeError("virtuoso is down"))
+
+        self.assertFalse(job.running)
+        self.assertEqual(job.status()["error"], "virtuoso is down")
+        with self.assertRaises(RuntimeError):
+            job.future.result()
@@ -0,0 +1,104 @@
+from threading import Thread
+from unittest import TestCase
+
+from sls_api.odbc import OdbcPool
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query):
+        if self.connection.broken:
+            raise ConnectionError("connection lost")
+        return self
+
+    def fetchall(self):
+        return [(1,)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self):
+        self.broken = False
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = True
+
+
+class TestOdbcPool(TestCase):
+    def setUp(self):
+        self.connections = []
+
+    def connect(self):
+        connection = FakeConnection()
+        self.connections.append(connection)
+        return connection
+
+    def test_connection_is_reused(self):
+        pool = OdbcPool(self.connect, size=2)
+
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+
+        self.assertIs(first, second)
+        self.assertEqual(len(self.connections), 1)
+
+    def test_broken_connection_is_replaced(self):
+        pool = OdbcPool(self.connect, size=2)
+
+        with pool.connection() as first:
+            first.broken = True
+        with pool.connection() as second:
+            pass
+
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+
+    def test_connection_is_discarded_on_error(self):
+        pool = OdbcPool(self.connect, size=2)
+
+        with self.assertRaises(RuntimeError):
+            with pool.connection() as first:
+                raise RuntimeError("query failed")
+        with pool.connection() as second:
+            pass
+
+        self.assertTrue(first.closed)
+        self.assertIsNot(first, second)
+
+    def test_pool_size_is_bounded(self):
+        pool = OdbcPool(self.connect, size=1, timeout=0.01)
+
+        with pool.connection():
+            errors = []
+
+            def borrow():
+                try:
+                    with pool.connection():
+                        pass
+                except TimeoutError as error:
+                    errors.append(error)
+
+            thread = Thread(target=borrow)
+            thread.start()
+            thread.join()
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(len(self.connections), 1)
+
+    def test_close(self):
+        pool = OdbcPool(self.connect)
+        with pool.connection() as connection:
+            pass
+        pool.close()
+
+        self.assertTrue(connection.closed)
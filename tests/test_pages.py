@@ -0,0 +1,80 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from sls_api.pages import PageIndex
+
+
+class TestPageIndex(TestCase):
+    LINES = [
+        f'<http://example.org/s{i}> <p> "{"é" * (i % 13)}" .\n' for i in range(200)
+    ]
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.path = Path(self.tmpdir.name).joinpath("graph.nt")
+        self.data = "".join(self.LINES).encode("utf-8")
+        self.path.write_bytes(self.data)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def check_pages(self, index: PageIndex, page_size: int):
+        pages = index.pages()
+        self.assertEqual(pages[0][0], 0)
+        self.assertEqual(pages[-1][1], len(self.data))
+
+        lines = []
+        for start, end in pages:
+            page = self.data[start:end]
+            self.assertLessEqual(len(page), page_size)
+            self.assertTrue(page.endswith(b"\n"))
+            lines.extend(page.decode("utf-8").splitlines(keepends=True))
+        self.assertEqual(lines, self.LINES)
+
+    def test_feed_by_batches(self):
+        index = PageIndex(500)
+        for i in range(0, len(self.LINES), 7):
+            index.feed("".join(self.LINES[i : i + 7]).encode("utf-8"))
+
+        self.check_pages(index, 500)
+
+    def test_build_matches_feed(self):
+        fed = PageIndex(500)
+        fed.feed(self.data)
+
+        built = PageIndex.build(self.path, 500)
+        self.check_pages(built, 500)
+        self.assertEqual(built.offsets, fed.offsets)
+
+    def test_build_matches_feed_with_long_lines(self):
+        # the last line end of the first page is farther than WINDOW_SIZE
+        data = b"".join(
+            f"<s{i}> <p> \"{'x' * length}\" .\n".encode()
+            for i, length in enumerate((100_000, 150_000, 10, 70_000))
+        )
+        self.path.write_bytes(data)
+
+        fed = PageIndex(200_000)
+        fed.feed(data)
+
+        built = PageIndex.build(self.path, 200_000)
+        self.assertEqual(built.offsets, fed.offsets)
+        for start, end in built.pages():
+            self.assertTrue(data[start:end].endswith(b"\n"))
+            self.assertLessEqual(end - start, 200_000)
+
+    def test_lines_longer_than_a_page(self):
+        index = PageIndex.build(self.path, 20)
+        pages = index.pages()
+        self.assertEqual(len(pages), len(self.LINES))
+        self.assertEqual(pages[-1][1], len(self.data))
+
+    def test_incomplete_pages_are_left_out(self):
+        index = PageIndex(500)
+        index.feed(self.data[: self.data.index(b"\n", 1200) + 1])
+
+        complete = index.pages()
+        partial = index.pages(complete=False)
+        self.assertEqual(partial, complete[:-1])
+        self.assertEqual(partial[-1][1], complete[-1][0])
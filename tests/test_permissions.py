@@ -0,0 +1,92 @@
+from pathlib import Path
+from unittest import TestCase
+
+from sls_api.config import SlsConfig
+from sls_api.permissions import PermissionEngine, PrefixTrie
+from sls_api.users import User
+
+
+class FakeSlsConfig(SlsConfig):
+    def __init__(self, mainconfig: dict, sources: dict, profiles: dict):
+        self.config_dir = Path()
+        self.version = 1
+        self.mainconfig = mainconfig
+        self.sources = sources
+        self.profiles = profiles
+        self.users = {}
+
+
+class TestPrefixTrie(TestCase):
+    def test_prefixes_of(self):
+        trie = PrefixTrie()
+        for key in ("", "OWL", "OWL/G", "OWL/GROUP", "SKOS"):
+            trie.insert(key, key)
+
+        self.assertEqual(trie.prefixes_of("OWL/G/name"), ["", "OWL", "OWL/G"])
+        self.assertEqual(trie.prefixes_of("KOS"), [""])
+
+
+class TestPermissionEngine(TestCase):
+    SOURCES = {
+        "a": {"name": "a", "schemaType": "OWL", "group": "G"},
+        "b": {"name": "b", "schemaType": "OWL", "group": ""},
+        "c": {"name": "c", "schemaType": "SKOS", "group": "G"},
+    }
+    PROFILES = {
+        "reader": {"sourcesAccessControl": {"OWL": "read", "OWL/G": "readwrite"}},
+        "skos": {"sourcesAccessControl": {"SKOS": "readwrite", "OWL": "readwrite"}},
+        "none": {"sourcesAccessControl": {}},
+    }
+
+    def user(self, *groups: str) -> User:
+        return User(
+            _type="user",
+            groups=list(groups),
+            id="user",
+            login="user",
+            name="user",
+            password="",
+            source="json",
+            token="",
+        )
+
+    def engine(self, formal_label: str = "") -> PermissionEngine:
+        config = FakeSlsConfig(
+            {"formalOntologySourceLabel": formal_label}, self.SOURCES, self.PROFILES
+        )
+        return PermissionEngine(config)
+
+    def access_control(self, sources) -> dict:
+        return {k: v["accessControl"] for k, v in sources.items()}
+
+    def test_longest_permission_of_first_matching_profile(self):
+        engine = self.engine()
+
+        sources = engine.get_user_sources(self.user("skos", "reader"))
+        self.assertEqual(
+            self.access_control(sources),
+            {"a": "readwrite", "b": "read", "c": "readwrite"},
+        )
+
+    def test_formal_label_gives_read_access(self):
+        sources = self.engine().get_user_sources(self.user("none"))
+        self.assertEqual(self.access_control(sources), {"a": "", "b": "", "c": ""})
+
+        sources = self.engine("FORMAL").get_user_sources(self.user("none"))
+        self.assertEqual(
+            self.access_control(sources), {"a": "read", "b": "read", "c": "read"}
+        )
+
+    def test_admin_can_readwrite_everything(self):
+        sources = self.engine().get_user_sources(self.user("admin"))
+        self.assertEqual(set(self.access_control(sources).values()), {"readwrite"})
+
+    def test_sources_are_memoized_and_read_only(self):
+        engine = self.engine()
+
+        sources = engine.get_user_sources(self.user("reader"))
+        self.assertIs(sources, engine.get_user_sources(self.user("reader")))
+
+        with self.assertRaises(TypeError):
+            sources["a"]["accessControl"] = "readwrite"
+        self.assertNotIn("accessControl", self.SOURCES["a"])
@@ -0,0 +1,131 @@
+from io import BytesIO
+from unittest import TestCase
+
+from rdflib import BNode, Dataset, Graph, Literal, URIRef
+from rdflib.compare import isomorphic
+from rdflib.namespace import RDF, XSD
+
+from sls_api.serializers import (
+    NTriplesWriter,
+    TurtleWriter,
+    nt_json_term,
+    nt_row,
+    nt_term,
+)
+
+
+class TestNTriplesWriter(TestCase):
+    SUBJECT = URIRef("http://example.org/🦆")
+    PREDICATE = URIRef("http://example.org/p")
+    OBJECTS = (
+        URIRef("http://example.org/o"),
+        BNode("b0"),
+        Literal("plain"),
+        Literal('multi\nline "quoted" \\ \r text'),
+        Literal("canard", lang="fr"),
+        Literal("42", datatype=XSD.integer),
+    )
+
+    def test_rows_match_rdflib_serializer(self):
+        for obj in self.OBJECTS:
+            graph = Graph()
+            graph.add((self.SUBJECT, self.PREDICATE, obj))
+
+            expected = graph.serialize(format="nt", encoding="utf-8")
+            row = nt_row((self.SUBJECT, self.PREDICATE, obj)).encode("utf-8")
+            self.assertEqual(row, expected)
+
+    def test_writer_counts_triples_and_bytes(self):
+        fp = BytesIO()
+        writer = NTriplesWriter(fp)
+
+        triples = [(self.SUBJECT, self.PREDICATE, obj) for obj in self.OBJECTS]
+        writer.write(triples[:2])
+        writer.write(triples[2:])
+
+        self.assertEqual(writer.triples, len(self.OBJECTS))
+        self.assertEqual(writer.bytes, len(fp.getvalue()))
+
+        graph = Graph().parse(data=fp.getvalue().decode("utf-8"), format="nt")
+        self.assertEqual(len(graph), len(self.OBJECTS))
+
+    def test_writer_reports_progress(self):
+        progress = []
+        writer = NTriplesWriter(BytesIO(), progress=lambda *p: progress.append(p))
+
+        triples = [(self.SUBJECT, self.PREDICATE, obj) for obj in self.OBJECTS]
+        writer.write(triples[:2])
+        writer.write(triples[2:])
+
+        self.assertEqual([count for count, _ in progress], [2, len(triples) - 2])
+        self.assertEqual(sum(nbytes for _, nbytes in progress), writer.bytes)
+
+    def test_json_terms_match_rdflib_terms(self):
+        terms = (
+            {"type": "uri", "value": "http://example.org/o"},
+            {"type": "bnode", "value": "nodeID://b0"},
+            {"type": "literal", "value": "plain"},
+            {"type": "literal", "value": 'multi\nline "quoted" \\ \r text'},
+            {"type": "literal", "value": "canard", "xml:lang": "fr"},
+            {"type": "typed-literal", "value": "42", "datatype": str(XSD.integer)},
+        )
+        for term, obj in zip(terms, self.OBJECTS):
+            self.assertEqual(nt_json_term(term), nt_term(obj))
+
+        # RDF/JSON documents use lang instead of xml:lang
+        term = {"type": "literal", "value": "canard", "lang": "fr"}
+        self.assertEqual(nt_json_term(term), '"canard"@fr')
+
+    def test_writer_writes_nquads(self):
+        fp = BytesIO()
+        writer = NTriplesWriter(fp, graph="http://example.org/graph")
+        writer.write((self.SUBJECT, self.PREDICATE, obj) for obj in self.OBJECTS)
+
+        dataset = Dataset()
+        dataset.parse(data=fp.getvalue().decode("utf-8"), format="nquads")
+        graph = dataset.graph(URIRef("http://example.org/graph"))
+        self.assertEqual(len(graph), len(self.OBJECTS))
+
+
+class TestTurtleWriter(TestCase):
+    def setUp(self):
+        ex = "http://example.org/"
+        self.graph = Graph()
+        for index in range(3):
+            subject = URIRef(f"{ex}s{index}")
+            self.graph.add((subject, RDF.type, URIRef(f"{ex}Class")))
+            self.graph.add((subject, URIRef(f"{ex}p"), Literal(index)))
+            self.graph.add((subject, URIRef(f"{ex}p"), Literal("x", lang="en")))
+            self.graph.add((subject, URIRef(f"{ex}q"), URIRef(f"{ex}path/a")))
+            self.graph.add((subject, URIRef(f"{ex}q"), BNode("b0")))
+        self.graph.add((BNode("b0"), URIRef(f"{ex}p"), Literal('"quoted"\n')))
+
+    def write(self, batches, prefixes=None) -> bytes:
+        fp = BytesIO()
+        writer = TurtleWriter(fp, prefixes)
+        for batch in batches:
+            writer.write(batch)
+        writer.close()
+
+        self.assertEqual(writer.triples, len(self.graph))
+        self.assertEqual(writer.bytes, len(fp.getvalue()))
+        return fp.getvalue()
+
+    def test_output_is_isomorphic_to_input(self):
+        triples = sorted(self.graph)
+        data = self.write([triples], {"ex": "http://example.org/"})
+
+        parsed = Graph().parse(data=data.decode("utf-8"), format="turtle")
+        self.assertTrue(isomorphic(parsed, self.graph))
+        # one statement per subject, the path cannot be a prefixed name
+        self.assertEqual(data.count(b"ex:s0 "), 1)
+        self.assertIn(b" ;\n    a ex:Class .", data)
+        self.assertIn(b"<http://example.org/path/a>", data)
+
+    def test_subjects_spread_over_batches(self):
+        # each triple in its own batch, in an unsorted order
+        triples = sorted(self.graph, key=lambda triple: str(triple[2]))
+        data = self.write([[triple] for triple in triples])
+
+        parsed = Graph().parse(data=data.decode("utf-8"), format="turtle")
+        self.assertTrue(isomorphic(parsed, self.graph))
@@ -0,0 +1,126 @@
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest import TestCase
+
+from sls_api.sessions import MAX_CHUNKS, ChunkError, UploadSession
+
+IDENTIFIER = "01J9ZQ0M7W8C9X1V2B3N4M5K6J"
+
+
+class TestUploadSession(TestCase):
+    CONTENT = "".join(f'<s{i}> <p> "café {i}" .\n' for i in range(100)).encode()
+    CHUNK_SIZE = 256
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.directory = Path(self.tmpdir.name)
+        self.session = UploadSession.create(
+            self.directory,
+            IDENTIFIER,
+            ".nt",
+            len(self.CONTENT),
+            self.CHUNK_SIZE,
+            source="OTHER",
+        )
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def chunk(self, index: int) -> bytes:
+        offset = index * self.CHUNK_SIZE
+        return self.CONTENT[offset : offset + self.CHUNK_SIZE]
+
+    def send(self, index: int, data: bytes | None = None):
+        chunk = self.chunk(index)
+        writer = self.session.writer(index)
+        # the body is received in several parts
+        data = chunk if data is None else data
+        try:
+            for position in range(0, len(data), 100):
+                writer.write(data[position : position + 100])
+        except ChunkError:
+            writer.abort()
+            raise
+        writer.commit(sha256(chunk).hexdigest())
+
+    def test_chunks_in_any_order(self):
+        count = self.session.count
+        self.assertEqual(count, -(-len(self.CONTENT) // self.CHUNK_SIZE))
+
+        indexes = list(range(count))[::-1]
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(self.send, indexes))
+
+        self.assertEqual(self.session.verify(), [])
+        self.assertEqual(self.session.path.read_bytes(), self.CONTENT)
+        self.assertEqual(self.session.checksum(), sha256(self.CONTENT).hexdigest())
+
+    def test_load_session(self):
+        self.send(1)
+
+        session = UploadSession.load(self.directory, IDENTIFIER)
+        self.assertEqual(session.metadata, {"source": "OTHER"})
+        self.assertEqual(session.path, self.session.path)
+        self.assertEqual(list(session.received()), [1])
+
+        self.assertIsNone(
+            UploadSession.load(self.directory, "01J9ZQ0M7W8C9X1V2B3N4M5K6K")
+        )
+        self.assertIsNone(UploadSession.load(self.directory, "../" + IDENTIFIER))
+
+    def test_chunk_with_wrong_checksum(self):
+        with self.assertRaises(ChunkError):
+            self.send(0, self.chunk(0)[:-1] + b"?")
+        self.assertIn(0, self.session.missing())
+
+        # the chunk is sent again
+        self.send(0)
+        self.assertNotIn(0, self.session.missing())
+
+    def test_chunk_with_wrong_length(self):
+        with self.assertRaises(ChunkError):
+            self.send(0, self.chunk(0)[:-1])
+        with self.assertRaises(ChunkError):
+            self.send(0, self.chunk(0) + self.chunk(1))
+        # nothing was written over the next chunk
+        self.assertEqual(
+            self.session.path.read_bytes()[self.CHUNK_SIZE :].strip(b"\0"), b""
+        )
+
+        with self.assertRaises(IndexError):
+            self.session.writer(self.session.count)
+
+    def test_verify_marks_changed_chunks_as_missing(self):
+        for index in range(self.session.count):
+            self.send(index)
+
+        with self.session.path.open("r+b") as fp:
+            fp.seek(self.CHUNK_SIZE + 10)
+            fp.write(b"?")
+
+        self.assertEqual(self.session.verify(), [1])
+        self.assertEqual(self.session.status()["missing"], [[1, 1]])
+        self.assertEqual(self.session.status()["received"], self.session.count - 1)
+
+    def test_missing_ranges(self):
+        for index in (1, 2, 5):
+            self.send(index)
+
+        last = self.session.count - 1
+        self.assertEqual(self.session.missing_ranges(), [(0, 0), (3, 4), (6, last)])
+
+    def test_create_with_too_many_chunks(self):
+        with self.assertRaises(ValueError):
+            UploadSession.create(
+                self.directory,
+                "01J9ZQ0M7W8C9X1V2B3N4M5K6K",
+                ".nt",
+                MAX_CHUNKS + 1,
+                1,
+            )
+
+    def test_remove_session(self):
+        self.session.remove()
+        self.assertEqual(list(self.directory.iterdir()), [])
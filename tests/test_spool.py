@@ -0,0 +1,85 @@
+from os import utime
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import time
+from unittest import TestCase
+
+from ulid import ULID
+
+from sls_api.spool import Spool
+
+
+class TestSpool(TestCase):
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.directory = Path(self.tmpdir.name).joinpath("spool")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def create(self, spool: Spool, age: float, size: int = 10) -> Path:
+        identifier = str(ULID.from_timestamp(time() - age))
+        path = spool.path(identifier, ".nt")
+        path.write_bytes(b"x" * size)
+        utime(path, (time() - age, time() - age))
+        return path
+
+    def test_expired_files_are_removed(self):
+        spool = Spool(self.directory, ttl=100, quota=1000, suffixes=[".nt"])
+
+        old = self.create(spool, age=200)
+        recent = self.create(spool, age=10)
+        others = [
+            self.directory.joinpath("README"),
+            # as long as a ULID, but not one
+            self.directory.joinpath("systemd-private-0123456789.tmp"),
+        ]
+        for other in others:
+            other.write_text("not managed by the spool")
+            utime(other, (0, 0))
+
+        self.assertEqual(spool.clean(), 1)
+        self.assertFalse(old.exists())
+        self.assertTrue(recent.exists())
+        for other in others:
+            self.assertTrue(other.exists())
+
+    def test_path_rejects_unknown_names(self):
+        spool = Spool(self.directory, ttl=100, quota=1000, suffixes=[".nt"])
+        identifier = str(ULID())
+
+        self.assertEqual(
+            spool.path(identifier, ".NT"), self.directory.joinpath(f"{identifier}.NT")
+        )
+        for name, suffix in (
+            ("../" + identifier[3:], ".nt"),
+            ("not-an-identifier", ".nt"),
+            (identifier, ".exe"),
+            (identifier, "/../../etc/passwd"),
+        ):
+            with self.assertRaises(ValueError):
+                spool.path(name, suffix)
+
+    def test_oldest_files_are_removed_above_quota(self):
+        spool = Spool(self.directory, ttl=3600, quota=25, suffixes=[".nt"])
+
+        oldest = self.create(spool, age=300)
+        older = self.create(spool, age=200)
+        writing = self.create(spool, age=0)
+
+        self.assertEqual(spool.clean(), 1)
+        self.assertFalse(oldest.exists())
+        self.assertTrue(older.exists())
+        self.assertTrue(writing.exists())
+
+    def test_is_expired(self):
+        spool = Spool(self.directory, ttl=100, quota=25, suffixes=[".nt"])
+
+        self.assertTrue(spool.is_expired(str(ULID.from_timestamp(time() - 200))))
+        self.assertFalse(spool.is_expired(str(ULID())))
+        self.assertFalse(spool.is_expired("not-an-identifier"))
+
+        evicted = self.create(spool, age=100 - 30, size=30)
+        self.create(spool, age=0, size=10)
+        spool.clean()
+        self.assertTrue(spool.is_expired(evicted.name.split(".")[0]))
@@ -0,0 +1,102 @@
+from threading import Lock
+from time import sleep
+from unittest import TestCase
+
+from requests import ConnectionError
+
+from sls_api.upload import AdaptiveLimiter, BatchUploader, UploadError
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.content = b""
+
+
+class TestAdaptiveLimiter(TestCase):
+    def test_limit_decreases_on_error_and_grows_back(self):
+        limiter = AdaptiveLimiter(4)
+
+        limiter.feedback(False, 0.1)
+        self.assertEqual(limiter.limit, 2)
+        limiter.feedback(False, 0.1)
+        limiter.feedback(False, 0.1)
+        self.assertEqual(limiter.limit, 1)
+
+        for _ in range(20):
+            limiter.feedback(True, 0.1)
+        self.assertEqual(limiter.limit, 4)
+
+    def test_limit_decreases_when_slow(self):
+        limiter = AdaptiveLimiter(4, max_latency=1)
+        limiter.feedback(True, 2)
+        self.assertEqual(limiter.limit, 2)
+
+
+class TestBatchUploader(TestCase):
+    def batches(self, count: int):
+        for index in range(count):
+            yield f"{index}".encode(), 10
+
+    def test_upload_concurrently(self):
+        lock = Lock()
+        in_flight, peak, posted = [0], [0], []
+
+        def post(data):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            sleep(0.01)
+            with lock:
+                in_flight[0] -= 1
+                posted.append(data)
+            return FakeResponse(201)
+
+        uploader = BatchUploader(post, workers=3)
+        self.assertEqual(uploader.upload(self.batches(12)), 120)
+        self.assertEqual(len(posted), 12)
+        self.assertLessEqual(peak[0], 3)
+        self.assertGreater(peak[0], 1)
+
+    def test_failed_batches_are_retried(self):
+        attempts = []
+
+        def post(data):
+            attempts.append(data)
+            if len(attempts) == 1:
+                raise ConnectionError("connection reset")
+            if len(attempts) == 2:
+                return FakeResponse(503)
+            return FakeResponse(201)
+
+        progress = []
+        uploader = BatchUploader(
+            post,
+            workers=1,
+            retries=2,
+            backoff=0,
+            progress=lambda *args: progress.append(args),
+        )
+        self.assertEqual(uploader.upload(self.batches(1)), 10)
+        self.assertEqual(len(attempts), 3)
+        self.assertEqual(len(progress), 1)
+
+    def test_upload_fails_after_retries(self):
+        uploader = BatchUploader(
+            lambda data: FakeResponse(500), workers=2, retries=1, backoff=0
+        )
+        with self.assertRaises(UploadError):
+            uploader.upload(self.batches(5))
+
+    def test_client_errors_are_not_retried(self):
+        attempts = []
+
+        def post(data):
+            attempts.append(data)
+            return FakeResponse(400)
+
+        uploader = BatchUploader(post, workers=1, retries=3, backoff=0)
+        with self.assertRaises(UploadError):
+            uploader.upload(self.batches(1))
+        self.assertEqual(len(attempts), 1)
@@ -1,7 +1,7 @@
 from copy import deepcopy
 from unittest import TestCase
 
-from sls_api.users import User
+from sls_api.users import User, Users
 
 
 class TestUser(TestCase):
@@ -65,3 +65,30 @@ class TestUser(TestCase):
 
         self.assertFalse(user.can_readwrite("test_ro"))
         self.assertTrue(user.can_readwrite("test_rw"))
+
+
+class TestUsers(TestCase):
+    USERS = {
+        "alice": {**TestUser.DEFAULT_VALUES, "id": "alice", "token": "🔑"},
+        "bob": {**TestUser.DEFAULT_VALUES, "id": "bob", "token": "🗝️"},
+    }
+
+    def test_get_by_token(self):
+        users = Users(self.USERS)
+
+        self.assertEqual(users.get_by_token("🔑").id, "alice")
+        self.assertEqual(users.get_by_token("🗝️").id, "bob")
+        self.assertIsNone(users.get_by_token("admin"))
+
+    def test_get_by_token_returns_new_users(self):
+        users = Users(self.USERS)
+
+        user = users.get_by_token("🔑")
+        user.set_sources({"test": {"accessControl": "readwrite"}})
+        self.assertEqual(users.get_by_token("🔑").sources, {})
+
+    def test_missing_name_is_set_from_id(self):
+        values = deepcopy(self.USERS)
+        del values["alice"]["name"]
+
+        self.assertEqual(Users(values).get_by_token("🔑").name, "alice")
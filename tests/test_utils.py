@@ -1,6 +1,16 @@
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import monotonic
 from unittest import TestCase
 
-from sls_api.utils import batched
+from sls_api.utils import (
+    append_chunk,
+    batched,
+    partition_predicates,
+    read_chunk,
+    read_page,
+    wait_until,
+)
 
 
 class TestUtils(TestCase):
@@ -14,3 +24,89 @@ class TestUtils(TestCase):
         for index, chunk in enumerate(chunks):
             self.assertEqual(len(chunk), 10)
             self.assertEqual(chunk[0], 10 * index)
+
+    def test_partition_predicates_covers_disjoint_predicates(self):
+        counts = {"p1": 50, "p2": 30, "p3": 20, "p4": 10, "p5": 5}
+        partitions = partition_predicates(counts, 3)
+
+        predicates = [predicate for partition in partitions for predicate in partition]
+        self.assertCountEqual(predicates, counts)
+        sizes = [sum(counts[predicate] for predicate in p) for p in partitions]
+        self.assertEqual(sorted(sizes), [30, 35, 50])
+
+    def test_partition_predicates_without_empty_partitions(self):
+        partitions = partition_predicates({"p1": 1}, 4)
+        self.assertEqual(partitions, [["p1"]])
+
+    def test_partition_predicates_with_invalid_count(self):
+        with self.assertRaises(ValueError):
+            partition_predicates({"p1": 1}, 0)
+
+    def test_wait_until_condition_holds(self):
+        checks = []
+
+        def condition():
+            checks.append(monotonic())
+            return len(checks) == 4
+
+        self.assertTrue(wait_until(condition, timeout=5, interval=0.01))
+        delays = [after - before for before, after in zip(checks, checks[1:])]
+        # the delay doubles after each failed check
+        self.assertGreaterEqual(delays[2], 0.04)
+
+    def test_wait_until_timeout(self):
+        start = monotonic()
+        self.assertFalse(wait_until(lambda: False, timeout=0.05, interval=0.01))
+        self.assertLess(monotonic() - start, 1)
+
+
+class TestReadChunk(TestCase):
+    CONTENT = '<a> <b> "café 🦆" .\n' * 10
+
+    def setUp(self):
+        self.tmpdir = TemporaryDirectory()
+        self.path = Path(self.tmpdir.name).joinpath("graph.nt")
+        self.path.write_text(self.CONTENT, encoding="utf-8")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def read_all(self, size: int, use_mmap: bool = False) -> bytes:
+        data, offset = b"", 0
+        while chunk := read_chunk(self.path, offset, size, use_mmap=use_mmap):
+            chunk.decode("utf-8")  # never cut in the middle of a character
+            data += chunk
+            offset += len(chunk)
+        return data
+
+    def test_read_chunk_with_seek(self):
+        for size in (5, 7, 64):
+            self.assertEqual(self.read_all(size).decode("utf-8"), self.CONTENT)
+
+    def test_read_chunk_with_mmap(self):
+        for size in (5, 7, 64):
+            data = self.read_all(size, use_mmap=True)
+            self.assertEqual(data.decode("utf-8"), self.CONTENT)
+
+    def test_read_chunk_after_end_of_file(self):
+        size = self.path.stat().st_size
+        self.assertEqual(read_chunk(self.path, size, 10), b"")
+        self.assertEqual(read_chunk(self.path, size, 10, use_mmap=True), b"")
+
+    def test_read_page_returns_file_size(self):
+        chunk, filesize = read_page(self.path, 0, 7)
+        self.assertEqual(chunk, read_chunk(self.path, 0, 7))
+        self.assertEqual(filesize, self.path.stat().st_size)
+
+    def test_append_chunk(self):
+        path = Path(self.tmpdir.name).joinpath("upload.nt")
+        append_chunk(path, b"<a> <b> <c> .\n")
+        append_chunk(path, b"<d> <e> <f> .\n")
+        self.assertEqual(path.read_bytes(), b"<a> <b> <c> .\n<d> <e> <f> .\n")
+
+    def test_read_binary_chunk(self):
+        path = Path(self.tmpdir.name).joinpath("graph.binary")
+        path.write_bytes("é".encode("utf-8") * 4)
+
+        self.assertEqual(len(read_chunk(path, 0, 3)), 2)
+        self.assertEqual(len(read_chunk(path, 0, 3, text=False)), 3)